@@ -0,0 +1,192 @@
+import re
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse, Response
+
+from backend.routers import chat as chat_router
+from backend.services.admin_auth import require_admin
+from backend.services.product_loader import load_catalog
+from backend.services import advice_cache, code_trie, faq_matcher, intent_model, keyword_automaton, lead_outbox, memory_report, profiler, shadow_search
+
+router = APIRouter(prefix="/__debug", tags=["Debug"], dependencies=[Depends(require_admin)])
+
+
+def _profile_or_404(profile_id: str) -> dict:
+    prof = profiler.get_profile(profile_id)
+    if prof is None:
+        raise HTTPException(status_code=404, detail="perfil no encontrado")
+    return prof
+
+
+@router.get("/profiles")
+def profiles():
+    """Perfiles recientes (los de /chat con X-Ecolite-Profile), del más nuevo al más viejo."""
+    return {"profiles": profiler.list_profiles()}
+
+
+@router.get("/profiles/{profile_id}")
+def profile_detail(profile_id: str):
+    """Top de funciones (global y solo search_service / chat.py) de un perfil."""
+    prof = _profile_or_404(profile_id)
+    return {k: v for k, v in prof.items() if k not in {"folded", "pstats"}}
+
+
+@router.get("/profiles/{profile_id}/folded", response_class=PlainTextResponse)
+def profile_folded(profile_id: str):
+    """Pilas colapsadas para flamegraph.pl / speedscope / inferno."""
+    return PlainTextResponse(_profile_or_404(profile_id)["folded"])
+
+
+@router.get("/profiles/{profile_id}/pstats")
+def profile_pstats(profile_id: str):
+    """Volcado binario de cProfile (abrir con pstats.Stats o snakeviz)."""
+    prof = _profile_or_404(profile_id)
+    if "pstats" not in prof:
+        raise HTTPException(status_code=404, detail="el perfil no es de cProfile")
+    return Response(
+        prof["pstats"],
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="{profile_id}.pstats"'},
+    )
+
+
+# ---------- memoria ----------
+@router.get("/memory")
+def memory():
+    """Tamaño profundo del catálogo, índice de búsqueda, sesiones y vocabulario por request."""
+    return memory_report.footprint()
+
+
+@router.post("/tracemalloc/start")
+def tracemalloc_start(frames: int = Query(default=memory_report.TRACE_FRAMES, ge=1, le=50)):
+    return memory_report.start(frames)
+
+
+@router.post("/tracemalloc/stop")
+def tracemalloc_stop():
+    return memory_report.stop()
+
+
+@router.post("/tracemalloc/snapshot")
+def tracemalloc_snapshot(name: Optional[str] = None, limit: int = Query(default=20, ge=1, le=200)):
+    """Toma un snapshot con nombre y devuelve sus líneas con más memoria asignada."""
+    try:
+        name = memory_report.take_snapshot(name)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"name": name, "top": memory_report.top(name, limit)}
+
+
+@router.get("/tracemalloc/diff")
+def tracemalloc_diff(old: str, new: str, limit: int = Query(default=20, ge=1, le=200),
+                     group_by: str = Query(default="lineno", pattern="^(lineno|filename|traceback)$")):
+    """Crecimiento entre dos snapshots (p. ej. antes/después de una ráfaga de carga)."""
+    try:
+        return {"old": old, "new": new, "top": memory_report.diff(old, new, limit, group_by)}
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"snapshot no encontrado: {e.args[0]}")
+
+
+# ---------- búsqueda en sombra ----------
+@router.get("/shadow")
+def shadow():
+    """Solapamiento y diferencia de latencia del motor en sombra frente a search_candidates."""
+    return shadow_search.snapshot()
+
+
+@router.post("/shadow")
+def shadow_configure(engine: str = ""):
+    """Activa otro motor en sombra (nombre del registro o modulo:funcion); vacío lo apaga."""
+    try:
+        shadow_search.configure(engine.strip())
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"motor no disponible: {e}")
+    return shadow_search.snapshot()
+
+
+# ---------- clasificador local de intención ----------
+@router.get("/intent_model")
+def intent_model_stats():
+    """Cobertura del clasificador local frente al LLM y latencia ahorrada estimada."""
+    return intent_model.snapshot()
+
+
+@router.post("/intent_model/reload")
+def intent_model_reload():
+    """Relee el archivo del modelo (tras correr bench.train_intent)."""
+    intent_model.load()
+    return intent_model.snapshot()
+
+
+# ---------- caché de asesoría ----------
+@router.get("/advice_cache")
+def advice_cache_stats():
+    """Tamaño, tasa de aciertos y entradas recientes de la caché de asesoría."""
+    return advice_cache.snapshot()
+
+
+@router.delete("/advice_cache")
+def advice_cache_clear():
+    advice_cache.clear()
+    return advice_cache.snapshot()
+
+
+# ---------- palabras clave del router ----------
+@router.get("/keywords")
+def keywords():
+    """Tamaño de cada lista (código + ECOLITE_KEYWORDS_FILE) y estados del autómata."""
+    automaton = chat_router.ANALYZER.automaton
+    return {
+        "extra_file": str(keyword_automaton.EXTRA_PATH),
+        "lists": {name: len(words) for name, words in automaton.sets.items()},
+        "states": automaton.states,
+    }
+
+
+@router.post("/keywords/reload")
+def keywords_reload():
+    """Relee el archivo de palabras extra y reconstruye el autómata sin reiniciar."""
+    try:
+        chat_router.reload_keywords()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return keywords()
+
+
+# ---------- FAQ ----------
+@router.get("/faq")
+def faq_stats():
+    """Entradas cargadas, tasa de aciertos y aciertos por id de FAQ."""
+    return faq_matcher.snapshot()
+
+
+@router.post("/faq/reload")
+def faq_reload():
+    """Relee ECOLITE_FAQ_FILE y recompila las regex; si el archivo es inválido se conserva el anterior."""
+    try:
+        faq_matcher.reload()
+    except (OSError, ValueError, KeyError, re.error) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return faq_matcher.snapshot()
+
+
+# ---------- trie de códigos ----------
+@router.get("/codes")
+def codes(prefix: Optional[str] = Query(None, description="familia/prefijo a consultar, p. ej. VING125")):
+    """Estado del trie de códigos; con ?prefix= también la familia y el prefijo indexado más largo."""
+    catalog, version = load_catalog()
+    trie = code_trie.for_catalog(list(catalog.values()), version)
+    out = code_trie.snapshot()
+    if prefix:
+        longest = trie.longest_prefix(prefix)
+        out["family"] = [p.get("code") or p.get("sku") or p.get("id") for p in trie.family(prefix)[:50]]
+        out["longest_prefix"] = longest[0] if longest else None
+    return out
+
+
+# ---------- cola de leads hacia DataCRM ----------
+@router.get("/outbox")
+def outbox():
+    """Conteo de envíos pendientes, enviados y en dead-letter."""
+    return lead_outbox.outbox_stats()
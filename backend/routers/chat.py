@@ -1,11 +1,12 @@
 from __future__ import annotations
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional, Tuple
 from collections import Counter
 import os
 import re
 import difflib
+import time
 from urllib.parse import quote_plus
 from backend.routers.db import guardar_conversacion
 from .db import guardar_conversacion
@@ -13,13 +14,32 @@ from .db import guardar_conversacion
 
 # Servicios con fallback (sin auto-importarse a sí mismo)
 try:
-    from backend.services.product_loader import load_products
+    from backend.services.product_loader import load_catalog
     from backend.services.search_service import search_candidates, singularize_es
-    from backend.services.openai_client import chat as llm_chat
+    from backend.services.openai_client import chat as llm_chat, BREAKER as llm_breaker, is_fallback
+    from backend.services.metrics import span, request_span, set_branch, set_degraded
+    from backend.services.admin_auth import is_admin_request
+    from backend.services import profiler, shadow_search, llm_admission, intent_model, advice_cache
+    from backend.services.message_analyzer import MessageAnalyzer
+    from backend.services import keyword_automaton, code_trie
+    from backend.services.deadline import deadline_scope
+    from backend.services.text_norm import norm_ascii
 except Exception:
-    from product_loader import load_products
+    from product_loader import load_catalog
     from search_service import search_candidates, singularize_es
-    from openai_client import chat as llm_chat
+    from openai_client import chat as llm_chat, BREAKER as llm_breaker, is_fallback
+    from metrics import span, request_span, set_branch, set_degraded
+    from admin_auth import is_admin_request
+    import profiler
+    import shadow_search
+    import llm_admission
+    import intent_model
+    import advice_cache
+    from message_analyzer import MessageAnalyzer
+    import keyword_automaton
+    import code_trie
+    from deadline import deadline_scope
+    from text_norm import norm_ascii
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
@@ -67,8 +87,15 @@ COMPETITOR_KEYWORDS = {
     "nipponflex", "ilumax", "mercury", "vatiu", "safiro", "lumek", "evergreen", "eglo", "lumenex",
     "delta light", "luminex", "luxion", "lirvan", "alutrafic", "inadisa", "celsa", "lumen", "ledvance"
 }
-def _mentions_competitor(msg_norm: str) -> bool:
-    return any(k in msg_norm for k in COMPETITOR_KEYWORDS)
+# Marcas de la guarda inicial de chat() (respuesta comercial en vez de OFFSCOPE_REPLY)
+COMPETITOR_BRANDS = {
+    "sylvania", "sylvannia", "philips", "osram", "ge lighting",
+    "schneider", "siemens", "opple", "xiaomi", "yeelight",
+    "panasonic", "abb", "legrand", "lumenac", "techlight", "luxion",
+    "tecnolite", "roy alpha", "nipponflex", "ilumax", "mercury", "vatiu",
+    "safiro", "lumek", "evergreen", "eglo", "lumenex", "delta light",
+    "luminex",
+}
 
 OFFSCOPE_REPLY = (
     "Puedo ayudarte únicamente con iluminación de Ecolite. "
@@ -122,14 +149,21 @@ QUESTION_RE = re.compile(
     re.I
 )
 
+# Intención FAQ por reglas (modo degradado, sin LLM): políticas de empresa
+FAQ_INTENT_RE = re.compile(
+    r"\b(garant[ií]a|env[ií]os?|despach\w*|domicilio|horarios?|direcci[oó]n|sede|tienda|ubicad[oa]s?|"
+    r"contacto|tel[eé]fono|correo|pagos?|factura\w*|devoluci[oó]n\w*|cambios?|empresa|ecolite)\b",
+    re.I
+)
+
 # === FAQ: import robusto (soporta distintas estructuras del proyecto) ===
 try:
-    from backend.routers.faq import faq_try_answer
+    from backend.services.faq_matcher import match as faq_match
 except Exception:
     try:
-        from faq import faq_try_answer
+        from faq_matcher import match as faq_match
     except Exception:
-        def faq_try_answer(_msg: str):
+        def faq_match(_msg: str):
             return None
 
 def _is_question(msg: str) -> bool:
@@ -199,14 +233,7 @@ def _wa_url(base: str, text: str) -> str:
     return f"{base}{sep}text={quote_plus(text)}"
 
 # ===== Utils texto =====
-def _norm(s: str) -> str:
-    import unicodedata
-    s = (s or "").strip()
-    s = unicodedata.normalize("NFKD", s).encode("ascii", "ignore").decode("ascii")
-    s = s.lower()
-    s = re.sub(r"[^a-z0-9]+", " ", s)
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
+_norm = norm_ascii   # NFKD→ascii, minúsculas, solo [a-z0-9] (memoizado, ver text_norm)
 
 def _product_key(p: Dict[str, Any]) -> str:
     return (
@@ -304,49 +331,8 @@ def _soft_token_match(qtok: str, prod_tokens: set) -> bool:
                 return True
     return False
 
-# ===== Índice de códigos (se mantiene) =====
-def _extract_codes(p: Dict[str, Any]) -> List[str]:
-    vals = []
-    for f in ("code", "sku", "id"):
-        v = p.get(f)
-        if v:
-            vals.append(str(v).upper().strip())
-    return vals
-
-def _base(c: str) -> str:
-    c = (c or "").upper()
-    return c.split("-")[0] if "-" in c else c
-
-def _build_code_index(products: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
-    idx: Dict[str, List[Dict[str, Any]]] = {}
-    for p in products:
-        for c in _extract_codes(p):
-            for k in {c, _base(c), c.replace("-", ""), _base(c).replace("-", "")}:
-                if k:
-                    idx.setdefault(k, []).append(p)
-    return idx
-
-def _find_code_hit(message: str, idx: Dict[str, List[Dict[str, Any]]]) -> Optional[List[Dict[str, Any]]]:
-    raw_upper = (message or "").upper()
-    # Extrae tokens tipo ABC-123, DC42V, HB3A2, etc. (≥3 chars)
-    tokens = re.findall(r"[A-Z0-9-]{3,}", raw_upper)
-
-    keys: set[str] = set()
-    for t in tokens:
-        t = t.strip("-")
-        if not t:
-            continue
-        keys |= {
-            t,
-            t.replace("-", ""),
-            _base(t),
-            _base(t).replace("-", ""),
-        }
-
-    for k in sorted(keys, key=len, reverse=True):
-        if k in idx:
-            return idx[k]
-    return None
+# ===== Índice de códigos: trie por versión del catálogo (ver code_trie) =====
+_extract_codes = code_trie.extract_codes
 
 # ---- Helpers para petición de "un solo código" ----
 def _single_code_token(msg: str) -> Optional[str]:
@@ -359,23 +345,6 @@ def _single_code_token(msg: str) -> Optional[str]:
     uniq = list(dict.fromkeys(toks))
     return uniq[0] if len(uniq) == 1 else None
 
-def _pick_code_item(candidates: List[Dict[str, Any]], message_or_code: str) -> Dict[str, Any]:
-    """
-    Elige el mejor candidato para un código pedido (prefiere match exacto, luego misma raíz).
-    """
-    target = set(re.findall(r"[A-Z0-9-]{3,}", (message_or_code or "").upper()))
-    base_target = {_base(t) for t in target}
-    def _score(p):
-        codes = {c.upper() for c in _extract_codes(p)}
-        score = 0
-        if codes & target:                       # exacto
-            score += 100
-        if {_base(c) for c in codes} & base_target:  # misma raíz
-            score += 10
-        score += sum(len(c) for c in codes)      # desempate
-        return score
-    return max(candidates, key=_score)
-
 def _code_substring_candidates(needle: str, products: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
     Busca candidatos cuando el usuario escribe un único token de tipo “código”.
@@ -570,7 +539,12 @@ def _filtered_page(
     """
     # 1) Candidatos del motor de búsqueda
     need = (page + 1) * PAGE_SIZE + 400
-    pool = search_candidates(products, query, limit=need)
+    with span("search_candidates"):
+        t0 = time.perf_counter()
+        pool = search_candidates(products, query, limit=need)
+    if shadow_search.ENABLED:
+        # Motor candidato en segundo plano; la respuesta siempre sale de `pool`
+        shadow_search.submit(products, query, need, pool, time.perf_counter() - t0)
 
     filtered = pool
 
@@ -655,12 +629,17 @@ def _llm_intent(msg: str) -> str:
     - FAQ: políticas de empresa (garantía, envíos, horarios, dirección, contacto)
     - OTRO: lo demás
     Responde SOLO una palabra.
+    Si el clasificador local (intent_model) está seguro, no se llama al LLM.
     """
+    local = intent_model.predict("intent", msg)
+    if local:
+        return local
     sys = (
         "Clasifica la intención del usuario. Responde con UNA SOLA palabra en mayúsculas: "
         "PRODUCTO, FAQ u OTRO. No expliques nada."
     )
-    ans = (llm_chat(sys, msg) or "OTRO").strip().upper()
+    with span("llm_intent"):
+        ans = (llm_chat(sys, msg, site="intent") or "OTRO").strip().upper()
     if "PRODUCTO" in ans:
         return "PRODUCTO"
     if "FAQ" in ans:
@@ -671,10 +650,15 @@ def _llm_product_mode(msg: str) -> str:
     """
     Decide si el usuario quiere VER una lista (LISTAR) o solo ASESORÍA breve (ASESORAR).
     Responde con LISTAR o ASESORAR.
+    Si el clasificador local (intent_model) está seguro, no se llama al LLM.
     """
+    local = intent_model.predict("product_mode", msg)
+    if local:
+        return local
     sys = ("Decide si el usuario quiere VER una lista de productos o solo recibir ASESORÍA breve. "
            "Responde con LISTAR o ASESORAR y nada más.")
-    ans = (llm_chat(sys, msg) or "ASESORAR").strip().upper()
+    with span("llm_product_mode"):
+        ans = (llm_chat(sys, msg, site="product_mode") or "ASESORAR").strip().upper()
     return "LISTAR" if "LISTAR" in ans else "ASESORAR"
 
 def _product_mode_override(msg: str) -> Optional[str]:
@@ -727,57 +711,103 @@ def _build_system_prompt(kind: str, ctx: str) -> str:
 def _fallback_dynamic(msg: str, products: List[Dict[str, Any]], vocab: set) -> str:
     return "Para ayudarte mejor, cuéntame el espacio a iluminar y si tienes un presupuesto aproximado."
 
-def _norm_code(s: str) -> str:
-    """Normaliza códigos a MAYÚSCULAS y sin separadores (ECO-PL12WA -> ECOPL12WA)."""
-    return re.sub(r"[^A-Z0-9]", "", (s or "").upper())
+_norm_code = code_trie.norm_code
 
-def _single_code_token_raw(msg: str) -> Optional[Tuple[str, str]]:
-    toks = re.findall(r"[A-Z0-9-]{3,}", (msg or "").upper())
-
-    # ❌ EXCLUIR vatios tipo “35W”, “50W”, “20W”
-    watt_like = set()
-    for t in toks:
-        if re.fullmatch(r"\d{2,3}W", t):  # 35W / 100W / 50W
-            watt_like.add(t)
+_WATT_TOKEN_RE = re.compile(r"\d{2,3}W")   # 35W / 100W / 50W
+_DIGIT_RE = re.compile(r"\d")
 
-    toks = [t for t in toks if t not in watt_like]
-
-    # Reglas normales
-    toks = [t for t in toks if any(ch.isdigit() for ch in t)]
+def _single_code_token_raw(msg: str) -> Optional[Tuple[str, str]]:
+    # ❌ EXCLUIR vatios tipo “35W”, “50W”, “20W”; el resto debe tener algún dígito
+    toks = [t for t in _CODE_RE.findall((msg or "").upper())
+            if not _WATT_TOKEN_RE.fullmatch(t) and _DIGIT_RE.search(t)]
     uniq = list(dict.fromkeys(toks))
 
     return (uniq[0], _norm_code(uniq[0])) if len(uniq) == 1 else None
 
 
-def _find_exact_code_product(code_norm: str, products: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+# Todas las señales del mensaje en una pasada (normaliza una vez)
+ANALYZER_KEYWORDS = {
+    "competitor_brand": COMPETITOR_BRANDS,
+    "competitor": COMPETITOR_KEYWORDS,
+    "catalog": CATALOG_KEYWORDS,
+    "cotizar": COTIZAR_KEYWORDS,
+    "ventilador": {"ventilador"},
+}
+ANALYZER_PATTERNS = {
+    "more": _MORE_RE,
+    "abuse": ABUSE_RE,
+    "show": SHOW_RE,
+    "suggest": SUGGEST_RE,
+    "ask_prefix": ASK_PREFIX_RE,
+    "followup": FOLLOWUP_RE,
+    "faq_topic": FAQ_INTENT_RE,
+}
+ANALYZER = MessageAnalyzer(
+    normalize=_norm,
+    faq_match=faq_match,
+    is_question=_is_question,
+    code_token=_single_code_token_raw,
+    keywords=keyword_automaton.merge(ANALYZER_KEYWORDS, keyword_automaton.load_extra()),
+    patterns=ANALYZER_PATTERNS,
+)
+
+def reload_keywords() -> Dict[str, int]:
     """
-    Busca match EXACTO por código normalizado contra campos típicos de código.
-    No cae a substrings ni familias. Devuelve 1 producto o None.
+    Relee ECOLITE_KEYWORDS_FILE y reconstruye el autómata; devuelve el tamaño de cada lista.
+    Si el archivo es inválido lanza ValueError y se conserva el autómata anterior.
     """
-    CODE_FIELDS = ("code", "sku", "id", "model", "slug")  # añade más si tu catálogo los usa
-    for p in products:
-        if not isinstance(p, dict):
-            continue
-        for f in CODE_FIELDS:
-            v = p.get(f)
-            if v and _norm_code(v) == code_norm:
-                return p
-    return None
+    merged = keyword_automaton.merge(ANALYZER_KEYWORDS, keyword_automaton.load_extra(strict=True))
+    ANALYZER.set_keywords(merged)
+    return {name: len(words) for name, words in merged.items()}
 
 # ===== Endpoint =====
+PROFILE_HEADER = "X-Ecolite-Profile"
+BRANCH_HEADER = "X-Ecolite-Branch"   # rama de respuesta (faq, listing, ...) para pruebas de carga
+DEGRADED_HEADER = "X-Ecolite-Degraded"   # motivo si el turno se sirvió sin LLM (saturación/breaker)
+# Presupuesto total (s) para todas las llamadas al LLM de un turno
+LLM_BUDGET_S = float(os.getenv("ECOLITE_LLM_BUDGET_S", "10"))
+
+
 @router.post("/", response_model=ChatOut)
-def chat(in_: ChatIn) -> ChatOut:
+def chat(in_: ChatIn, request: Request, response: Response) -> ChatOut:
+    # Perfilado bajo demanda: solo con X-Ecolite-Profile (o ?profile=) y token admin.
+    mode = request.headers.get(PROFILE_HEADER) or request.query_params.get("profile")
+    if mode and is_admin_request(request):
+        def _run() -> ChatOut:
+            with request_span("chat") as state, deadline_scope(LLM_BUDGET_S):
+                out = _chat_turn(in_)
+            _set_turn_headers(response, state)
+            return out
+        out, profile_id = profiler.profile_call(_run, mode=mode, label=(in_.message or "")[:200])
+        response.headers["X-Profile-Id"] = profile_id
+        return out
+
+    with request_span("chat") as state, deadline_scope(LLM_BUDGET_S):
+        out = _chat_turn(in_)
+    _set_turn_headers(response, state)
+    return out
+
+
+def _set_turn_headers(response: Response, state: Dict[str, Any]) -> None:
+    response.headers[BRANCH_HEADER] = state["branch"]
+    if state.get("degraded"):
+        response.headers[DEGRADED_HEADER] = state["degraded"]
+
+
+def _chat_turn(in_: ChatIn) -> ChatOut:
     try:
         msg_raw = (in_.message or "").strip()
         if not msg_raw:
+            set_branch("bad_request")
             raise HTTPException(status_code=400, detail="message is required")
 
-        msg_norm = _norm(msg_raw)
+        with span("analyze"):
+            feats = ANALYZER.analyze(msg_raw)
 
-        faq_text = faq_try_answer(msg_raw)
-        if faq_text:
+        if feats.faq_answer:
+            set_branch("faq")
             resp = ChatOut(
-                content=faq_text,
+                content=feats.faq_answer,
                 products=[],
                 page=0,
                 last_query="",
@@ -787,15 +817,8 @@ def chat(in_: ChatIn) -> ChatOut:
             return resp
 
         # 🚫 Bloquear menciones a otras marcas / competencia
-        if any(k in msg_norm for k in [
-            "sylvania", "sylvannia", "philips", "osram", "ge lighting",
-            "schneider", "siemens", "opple", "xiaomi", "yeelight",
-            "panasonic", "abb", "legrand", "lumenac", "techlight", "luxion",
-            "tecnolite", "roy alpha", "nipponflex", "ilumax", "mercury", "vatiu",
-            "safiro", "lumek", "evergreen", "eglo", "lumenex", "delta light",
-            "luminex", "luxion"
-        ]):
-
+        if feats.competitor_brand:
+            set_branch("competitor")
             resp = ChatOut(
                 content="En ECOLITE contamos con un portafolio completo y disponibilidad inmediata para cubrir todas las necesidades de tu proyecto. Nuestras luminarias destacan por su calidad, eficiencia y respaldo técnico. 🔧\n"
                         "Estoy aquí para ayudarte a encontrar la mejor opción dentro de nuestra línea.",
@@ -811,8 +834,8 @@ def chat(in_: ChatIn) -> ChatOut:
         st = _st(in_.session_id)
 
         # Catálogo
-        msg_norm = _norm(msg_raw)
-        if any(k in msg_norm for k in CATALOG_KEYWORDS):
+        if feats.catalog:
+            set_branch("catalog")
             text = f"Puedes ver el catálogo y portafolio aquí: {CATALOG_URL}"
             resp = ChatOut(
                 content=text,
@@ -826,8 +849,8 @@ def chat(in_: ChatIn) -> ChatOut:
 
 
         # Cotizar (WhatsApp)
-        msg_norm = _norm(msg_raw)
-        if any(k in msg_norm for k in COTIZAR_KEYWORDS):
+        if feats.cotizar:
+            set_branch("cotizar")
             url = QUOTE_WHATSAPP_URL
             resp = ChatOut(
                 content=f"Entra a [[a|WhatsApp|{url}]] para continuar 👌",
@@ -840,25 +863,27 @@ def chat(in_: ChatIn) -> ChatOut:
             return resp
 
         # ( Ventiladores )
-        msg_norm = _norm(msg_raw)
-        ventilador_mode = ("ventilador" in msg_norm) or ("ventiladores" in msg_norm)
+        ventilador_mode = feats.ventilador
         if ventilador_mode:
             in_.message = msg_raw + " (VENTILADOR_MODE)"
 
         # Bloquear competencia)
-        if _mentions_competitor(msg_norm):
+        if feats.competitor:
+            set_branch("competitor")
             resp = ChatOut(content=OFFSCOPE_REPLY, products=[], page=0, last_query="", has_more=False)
             _log_conversation_safe(in_.session_id, msg_raw, resp.content)
             return resp
 
 
         # Cargar catálogo y señales
-        catalog, _path = load_products()
-        products = list(catalog.values())
-        cat_vocab = _cat_tag_vocab(products)
-        phrase_vocab = _phrase_vocab(products)
-        vocab = _build_vocab_dynamic(products)
-        ctx = _catalog_context(products, vocab)
+        with span("catalog_load"):
+            catalog, catalog_ver = load_catalog()
+            products = list(catalog.values())
+        with span("vocab_build"):
+            cat_vocab = _cat_tag_vocab(products)
+            phrase_vocab = _phrase_vocab(products)
+            vocab = _build_vocab_dynamic(products)
+            ctx = _catalog_context(products, vocab)
 
         cats = _cat_tokens(msg_raw, cat_vocab)
         phr  = _phrase_tokens(msg_raw, phrase_vocab)
@@ -866,20 +891,39 @@ def chat(in_: ChatIn) -> ChatOut:
 
         # “Ver más”
         client_page = max(0, int(getattr(in_, "page", 0) or 0))
-        is_more = bool(_MORE_RE.search(msg_raw))
-        abused  = bool(ABUSE_RE.search(msg_raw))
+        is_more = feats.more
+        abused  = feats.abuse
+
+        # Con el LLM saturado o el breaker abierto el turno va en modo determinista:
+        # intención por reglas, listado vía _filtered_page y textos fijos.
+        degraded = llm_admission.degrade_reason(llm_breaker.state == "open")
+        if degraded:
+            set_degraded(degraded)
+            llm_admission.note_degraded(degraded)
 
-        mode = _llm_product_mode(msg_raw)
-        ov   = _product_mode_override(msg_raw)
+        ov   = feats.mode_override
         if ov:
             mode = ov
+        elif degraded:
+            mode = "LISTAR"
+        else:
+            mode = _llm_product_mode(msg_raw)
 
         if (not is_more and not abused
                 and _looks_like_product_intent(msg_raw, vocab, cats, phr)
                 and mode == "ASESORAR"):
+            set_branch("asesorar")
             sys_prompt = _build_system_prompt("inscope", ctx)
             sys_prompt += "\n- No listes productos ni enlaces; responde en 2–4 líneas."
-            ai = llm_chat(sys_prompt, msg_raw) or (
+            # Consultas casi idénticas reutilizan la asesoría ya generada
+            ai = None if ventilador_mode else advice_cache.lookup(msg_raw, sys_prompt)
+            if ai:
+                set_branch("asesorar_cache")
+            else:
+                ai = llm_chat(sys_prompt, msg_raw, site="asesorar")
+                if ai and not is_fallback(ai) and not ventilador_mode:
+                    advice_cache.store(msg_raw, ai, sys_prompt)
+            ai = ai or (
                 "Para bodegas: usa highbay en techos ≥6–7 m por uniformidad; herméticas lineales (IP65) en 3–5 m o pasillos; "
                 "prioriza IP65/66 si hay polvo o humedad."
             )
@@ -893,24 +937,25 @@ def chat(in_: ChatIn) -> ChatOut:
 
 
         # FAQ
-        if not is_more and _is_question(msg_raw) and not abused:
+        if not is_more and feats.question and not abused:
             if not _looks_like_product_intent(msg_raw, vocab, cats, phr):
-                if _llm_intent(msg_raw) == "FAQ":
-                    try:
-                        faq_text = faq_try_answer(msg_raw)
-                    except Exception:
-                        faq_text = None
+                intent = ("FAQ" if feats.faq_topic else "OTRO") if degraded else _llm_intent(msg_raw)
+                if intent == "FAQ":
+                    faq_text = feats.faq_answer
                     if faq_text:
+                        set_branch("faq")
                         resp = ChatOut(content=faq_text, products=[], page=0, last_query="", has_more=False)
                         _log_conversation_safe(in_.session_id, msg_raw, resp.content)
                         return resp
 
 
+                    set_branch("faq_llm")
                     sys_prompt = (
                         "Eres el asistente de Ecolite. Responde en 2–4 líneas una duda general del usuario sin listar productos. "
                         "Sé claro y conciso. Si la pregunta es sobre políticas (garantía, envíos, contacto), da una guía corta, sin preguntas."
                     )
-                    ai = llm_chat(sys_prompt, msg_raw) or "Estoy disponible para ayudarte con temas de empresa, garantía o envíos."
+                    ai = "" if degraded else llm_chat(sys_prompt, msg_raw, site="faq")
+                    ai = ai or "Estoy disponible para ayudarte con temas de empresa, garantía o envíos."
                     if ventilador_mode:
                         ai = VENTILADOR_NOTE
                     resp = ChatOut(content=ai, products=[], page=0, last_query="", has_more=False)
@@ -920,11 +965,14 @@ def chat(in_: ChatIn) -> ChatOut:
 
         if not is_more and not abused and kind in {"smalltalk", "offtopic"}:
             if kind == "offtopic":
+                set_branch("offtopic")
                 resp = ChatOut(content=OFFSCOPE_REPLY, products=[], page=0, last_query="", has_more=False)
                 _log_conversation_safe(in_.session_id, msg_raw, resp.content)
                 return resp
+            set_branch("smalltalk")
             sys_prompt = _build_system_prompt(kind, ctx)
-            ai = llm_chat(sys_prompt, msg_raw) or _fallback_dynamic(msg_raw, products, vocab)
+            ai = "" if degraded else llm_chat(sys_prompt, msg_raw, site="smalltalk")
+            ai = ai or _fallback_dynamic(msg_raw, products, vocab)
             if ventilador_mode:
                 ai = VENTILADOR_NOTE
             resp = ChatOut(content=ai, products=[], page=0, last_query="", has_more=False)
@@ -939,14 +987,14 @@ def chat(in_: ChatIn) -> ChatOut:
             page = st["server_page"]
         else:
             q = msg_raw
-            if FOLLOWUP_RE.match(q) and st["topic_tokens"]:
+            if feats.followup and st["topic_tokens"]:
                 q = " ".join(st["topic_tokens"] + [q])
             st["last_query"]  = q
             st["server_page"] = client_page
             page = client_page
 
         # Guard
-        if ASK_PREFIX_RE.search(msg_raw) and not is_more:
+        if feats.ask_prefix and not is_more:
             tokens = [t for t in _parts(msg_raw) if t not in {'muestrame','muéstrame','muestra','ver','enseñame','enséñame'}]
             generic = {'iluminacion','iluminación','led','luz','luminaria','luminarias','para','de','en'}
             terms = [t for t in tokens if t not in generic and not any(ch.isdigit() for ch in t)]
@@ -954,6 +1002,7 @@ def chat(in_: ChatIn) -> ChatOut:
                 return (t in cat_vocab) or (singularize_es(t) in cat_vocab)
             if terms and not any(in_cat(t) for t in terms):
                 term = terms[0]
+                set_branch("tag_missing")
                 return ChatOut(
                     content=f"No encontré productos con la etiqueta “{term}”.",
                     products=[],
@@ -963,10 +1012,12 @@ def chat(in_: ChatIn) -> ChatOut:
                 )
 
         # Coincidencia por código/SKU
-        code_idx  = _build_code_index(products)
-        code_hit  = _find_code_hit(q, code_idx)
+        with span("code_lookup"):
+            code_idx = code_trie.for_catalog(products, catalog_ver)
+            code_hit = code_idx.find(q)
         if code_hit:
-            item = _pick_code_item(code_hit, q)  # elegir mejor candidato (prefiere exacto)
+            set_branch("code_hit")
+            item = code_idx.pick(code_hit, q)  # elegir mejor candidato (prefiere exacto)
             st["had_evidence"]  = True
             st["topic_tokens"]  = list(set(cats + phr))
             ai = "Te muestro la referencia más cercana al código indicado."
@@ -985,12 +1036,13 @@ def chat(in_: ChatIn) -> ChatOut:
 
         # === BÚSQUEDA POR CÓDIGO EXACTO (modo estricto) ===
         # Si el usuario dio UN SOLO token de código, buscamos match EXACTO.
-        _sc = _single_code_token_raw(q)
+        _sc = feats.code_token if q == msg_raw else _single_code_token_raw(q)
         if _sc:
             orig_code, norm_code = _sc
-            item = _find_exact_code_product(norm_code, products)
+            item = code_idx.exact_norm(norm_code)
             if item:
                 # Respuesta corta + 1 producto (el exacto)
+                set_branch("code_exact")
                 st["had_evidence"]  = True
                 st["topic_tokens"]  = list(set(cats + phr))
                 ai = "Te muestro la referencia con el código exacto solicitado."
@@ -1005,6 +1057,7 @@ def chat(in_: ChatIn) -> ChatOut:
                 )
             else:
                 # Si NO existe, no caemos al buscador general: avisamos que NO se encontró exacto.
+                set_branch("code_missing")
                 return ChatOut(
                     content=f"No encontré el código exacto: {orig_code}.",
                     products=[],
@@ -1017,6 +1070,7 @@ def chat(in_: ChatIn) -> ChatOut:
 
         # Evidencia mínima
         if not _any_token_in_vocab(q, vocab):
+            set_branch("no_match")
             st["had_evidence"] = False
             st["topic_tokens"] = []
             st["last_query"]   = ""
@@ -1037,18 +1091,20 @@ def chat(in_: ChatIn) -> ChatOut:
         seen = st["seen_by_query"].setdefault(q_key, set())
 
         # Página de resultados
-        page_items, has_more = _filtered_page(
-            products=products,
-            query=q,
-            page=page,
-            filter_tokens=filter_tokens,
-            hard_tags=cats,            # << tokens de categoría/tag (duros)
-            exclude_keys=seen,
-        )
+        with span("filtered_page"):
+            page_items, has_more = _filtered_page(
+                products=products,
+                query=q,
+                page=page,
+                filter_tokens=filter_tokens,
+                hard_tags=cats,            # << tokens de categoría/tag (duros)
+                exclude_keys=seen,
+            )
         for p in page_items:
             seen.add(_product_key(p))
 
         if page_items:
+            set_branch("listing")
             st["had_evidence"] = True
             st["topic_tokens"] = filter_tokens or st.get("topic_tokens", [])
             # Intro determinista (evita respuestas del tipo “no proporcionamos...”)
@@ -1067,6 +1123,7 @@ def chat(in_: ChatIn) -> ChatOut:
             )
 
         # Sin resultados reales
+        set_branch("no_match")
         st["had_evidence"] = False
         st["topic_tokens"] = []
         st["last_query"]   = ""
@@ -1088,6 +1145,7 @@ def chat(in_: ChatIn) -> ChatOut:
     except HTTPException:
         raise
     except Exception:
+        set_branch("error")
         return ChatOut(
             content="Tuvimos un inconveniente técnico. Intenta de nuevo.",
             products=[],
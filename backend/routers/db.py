@@ -1,7 +1,10 @@
+from __future__ import annotations
 import sqlite3
 from pathlib import Path
 from datetime import datetime
 
+from backend.services.metrics import timed
+
 DB_PATH = Path(__file__).resolve().parent.parent / "data" / "chat.db"
 
 def init_db():
@@ -32,10 +35,27 @@ def init_db():
         )
     """)
 
+    # Índice para consultar una sesión sin recorrer toda la tabla
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_conversaciones_session
+        ON conversaciones (session_id, id)
+    """)
+
+    # Resúmenes LLM por sesión (se regeneran solo si llegan mensajes nuevos)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS resumenes_sesion (
+            session_id TEXT PRIMARY KEY,
+            last_msg_id INTEGER,
+            resumen TEXT,
+            updated_at TEXT
+        )
+    """)
+
     con.commit()
     con.close()
 
 
+@timed("sqlite_log")
 def guardar_conversacion(session_id: str, mensaje_usuario: str, respuesta_bot: str):
     """Guarda un mensaje en la base de datos."""
     init_db()
@@ -47,3 +67,50 @@ def guardar_conversacion(session_id: str, mensaje_usuario: str, respuesta_bot: s
     """, (session_id, mensaje_usuario, respuesta_bot, datetime.now().isoformat(timespec="seconds")))
     con.commit()
     con.close()
+
+
+def ultimo_mensaje_id(session_id: str) -> int | None:
+    """Id del último turno guardado para la sesión (None si no hay mensajes)."""
+    init_db()
+    con = sqlite3.connect(DB_PATH)
+    try:
+        row = con.execute(
+            "SELECT MAX(id) FROM conversaciones WHERE session_id = ?",
+            (session_id,),
+        ).fetchone()
+    finally:
+        con.close()
+    return row[0] if row else None
+
+
+def obtener_resumen(session_id: str) -> tuple[str, int] | None:
+    """Devuelve (resumen, last_msg_id) cacheado para la sesión, o None."""
+    init_db()
+    con = sqlite3.connect(DB_PATH)
+    try:
+        row = con.execute(
+            "SELECT resumen, last_msg_id FROM resumenes_sesion WHERE session_id = ?",
+            (session_id,),
+        ).fetchone()
+    finally:
+        con.close()
+    return (row[0], row[1]) if row else None
+
+
+def guardar_resumen(session_id: str, last_msg_id: int, resumen: str) -> None:
+    """Inserta o actualiza el resumen de la sesión hasta last_msg_id."""
+    init_db()
+    con = sqlite3.connect(DB_PATH)
+    try:
+        con.execute("""
+            INSERT INTO resumenes_sesion (session_id, last_msg_id, resumen, updated_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(session_id) DO UPDATE SET
+                last_msg_id = excluded.last_msg_id,
+                resumen = excluded.resumen,
+                updated_at = excluded.updated_at
+            WHERE excluded.last_msg_id >= resumenes_sesion.last_msg_id
+        """, (session_id, last_msg_id, resumen, datetime.now().isoformat(timespec="seconds")))
+        con.commit()
+    finally:
+        con.close()
@@ -1,11 +1,11 @@
 from __future__ import annotations
 from typing import Any, Mapping
 
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Header, Request
 from pydantic import BaseModel
 
-# 👇 Importa tu cliente de DataCRM
-from backend.services.datacrm_client import send_contact_to_datacrm
+# 👇 Persistencia con deduplicación; el envío a DataCRM lo hace el worker del outbox
+from backend.services.lead_store import save_lead
 
 router = APIRouter(prefix="/leads", tags=["Leads"])
 
@@ -20,22 +20,25 @@ class LeadIn(BaseModel):
 
 
 @router.post("/")
-async def guardar_lead(lead: LeadIn, request: Request):
+def guardar_lead(lead: LeadIn, request: Request,
+                 idempotency_key: str | None = Header(default=None, alias="Idempotency-Key")):
     """
-    Recibe el lead del chatbot, lo puede guardar en tu BD
-    y luego lo envía a DataCRM.
+    Recibe el lead del chatbot y lo guarda en leads.db (upsert por email/teléfono
+    normalizado dentro de la sesión). Solo los leads nuevos se encolan hacia
+    DataCRM; los reenvíos con la misma Idempotency-Key devuelven el lead original.
     """
     user_agent = request.headers.get("User-Agent", "Unknown")
     created_at = request.headers.get("Date", "")
 
     raw = lead.dict()
+    raw["user_agent"] = user_agent
+    raw["created_at"] = created_at
 
-    # 1️⃣ (Opcional) Guardar en tu BASE DE DATOS LOCAL
-    # aquí iría la llamada a tu función de BD si ya la tienes,
-    # por ejemplo:
-    # save_lead_in_db(raw, user_agent, created_at)
+    lead_id, created = save_lead(raw, idempotency_key)
 
-    # 2️⃣ Enviar a DataCRM
-    send_contact_to_datacrm(raw)
-
-    return {"status": "ok", "message": "Lead procesado correctamente"}
+    return {
+        "status": "ok",
+        "message": "Lead procesado correctamente",
+        "lead_id": lead_id,
+        "duplicate": not created,
+    }
@@ -0,0 +1,19 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from backend.services.metrics import render_prometheus
+from backend.services import llm_telemetry
+
+router = APIRouter(tags=["Métricas"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Histogramas por etapa y por rama de respuesta en formato Prometheus."""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@router.get("/metrics/llm")
+def metrics_llm():
+    """Agregados de llamadas al LLM por site: latencia, tokens, errores y costo estimado."""
+    return llm_telemetry.snapshot()
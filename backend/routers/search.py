@@ -0,0 +1,58 @@
+import json
+import os
+from typing import Iterator, List
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from backend.routers import chat as chat_router
+from backend.services.metrics import counter
+from backend.services.product_loader import load_products
+from backend.services.search_service import search_batch
+
+router = APIRouter(prefix="/search", tags=["Búsqueda"])
+
+MAX_QUERIES = int(os.getenv("ECOLITE_SEARCH_BATCH_MAX", "500"))
+MAX_QUERY_CHARS = int(os.getenv("ECOLITE_SEARCH_QUERY_MAX_CHARS", "200"))
+
+BATCH_QUERIES = counter("ecolite_search_batch_queries_total", "Consultas resueltas por /search/batch.")
+
+
+class BatchIn(BaseModel):
+    queries: List[str]
+    limit: int = 5
+
+
+def _ndjson(queries: List[str], limit: int) -> Iterator[str]:
+    catalog, _ = load_products()
+    products = list(catalog.values())
+    for i, found in search_batch(products, queries, limit=limit):
+        BATCH_QUERIES.inc()
+        line = {"i": i, "query": queries[i], "products": chat_router._pack_products(found[:limit])}
+        yield json.dumps(line, ensure_ascii=False) + "\n"
+
+
+@router.post("/batch")
+def buscar_lote(body: BatchIn):
+    """
+    Resuelve muchas consultas contra el catálogo (p. ej. líneas de una planilla
+    de cotización: "panel 60x60 48W", "reflector 100W IP65").
+
+    Responde NDJSON, una línea por consulta en el orden recibido:
+    {"i": posición, "query": texto, "products": [...]} con los primeros `limit`
+    candidatos de search_candidates para esa consulta. Cada consulta admite
+    hasta ECOLITE_SEARCH_QUERY_MAX_CHARS caracteres (el costo crece con los
+    términos distintos, que salen del texto).
+    """
+    if not body.queries:
+        raise HTTPException(status_code=400, detail="queries vacío")
+    if len(body.queries) > MAX_QUERIES:
+        raise HTTPException(status_code=413, detail=f"máximo {MAX_QUERIES} consultas por lote")
+    too_long = next((i for i, q in enumerate(body.queries) if len(q) > MAX_QUERY_CHARS), None)
+    if too_long is not None:
+        raise HTTPException(status_code=413,
+                            detail=f"la consulta {too_long} supera {MAX_QUERY_CHARS} caracteres")
+    if not 1 <= body.limit <= 50:
+        raise HTTPException(status_code=400, detail="limit debe estar entre 1 y 50")
+    return StreamingResponse(_ndjson(body.queries, body.limit), media_type="application/x-ndjson")
@@ -0,0 +1,28 @@
+from __future__ import annotations
+import hmac
+import os
+from typing import Optional
+
+from fastapi import Header, HTTPException, Request
+
+ADMIN_HEADER = "X-Admin-Token"
+
+
+def _admin_token() -> str:
+    return os.getenv("ECOLITE_ADMIN_TOKEN", "")
+
+
+def is_admin_token(value: Optional[str]) -> bool:
+    """Compara en tiempo constante; sin ECOLITE_ADMIN_TOKEN configurado nadie es admin."""
+    expected = _admin_token()
+    return bool(expected and value) and hmac.compare_digest(str(value), expected)
+
+
+def is_admin_request(request: Request) -> bool:
+    return is_admin_token(request.headers.get(ADMIN_HEADER))
+
+
+def require_admin(x_admin_token: Optional[str] = Header(default=None, alias=ADMIN_HEADER)) -> None:
+    """Dependencia FastAPI para endpoints internos (/__debug/...)."""
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="admin token requerido")
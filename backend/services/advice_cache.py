@@ -0,0 +1,184 @@
+"""
+Caché de respuestas de asesoría (rama ASESORAR) por casi-duplicados.
+
+"qué luz para una bodega de 8 m" y "luces para bodegas de 8 m" piden lo mismo:
+el mensaje se reduce a un conjunto de tokens (normalizados, en singular y sin
+palabras vacías) y se busca una entrada previa con Jaccard ≥ ECOLITE_ADVICE_SIM.
+Los candidatos salen de un índice MinHash/LSH (bandas); la similitud se
+confirma con Jaccard exacto. Entradas con TTL y desalojo LRU por tamaño.
+
+Las negaciones ("sin", "no", "ni", ...) no son palabras vacías: "bodega sin
+polvo" no es "bodega con polvo". Además dos consultas solo se consideran
+duplicadas si tienen exactamente las mismas negaciones y los mismos tokens con
+dígitos (8, 15, 50w, 60x60): en mensajes largos una sola palabra de diferencia
+no baja el Jaccard del umbral, y "8 metros" vs "15 metros" cambia la asesoría.
+
+Cada entrada guarda además un "scope" (hash del prompt de sistema) para no
+reutilizar respuestas generadas con otro contexto de catálogo.
+"""
+from __future__ import annotations
+import hashlib
+import os
+import random
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
+
+try:
+    from backend.services.intent_model import tokens as _tokens
+    from backend.services.metrics import counter, gauge
+except Exception:
+    from intent_model import tokens as _tokens
+    from metrics import counter, gauge
+
+ENABLED = os.getenv("ECOLITE_ADVICE_CACHE", "1").strip().lower() not in {"0", "false", "no", "off"}
+SIMILARITY = float(os.getenv("ECOLITE_ADVICE_SIM", "0.8"))
+TTL_S = float(os.getenv("ECOLITE_ADVICE_TTL_S", "3600"))
+MAX_ENTRIES = int(os.getenv("ECOLITE_ADVICE_MAX", "1024"))
+MIN_TOKENS = 1
+
+# 16 bandas × 2 filas: con Jaccard 0.8 un duplicado cae en algún cubo con prob. ~1
+BANDS, ROWS = 16, 2
+_PRIME = (1 << 61) - 1
+_rng = random.Random(1729)
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(BANDS * ROWS)]
+
+STOPWORDS = {
+    "a", "al", "con", "de", "del", "el", "en", "es", "la", "las", "lo", "los", "me", "mi",
+    "para", "por", "que", "se", "si", "su", "un", "una", "uno", "unos", "unas", "y", "o",
+    "cual", "como", "donde", "hay", "tengo", "tiene", "quiero", "necesito", "busco", "recomienda",
+    "recomiendas", "recomiendame", "sugiereme", "mejor", "buena", "bueno", "tipo", "favor",
+    "hola", "gracias", "luz", "luce", "iluminacion", "iluminar", "luminaria", "led",
+}
+
+# Invierten o excluyen lo que sigue; nunca se descartan y deben coincidir
+NEGATIONS = frozenset({"sin", "no", "ni", "nunca", "tampoco", "excepto", "salvo"})
+
+LOOKUPS = counter("ecolite_advice_cache_total", "Búsquedas en la caché de asesoría por resultado.", ("result",))
+
+_LOCK = threading.Lock()
+# id → (scope, tokens, respuesta, expira_en, firmas de banda)
+_ENTRIES: "OrderedDict[int, Tuple[str, FrozenSet[str], str, float, Tuple[int, ...]]]" = OrderedDict()
+_BUCKETS: Dict[Tuple[int, int], Set[int]] = {}
+_NEXT_ID = 0
+
+gauge("ecolite_advice_cache_entries", "Entradas en la caché de asesoría.", lambda: len(_ENTRIES))
+
+
+def token_set(msg: str) -> FrozenSet[str]:
+    return frozenset(t for t in _tokens(msg) if t not in STOPWORDS)
+
+
+def strict_tokens(toks: FrozenSet[str]) -> FrozenSet[str]:
+    """Tokens que deben coincidir exactamente: negaciones y medidas (cualquier token con dígitos)."""
+    return frozenset(t for t in toks if t in NEGATIONS or any(c.isdigit() for c in t))
+
+
+def scope_of(system_prompt: str) -> str:
+    return hashlib.sha1((system_prompt or "").encode("utf-8")).hexdigest()[:12]
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def _band_keys(toks: FrozenSet[str]) -> Tuple[int, ...]:
+    hashes = [zlib.crc32(t.encode("utf-8")) for t in toks]
+    sig = [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMS]
+    return tuple(hash(tuple(sig[i * ROWS:(i + 1) * ROWS])) for i in range(BANDS))
+
+
+def _drop(entry_id: int) -> None:
+    """Quita la entrada y sus cubos; llamar con _LOCK tomado."""
+    _, _, _, _, keys = _ENTRIES.pop(entry_id)
+    for band, key in enumerate(keys):
+        ids = _BUCKETS.get((band, key))
+        if ids is not None:
+            ids.discard(entry_id)
+            if not ids:
+                del _BUCKETS[(band, key)]
+
+
+def lookup(msg: str, system_prompt: str = "") -> Optional[str]:
+    """Respuesta previa de una consulta casi idéntica (mismo scope), o None."""
+    if not ENABLED:
+        return None
+    toks = token_set(msg)
+    if len(toks) < MIN_TOKENS:
+        return None
+    scope = scope_of(system_prompt)
+    strict = strict_tokens(toks)
+    keys = _band_keys(toks)
+    now = time.monotonic()
+    best_id, best_sim = None, 0.0
+    with _LOCK:
+        candidates: Set[int] = set()
+        for band, key in enumerate(keys):
+            candidates |= _BUCKETS.get((band, key), set())
+        for entry_id in candidates:
+            e_scope, e_toks, _, expires, _ = _ENTRIES[entry_id]
+            if expires <= now:
+                _drop(entry_id)
+                continue
+            if e_scope != scope or strict_tokens(e_toks) != strict:
+                continue
+            sim = jaccard(toks, e_toks)
+            if sim > best_sim:
+                best_id, best_sim = entry_id, sim
+        if best_id is not None and best_sim >= SIMILARITY:
+            _ENTRIES.move_to_end(best_id)
+            answer = _ENTRIES[best_id][2]
+        else:
+            answer = None
+    LOOKUPS.inc(1, "hit" if answer else "miss")
+    return answer
+
+
+def store(msg: str, answer: str, system_prompt: str = "") -> None:
+    global _NEXT_ID
+    if not ENABLED or not answer:
+        return
+    toks = token_set(msg)
+    if len(toks) < MIN_TOKENS:
+        return
+    keys = _band_keys(toks)
+    with _LOCK:
+        entry_id = _NEXT_ID
+        _NEXT_ID += 1
+        _ENTRIES[entry_id] = (scope_of(system_prompt), toks, answer, time.monotonic() + TTL_S, keys)
+        for band, key in enumerate(keys):
+            _BUCKETS.setdefault((band, key), set()).add(entry_id)
+        while len(_ENTRIES) > MAX_ENTRIES:
+            _drop(next(iter(_ENTRIES)))
+
+
+def clear() -> None:
+    with _LOCK:
+        _ENTRIES.clear()
+        _BUCKETS.clear()
+
+
+def snapshot() -> Dict[str, Any]:
+    counts = LOOKUPS.snapshot()
+    hits, misses = int(counts.get(("hit",), 0)), int(counts.get(("miss",), 0))
+    with _LOCK:
+        size = len(_ENTRIES)
+        sample: List[Dict[str, Any]] = [
+            {"tokens": sorted(toks), "answer": ans[:80]}
+            for _, toks, ans, _, _ in list(_ENTRIES.values())[-5:]
+        ]
+    return {
+        "enabled": ENABLED,
+        "entries": size,
+        "max_entries": MAX_ENTRIES,
+        "ttl_s": TTL_S,
+        "similarity": SIMILARITY,
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses), 4) if hits + misses else None,
+        "recent": sample,
+    }
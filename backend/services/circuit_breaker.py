@@ -0,0 +1,102 @@
+"""
+Circuit breaker simple para dependencias externas (LLM).
+
+closed     → las llamadas pasan; `failure_threshold` fallos seguidos lo abren.
+open       → allow() devuelve False durante `reset_timeout` segundos.
+half_open  → deja pasar una llamada de prueba: si va bien cierra, si falla reabre.
+"""
+from __future__ import annotations
+import threading
+import time
+from typing import Any, Dict, Optional
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+STATE_CODES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = float(reset_timeout)
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.rejected = 0
+        self.opened_count = 0
+        self.last_error: Optional[str] = None
+
+    def _maybe_half_open(self) -> None:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def allow(self) -> bool:
+        """¿Se puede intentar la llamada? En half_open solo pasa una prueba a la vez."""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def blocked(self) -> bool:
+        """True (y cuenta el rechazo) si está open; a diferencia de allow() no reserva la prueba de half_open."""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == OPEN:
+                self.rejected += 1
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self, error: Optional[str] = None) -> None:
+        with self._lock:
+            self.last_error = (error or "")[:200] or None
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self.opened_count += 1
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            self._maybe_half_open()
+            retry_in = None
+            if self._state == OPEN:
+                retry_in = round(max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at)), 1)
+            return {
+                "name": self.name,
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "reset_timeout_s": self.reset_timeout,
+                "retry_in_s": retry_in,
+                "opened_count": self.opened_count,
+                "rejected": self.rejected,
+                "last_error": self.last_error,
+            }
@@ -0,0 +1,205 @@
+"""
+Índice de códigos de producto (code/sku/id) como trie, construido una vez por
+versión del catálogo.
+
+Antes cada turno reconstruía un dict con las variantes de cada código (exacto,
+raíz antes del "-", sin guiones) y luego recorría los candidatos llamando otra
+vez a _extract_codes para elegir el mejor. Aquí:
+
+- exact(k):          productos cuyo código tiene la variante k (mismo contenido
+                     que el dict anterior, en orden del catálogo).
+- family(prefijo):   productos con alguna variante que empieza por el prefijo
+                     ("VING125" → VING125-C, VING125-W).
+- longest_prefix(c): la variante indexada más larga que es prefijo de c.
+- find / pick:       lo que hacían _find_code_hit y _pick_code_item, con las
+                     claves de ranking (códigos, raíces, largo) precalculadas.
+- exact_norm(c):     match exacto por código normalizado (sin separadores) en
+                     code/sku/id/model/slug, lo que hacía _find_exact_code_product.
+
+Todas las consultas cuestan O(largo del código). for_catalog() cachea el trie
+del catálogo actual y lo reconstruye solo cuando cambia la versión; catálogo y
+versión se leen juntos con product_loader.load_catalog().
+"""
+from __future__ import annotations
+import re
+import threading
+from typing import Any, Dict, FrozenSet, Hashable, List, Optional, Tuple
+
+try:
+    from backend.services.metrics import counter
+except Exception:
+    from metrics import counter
+
+CODE_FIELDS = ("code", "sku", "id")
+# Campos para el match exacto normalizado (incluye model/slug)
+EXACT_FIELDS = ("code", "sku", "id", "model", "slug")
+_TOKEN_RE = re.compile(r"[A-Z0-9-]{3,}")
+_NON_CODE_RE = re.compile(r"[^A-Z0-9]")
+
+BUILDS = counter("ecolite_code_trie_builds_total", "Construcciones del trie de códigos.")
+
+
+def norm_code(s: str) -> str:
+    """Normaliza códigos a MAYÚSCULAS y sin separadores (ECO-PL12WA -> ECOPL12WA)."""
+    return _NON_CODE_RE.sub("", (s or "").upper())
+
+
+def _base(c: str) -> str:
+    c = (c or "").upper()
+    return c.split("-")[0] if "-" in c else c
+
+
+def extract_codes(p: Dict[str, Any]) -> List[str]:
+    vals = []
+    for f in CODE_FIELDS:
+        v = p.get(f)
+        if v:
+            vals.append(str(v).upper().strip())
+    return vals
+
+
+def variants(c: str) -> set:
+    """Claves con las que se indexa (y se consulta) un código."""
+    return {k for k in (c, _base(c), c.replace("-", ""), _base(c).replace("-", "")) if k}
+
+
+class _Node:
+    __slots__ = ("children", "items", "family")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.items: List[int] = []     # productos con esta variante exacta (con repetición, como el dict)
+        self.family: List[int] = []    # productos con alguna variante bajo este nodo (sin repetir)
+
+
+class CodeTrie:
+    def __init__(self, products: List[Dict[str, Any]]):
+        self.products = products
+        self.root = _Node()
+        self.nodes = 1
+        # índice → (códigos, raíces, suma de largos) para pick()
+        self._rank: List[Tuple[FrozenSet[str], FrozenSet[str], int]] = []
+        self._exact_norm: Dict[str, int] = {}
+        for i, p in enumerate(products):
+            if not isinstance(p, dict):
+                self._rank.append((frozenset(), frozenset(), 0))
+                continue
+            codes = extract_codes(p)
+            self._rank.append((frozenset(codes), frozenset(_base(c) for c in codes),
+                               sum(len(c) for c in set(codes))))
+            for c in codes:
+                for k in variants(c):
+                    self._insert(k, i)
+            for f in EXACT_FIELDS:
+                v = p.get(f)
+                if v:
+                    self._exact_norm.setdefault(norm_code(str(v)), i)
+        self._pos = {id(p): i for i, p in enumerate(products)}
+        BUILDS.inc()
+
+    def _insert(self, key: str, i: int) -> None:
+        node = self.root
+        for ch in key:
+            nxt = node.children.get(ch)
+            if nxt is None:
+                nxt = node.children[ch] = _Node()
+                self.nodes += 1
+            node = nxt
+            if not node.family or node.family[-1] != i:
+                node.family.append(i)
+        node.items.append(i)
+
+    def _walk(self, key: str) -> Optional[_Node]:
+        node = self.root
+        for ch in key:
+            node = node.children.get(ch)
+            if node is None:
+                return None
+        return node
+
+    def exact(self, key: str) -> List[Dict[str, Any]]:
+        node = self._walk(key) if key else None
+        return [self.products[i] for i in node.items] if node else []
+
+    def family(self, prefix: str) -> List[Dict[str, Any]]:
+        node = self._walk((prefix or "").upper()) if prefix else None
+        return [self.products[i] for i in node.family] if node else []
+
+    def longest_prefix(self, code: str) -> Optional[Tuple[str, List[Dict[str, Any]]]]:
+        code = (code or "").upper()
+        node, best = self.root, None
+        for n, ch in enumerate(code, 1):
+            node = node.children.get(ch)
+            if node is None:
+                break
+            if node.items:
+                best = (n, node)
+        if best is None:
+            return None
+        n, node = best
+        return code[:n], [self.products[i] for i in node.items]
+
+    def find(self, message: str) -> Optional[List[Dict[str, Any]]]:
+        """Candidatos de la variante más larga presente en el mensaje (ABC-123, DC42V, ...)."""
+        keys: set = set()
+        for t in _TOKEN_RE.findall((message or "").upper()):
+            t = t.strip("-")
+            if t:
+                keys |= variants(t)
+        # a igual largo, orden alfabético (antes dependía del orden del set)
+        for k in sorted(keys, key=lambda k: (-len(k), k)):
+            node = self._walk(k)
+            if node is not None and node.items:
+                return [self.products[i] for i in node.items]
+        return None
+
+    def pick(self, candidates: List[Dict[str, Any]], message_or_code: str) -> Dict[str, Any]:
+        """Mejor candidato: código exacto (+100), misma raíz (+10), desempate por largo."""
+        target = set(_TOKEN_RE.findall((message_or_code or "").upper()))
+        base_target = {_base(t) for t in target}
+
+        def _score(p):
+            i = self._pos.get(id(p))
+            if i is None:
+                codes = frozenset(extract_codes(p))
+                bases, length = frozenset(_base(c) for c in codes), sum(len(c) for c in codes)
+            else:
+                codes, bases, length = self._rank[i]
+            score = 0
+            if codes & target:
+                score += 100
+            if bases & base_target:
+                score += 10
+            return score + length
+        return max(candidates, key=_score)
+
+    def exact_norm(self, code_norm: str) -> Optional[Dict[str, Any]]:
+        i = self._exact_norm.get(code_norm)
+        return None if i is None else self.products[i]
+
+
+_LOCK = threading.Lock()
+_CURRENT: Optional[Tuple[Hashable, int, CodeTrie]] = None
+
+
+def for_catalog(products: List[Dict[str, Any]], version: Hashable) -> CodeTrie:
+    """Trie del catálogo en la versión dada; se reconstruye solo si cambió."""
+    global _CURRENT
+    cur = _CURRENT
+    if cur is not None and cur[0] == version and cur[1] == len(products):
+        return cur[2]
+    with _LOCK:
+        cur = _CURRENT
+        if cur is None or cur[0] != version or cur[1] != len(products):
+            cur = _CURRENT = (version, len(products), CodeTrie(products))
+    return cur[2]
+
+
+def snapshot() -> Dict[str, Any]:
+    cur = _CURRENT
+    return {
+        "version": cur[0] if cur else None,
+        "products": cur[1] if cur else 0,
+        "nodes": cur[2].nodes if cur else 0,
+        "builds": int(BUILDS.snapshot().get((), 0)),
+    }
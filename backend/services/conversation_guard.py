@@ -1,23 +1,17 @@
 from __future__ import annotations
 import re
-import unicodedata
 from typing import Dict, List, Set
 from collections import Counter
 
+try:
+    from backend.services.text_norm import norm_guard as _norm
+except Exception:
+    from text_norm import norm_guard as _norm
+
 
 # -----------------------
 # Normalización y tokens
 # -----------------------
-def _norm(text: str) -> str:
-    if not text:
-        return ""
-    text = unicodedata.normalize("NFKD", text)
-    text = "".join(c for c in text if not unicodedata.combining(c))
-    text = text.lower()
-    text = re.sub(r"[^a-z0-9\s\-\._#/]", " ", text)
-    return re.sub(r"\s+", " ", text).strip()
-
-
 def _tokens(text: str) -> List[str]:
     t = _norm(text)
     t = re.sub(r"(\d+)\s*w", r"\1w", t)
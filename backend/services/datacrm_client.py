@@ -1,127 +1,258 @@
 from __future__ import annotations
+import os
+import threading
+import time
 import requests
 import hashlib
 import json
-from typing import Any
+from typing import Any, Iterable
+from requests.adapters import HTTPAdapter
 
 # ====================================
 # ⚙️ CONFIGURACIÓN
 # ====================================
-DATACRM_URL = "https://demos.datacrm.la/demos/ecolitesas2/webservice.php"
-DATACRM_USER = "gerente"
-DATACRM_KEY = "I33s3VEeZ7XwTG8"
-DATACRM_ASSIGNED_ID = "19x1"
+DATACRM_URL = os.getenv("DATACRM_URL", "https://demos.datacrm.la/demos/ecolitesas2/webservice.php")
+DATACRM_USER = os.getenv("DATACRM_USER", "gerente")
+DATACRM_KEY = os.getenv("DATACRM_KEY", "I33s3VEeZ7XwTG8")
+DATACRM_ASSIGNED_ID = os.getenv("DATACRM_ASSIGNED_ID", "19x1")
 
 # Fallback formulario público (demo)
-DATACRM_WFORM_URL = "https://demos.datacrm.la/demos/ecolitesas2/index.php?module=WForms&view=SavePublicForm"
-DATACRM_WFORM_ID = "MTc2NDAyNDM4Ny42MzI="
+DATACRM_WFORM_URL = os.getenv(
+    "DATACRM_WFORM_URL",
+    "https://demos.datacrm.la/demos/ecolitesas2/index.php?module=WForms&view=SavePublicForm",
+)
+DATACRM_WFORM_ID = os.getenv("DATACRM_WFORM_ID", "MTc2NDAyNDM4Ny42MzI=")
 
+# Vida útil asumida del sessionName (vtiger no la informa en el login);
+# si el servidor la invalida antes, se re-autentica al primer error de sesión.
+DATACRM_SESSION_TTL = float(os.getenv("DATACRM_SESSION_TTL", "1200"))
+DATACRM_POOL_SIZE = int(os.getenv("DATACRM_POOL_SIZE", "8"))
+DATACRM_TIMEOUT = float(os.getenv("DATACRM_TIMEOUT", "10"))
+
+# Códigos de error de vtiger que indican sesión vencida o inválida
+_AUTH_ERRORS = {"INVALID_SESSIONID", "AUTHENTICATION_REQUIRED", "INVALID_USER_CREDENTIALS"}
 
-# ====================================
-# 🔐 LOGIN
-# ====================================
-def _login() -> dict[str, Any]:
-    """Login con token + accessKey (MD5)."""
-    try:
-        token_resp = requests.get(
-            DATACRM_URL,
-            params={"operation": "getchallenge", "username": DATACRM_USER},
-            timeout=10,
-        )
-        token_data = token_resp.json()
-        if not token_data.get("success"):
-            raise Exception("No se pudo obtener token")
-
-        token = token_data["result"]["token"]
-        accesskey_final = hashlib.md5((token + DATACRM_KEY).encode()).hexdigest()
-
-        login_resp = requests.post(
-            DATACRM_URL,
-            data={"operation": "login", "username": DATACRM_USER, "accessKey": accesskey_final},
-            timeout=10,
-        )
-        data = login_resp.json()
-        if not data.get("success"):
-            raise Exception(f"Login fallido: {data}")
-        return data["result"]
-    except Exception as e:
-        raise Exception(f"[LOGIN ERROR] {e}")
+
+class DataCRMError(Exception):
+    """Error devuelto por el webservice (success = false o respuesta ilegible)."""
+
+    def __init__(self, message: str, code: str = ""):
+        super().__init__(message)
+        self.code = code
 
 
 # ====================================
-# 🧩 CREAR CONTACTO
+# 🔌 CLIENTE
 # ====================================
-def _create_contact(session_name: str, contact_data: dict[str, Any]) -> dict[str, Any]:
-    """Crea un contacto en DataCRM usando el módulo Contacts."""
-    if not contact_data.get("lastname"):
-        contact_data["lastname"] = "Contacto Chatbot"
-    if not contact_data.get("assigned_user_id"):
-        contact_data["assigned_user_id"] = DATACRM_ASSIGNED_ID
-
-    element = json.dumps(contact_data, ensure_ascii=False)
-
-    payload = {
-        "operation": "create",
-        "sessionName": session_name,
-        "elementType": "Contacts",
-        "element": element,
-    }
+class DataCRMClient:
+    """
+    Cliente del webservice de DataCRM con:
+    - sessionName cacheado hasta su vencimiento (un login cada DATACRM_SESSION_TTL),
+    - re-login automático solo ante errores de autenticación,
+    - conexiones keep-alive reutilizadas desde un pool de requests.Session.
+    Es seguro compartir una instancia entre hilos.
+    """
+
+    def __init__(self, url: str = DATACRM_URL, user: str = DATACRM_USER, key: str = DATACRM_KEY,
+                 session_ttl: float = DATACRM_SESSION_TTL, pool_size: int = DATACRM_POOL_SIZE,
+                 timeout: float = DATACRM_TIMEOUT):
+        self.url = url
+        self.user = user
+        self.key = key
+        self.session_ttl = session_ttl
+        self.timeout = timeout
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=max(1, pool_size))
+        self.http.mount("http://", adapter)
+        self.http.mount("https://", adapter)
+        self._session_name: str | None = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+        self.logins = 0
+
+    # ---------- autenticación ----------
+    def _login(self) -> dict[str, Any]:
+        """Login con token + accessKey (MD5)."""
+        try:
+            token_resp = self.http.get(
+                self.url,
+                params={"operation": "getchallenge", "username": self.user},
+                timeout=self.timeout,
+            )
+            token_data = token_resp.json()
+            if not token_data.get("success"):
+                raise Exception("No se pudo obtener token")
+
+            token = token_data["result"]["token"]
+            accesskey_final = hashlib.md5((token + self.key).encode()).hexdigest()
+
+            login_resp = self.http.post(
+                self.url,
+                data={"operation": "login", "username": self.user, "accessKey": accesskey_final},
+                timeout=self.timeout,
+            )
+            data = login_resp.json()
+            if not data.get("success"):
+                raise Exception(f"Login fallido: {data}")
+            self.logins += 1
+            return data["result"]
+        except Exception as e:
+            raise Exception(f"[LOGIN ERROR] {e}")
+
+    def session_name(self, force: bool = False) -> str:
+        """sessionName vigente; solo hace login si no hay uno cacheado o venció."""
+        with self._lock:
+            if force or not self._session_name or time.monotonic() >= self._expires_at:
+                result = self._login()
+                self._session_name = result["sessionName"]
+                self._expires_at = time.monotonic() + self.session_ttl
+            return self._session_name
+
+    def invalidate(self, session_name: str | None = None) -> None:
+        """Descarta el sessionName cacheado (si coincide con el que falló)."""
+        with self._lock:
+            if session_name is None or session_name == self._session_name:
+                self._session_name = None
+                self._expires_at = 0.0
+
+    # ---------- operaciones ----------
+    def _post(self, data: dict[str, Any]) -> dict[str, Any]:
+        """POST autenticado; ante un error de sesión re-autentica y reintenta una vez."""
+        for attempt in (0, 1):
+            session = self.session_name()
+            resp = self.http.post(self.url, data={**data, "sessionName": session}, timeout=self.timeout)
+            try:
+                body = resp.json()
+            except ValueError:
+                raise DataCRMError(f"Respuesta no JSON (HTTP {resp.status_code})")
+            if body.get("success"):
+                return body["result"]
+            code = str((body.get("error") or {}).get("code") or "")
+            if code in _AUTH_ERRORS and attempt == 0:
+                self.invalidate(session)
+                continue
+            raise DataCRMError(f"Error DataCRM: {body}", code)
+        raise DataCRMError("Sesión rechazada tras re-autenticar", "AUTHENTICATION_REQUIRED")
 
-    print("[DEBUG] Payload enviado:", payload)
+    def create_contact(self, contact_data: dict[str, Any]) -> dict[str, Any]:
+        """Crea un contacto en DataCRM usando el módulo Contacts."""
+        contact_data = dict(contact_data)
+        if not contact_data.get("lastname"):
+            contact_data["lastname"] = "Contacto Chatbot"
+        if not contact_data.get("assigned_user_id"):
+            contact_data["assigned_user_id"] = DATACRM_ASSIGNED_ID
+        return self._post({
+            "operation": "create",
+            "elementType": "Contacts",
+            "element": json.dumps(contact_data, ensure_ascii=False),
+        })
 
-    resp = requests.post(DATACRM_URL, data=payload, timeout=10)
-    data = resp.json()
-    print("[DEBUG] Respuesta DataCRM:", data)
+    def create_contacts(self, contacts: Iterable[dict[str, Any]]) -> list[dict[str, Any] | Exception]:
+        """
+        Crea varios contactos reutilizando la misma sesión autenticada:
+        un solo round trip por contacto. Devuelve, en orden, el resultado
+        o la excepción de cada uno (un fallo no detiene al resto).
+        """
+        out: list[dict[str, Any] | Exception] = []
+        for c in contacts:
+            try:
+                out.append(self.create_contact(c))
+            except Exception as e:
+                out.append(e)
+        return out
 
-    if not data.get("success"):
-        raise Exception(f"Error al crear contacto: {data}")
+    def submit_form(self, raw: dict[str, Any]) -> bool:
+        """Envia el lead al formulario público (funciona sin permisos API)."""
+        payload = {
+            "publicid": DATACRM_WFORM_ID,
+            "lastname": raw.get("name", ""),
+            "email": raw.get("email", ""),
+            "mobile": raw.get("phone", ""),
+            "city": raw.get("city", ""),
+            "designation": raw.get("profession", ""),
+            "assigned_user_id": DATACRM_ASSIGNED_ID,
+            "captcha": "5",
+        }
+        r = self.http.post(DATACRM_WFORM_URL, data=payload, timeout=self.timeout)
+        print("[DEBUG] Fallback form status:", r.status_code)
+        return r.status_code == 200
 
-    return data["result"]
+
+_CLIENT: DataCRMClient | None = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def get_client() -> DataCRMClient:
+    """Cliente compartido del proceso (sesión y pool de conexiones reutilizados)."""
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            _CLIENT = DataCRMClient()
+        return _CLIENT
 
 
 # ====================================
-# 🧩 FORMULARIO DE BACKUP
+# 🚀 FLUJO PRINCIPAL
 # ====================================
-def _create_contact_form(raw: dict[str, Any]) -> bool:
-    """Envia el lead al formulario público (funciona sin permisos API)."""
-    payload = {
-        "publicid": DATACRM_WFORM_ID,
+def _contact_from_raw(raw: dict[str, Any]) -> dict[str, Any]:
+    """Mapea el lead del chatbot a los campos del módulo Contacts."""
+    return {
         "lastname": raw.get("name", ""),
         "email": raw.get("email", ""),
         "mobile": raw.get("phone", ""),
-        "city": raw.get("city", ""),
-        "designation": raw.get("profession", ""),
+        "mailingcity": raw.get("city", ""),
+        "title": raw.get("profession", ""),
         "assigned_user_id": DATACRM_ASSIGNED_ID,
-        "captcha": "5", 
     }
-    r = requests.post(DATACRM_WFORM_URL, data=payload, timeout=10)
-    print("[DEBUG] Fallback form status:", r.status_code)
-    return r.status_code == 200
 
 
-# ====================================
-# 🚀 FLUJO PRINCIPAL
-# ====================================
-def send_contact_to_datacrm(raw: dict[str, Any]) -> None:
+def _fallback_form(client: DataCRMClient, raw: dict[str, Any], error: Exception) -> bool:
+    print("[DataCRM] ⚠️ Error API, usando formulario:", error)
+    try:
+        if client.submit_form(raw):
+            print("[DataCRM] ✅ Contacto enviado por formulario público.")
+            return True
+    except Exception as e:
+        print("[DataCRM] ❌ Error en el formulario público:", e)
+        return False
+    print("[DataCRM] ❌ Falla en el formulario público también.")
+    return False
+
+
+def send_contact_to_datacrm(raw: dict[str, Any]) -> bool:
     """
     Envía un lead a DataCRM:
-    1️⃣ Intenta por API (Contacts)
+    1️⃣ Intenta por API (Contacts) con la sesión cacheada
     2️⃣ Si falla, usa el formulario público
+    Devuelve True si alguno de los dos caminos aceptó el lead.
     """
+    client = get_client()
+    try:
+        client.session_name()
+    except Exception as e:
+        print("[DataCRM] ❌ Error general:", e)
+        return False
     try:
-        session = _login()
-        session_name = session["sessionName"]
+        result = client.create_contact(_contact_from_raw(raw))
+        print("[DataCRM] ✅ Contacto creado vía API:", result.get("id"))
+        return True
+    except Exception as e:
+        return _fallback_form(client, raw, e)
 
 
-        try:
-            result = _create_contact(session_name, contact)
-            print("[DataCRM] ✅ Contacto creado vía API:", result.get("id"))
-        except Exception as e:
-            print("[DataCRM] ⚠️ Error API, usando formulario:", e)
-            if _create_contact_form(raw):
-                print("[DataCRM] ✅ Contacto enviado por formulario público.")
-            else:
-                print("[DataCRM] ❌ Falla en el formulario público también.")
+def send_contacts_to_datacrm(raws: list[dict[str, Any]]) -> list[bool]:
+    """Versión en lote: una sola sesión para todos los leads, fallback por lead."""
+    client = get_client()
+    try:
+        client.session_name()
     except Exception as e:
         print("[DataCRM] ❌ Error general:", e)
-    
\ No newline at end of file
+        return [False] * len(raws)
+    results = client.create_contacts(_contact_from_raw(r) for r in raws)
+    out: list[bool] = []
+    for raw, res in zip(raws, results):
+        if isinstance(res, Exception):
+            out.append(_fallback_form(client, raw, res))
+        else:
+            out.append(True)
+    return out
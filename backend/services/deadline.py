@@ -0,0 +1,36 @@
+"""
+Presupuesto de tiempo por request compartido entre las llamadas al LLM.
+
+    with deadline_scope(8.0):
+        ...                      # cualquier llm_chat() dentro ve remaining()
+
+Fuera de un scope remaining() es None (sin límite más allá del timeout por llamada).
+Los scopes anidados nunca amplían el plazo exterior.
+"""
+from __future__ import annotations
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+_DEADLINE: ContextVar[Optional[float]] = ContextVar("ecolite_deadline", default=None)
+
+
+@contextmanager
+def deadline_scope(budget_s: Optional[float]) -> Iterator[None]:
+    if not budget_s or budget_s <= 0:
+        yield
+        return
+    new = time.monotonic() + budget_s
+    outer = _DEADLINE.get()
+    token = _DEADLINE.set(min(new, outer) if outer is not None else new)
+    try:
+        yield
+    finally:
+        _DEADLINE.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Segundos que quedan del presupuesto del request (puede ser ≤ 0), o None."""
+    dl = _DEADLINE.get()
+    return None if dl is None else dl - time.monotonic()
@@ -0,0 +1,105 @@
+"""
+FAQ por regex compiladas una sola vez.
+
+Las entradas viven en backend/data/faq.json (ECOLITE_FAQ_FILE): id, patrones
+y respuesta. Todas se compilan en una alternación con un grupo con nombre por
+entrada: un solo search() descarta los mensajes sin FAQ (la mayoría) y, si
+hay coincidencia, solo se revisan las entradas anteriores a la encontrada
+para respetar el orden del archivo (gana la primera entrada que coincide,
+igual que el recorrido original patrón por patrón).
+
+match() devuelve (id, respuesta) y cuenta aciertos por id.
+"""
+from __future__ import annotations
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Pattern, Tuple
+
+try:
+    from backend.services.metrics import counter
+except Exception:
+    from metrics import counter
+
+FAQ_PATH = Path(os.getenv(
+    "ECOLITE_FAQ_FILE",
+    str(Path(__file__).resolve().parent.parent / "data" / "faq.json"),
+))
+
+LOOKUPS = counter("ecolite_faq_lookups_total", "Mensajes evaluados contra la FAQ por resultado.", ("result",))
+HITS = counter("ecolite_faq_hits_total", "Aciertos de la FAQ por entrada.", ("faq_id",))
+
+
+class FaqMatcher:
+    def __init__(self, entries: List[Dict[str, Any]]):
+        ids = set()
+        for e in entries:
+            if not e.get("id") or not e.get("patterns") or not e.get("response"):
+                raise ValueError(f"entrada FAQ incompleta: {e.get('id')!r}")
+            if e["id"] in ids:
+                raise ValueError(f"id FAQ repetido: {e['id']!r}")
+            ids.add(e["id"])
+        self.entries = list(entries)
+        alts = ["|".join(f"(?:{p})" for p in e["patterns"]) for e in self.entries]
+        self._each: List[Pattern] = [re.compile(a) for a in alts]
+        self._combined: Pattern = re.compile("|".join(f"(?P<f{i}>{a})" for i, a in enumerate(alts)))
+
+    def match(self, message: str) -> Optional[Tuple[str, str]]:
+        text = (message or "").lower()
+        m = self._combined.search(text)
+        if m is None:
+            return None
+        first = int(m.lastgroup[1:])
+        for i in range(first):
+            if self._each[i].search(text):
+                first = i
+                break
+        e = self.entries[first]
+        return e["id"], e["response"]
+
+
+def load_entries(path: Optional[Path] = None) -> List[Dict[str, Any]]:
+    return json.loads(Path(path or FAQ_PATH).read_text(encoding="utf-8"))
+
+
+_LOCK = threading.Lock()
+_MATCHER = FaqMatcher(load_entries())
+
+
+def reload(path: Optional[Path] = None) -> int:
+    """Relee y recompila el archivo; si es inválido lanza y se conserva el anterior."""
+    global _MATCHER
+    matcher = FaqMatcher(load_entries(path))
+    with _LOCK:
+        _MATCHER = matcher
+    return len(matcher.entries)
+
+
+def entries() -> List[Dict[str, Any]]:
+    return _MATCHER.entries
+
+
+def match(message: str) -> Optional[Tuple[str, str]]:
+    """(id, respuesta) de la primera entrada que coincide, o None."""
+    hit = _MATCHER.match(message)
+    if hit:
+        LOOKUPS.inc(1, "hit")
+        HITS.inc(1, hit[0])
+    else:
+        LOOKUPS.inc(1, "miss")
+    return hit
+
+
+def snapshot() -> Dict[str, Any]:
+    looked = LOOKUPS.snapshot()
+    hits, misses = int(looked.get(("hit",), 0)), int(looked.get(("miss",), 0))
+    by_id = {k[0]: int(v) for k, v in HITS.snapshot().items()}
+    return {
+        "path": str(FAQ_PATH),
+        "entries": len(_MATCHER.entries),
+        "lookups": hits + misses,
+        "hit_rate": round(hits / (hits + misses), 4) if hits + misses else None,
+        "hits": {e["id"]: by_id.get(e["id"], 0) for e in _MATCHER.entries},
+    }
@@ -0,0 +1,209 @@
+"""
+Clasificador local (naive Bayes multinomial) para las decisiones de ruteo que
+hoy se piden al LLM con una sola palabra:
+
+- intent       : PRODUCTO / FAQ / OTRO       (_llm_intent)
+- product_mode : LISTAR / ASESORAR           (_llm_product_mode)
+
+Se entrena offline con bench.train_intent (turnos de chat.db etiquetados por
+el LLM) y se guarda en JSON. En runtime predict() devuelve la etiqueta solo si
+la probabilidad supera ECOLITE_INTENT_MIN_CONF; si no, None y el llamador
+pregunta al LLM como antes. Sin archivo de modelo todo va al LLM.
+"""
+from __future__ import annotations
+import json
+import math
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+try:
+    from backend.services.text_norm import ascii_tokens
+    from backend.services.metrics import counter
+    from backend.services import llm_telemetry
+except Exception:
+    from text_norm import ascii_tokens
+    from metrics import counter
+    import llm_telemetry
+
+MODEL_PATH = Path(os.getenv(
+    "ECOLITE_INTENT_MODEL",
+    str(Path(__file__).resolve().parent.parent / "data" / "intent_model.json"),
+))
+MIN_CONF = float(os.getenv("ECOLITE_INTENT_MIN_CONF", "0.85"))
+
+TASKS: Dict[str, tuple] = {
+    "intent": ("PRODUCTO", "FAQ", "OTRO"),
+    "product_mode": ("LISTAR", "ASESORAR"),
+}
+# site de llm_telemetry que reemplaza cada tarea (para estimar latencia ahorrada)
+TASK_SITES = {"intent": "intent", "product_mode": "product_mode"}
+
+ROUTED = counter("ecolite_intent_routed_total", "Decisiones de ruteo por tarea y origen (model/llm).",
+                 ("task", "source"))
+
+
+def tokens(msg: str) -> List[str]:
+    """Mismos tokens que el pipeline: normalización de _norm + singularize_es."""
+    return ascii_tokens(msg)
+
+
+class NaiveBayes:
+    """Naive Bayes multinomial con suavizado de Laplace sobre bolsa de tokens."""
+
+    def __init__(self, labels: Sequence[str], alpha: float = 1.0):
+        self.labels = list(labels)
+        self.alpha = alpha
+        self.doc_counts: Dict[str, int] = {l: 0 for l in self.labels}
+        self.tok_counts: Dict[str, Dict[str, int]] = {l: {} for l in self.labels}
+        self.tok_totals: Dict[str, int] = {l: 0 for l in self.labels}
+        self.vocab: set = set()
+
+    def fit(self, docs: Iterable[List[str]], ys: Iterable[str]) -> "NaiveBayes":
+        counts: Dict[str, Counter] = defaultdict(Counter)
+        for toks, y in zip(docs, ys):
+            if y not in self.doc_counts:
+                continue
+            self.doc_counts[y] += 1
+            counts[y].update(toks)
+            self.vocab.update(toks)
+        for y, c in counts.items():
+            self.tok_counts[y] = dict(c)
+            self.tok_totals[y] = sum(c.values())
+        return self
+
+    def predict_proba(self, toks: List[str]) -> Dict[str, float]:
+        n_docs = sum(self.doc_counts.values())
+        known = [t for t in toks if t in self.vocab]
+        v = len(self.vocab) or 1
+        logp: Dict[str, float] = {}
+        for y in self.labels:
+            lp = math.log((self.doc_counts[y] + self.alpha) / (n_docs + self.alpha * len(self.labels)))
+            denom = self.tok_totals[y] + self.alpha * v
+            counts = self.tok_counts[y]
+            for t in known:
+                lp += math.log((counts.get(t, 0) + self.alpha) / denom)
+            logp[y] = lp
+        top = max(logp.values())
+        exp = {y: math.exp(lp - top) for y, lp in logp.items()}
+        z = sum(exp.values())
+        return {y: e / z for y, e in exp.items()}
+
+    def predict(self, toks: List[str]) -> tuple[str, float]:
+        """(etiqueta, confianza); sin ningún token conocido la confianza es 0."""
+        if not any(t in self.vocab for t in toks):
+            return self.labels[0], 0.0
+        proba = self.predict_proba(toks)
+        y = max(proba, key=proba.get)
+        return y, proba[y]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"labels": self.labels, "alpha": self.alpha, "doc_counts": self.doc_counts,
+                "tok_counts": self.tok_counts}
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "NaiveBayes":
+        m = cls(d["labels"], d.get("alpha", 1.0))
+        m.doc_counts = {l: int(d["doc_counts"].get(l, 0)) for l in m.labels}
+        m.tok_counts = {l: dict(d["tok_counts"].get(l, {})) for l in m.labels}
+        m.tok_totals = {l: sum(c.values()) for l, c in m.tok_counts.items()}
+        m.vocab = {t for c in m.tok_counts.values() for t in c}
+        return m
+
+
+# ===== Runtime =====
+_LOCK = threading.Lock()
+_MODELS: Optional[Dict[str, NaiveBayes]] = None
+_LOADED = False
+_META: Dict[str, Any] = {}
+_PREDICT_S = {"sum": 0.0, "n": 0}
+
+
+def save(models: Dict[str, NaiveBayes], path: Path = MODEL_PATH, **meta: Any) -> None:
+    data = {"created_at": time.strftime("%Y-%m-%dT%H:%M:%S"), **meta,
+            "tasks": {task: m.to_dict() for task, m in models.items()}}
+    Path(path).write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+
+def load(path: Optional[Path] = None) -> Optional[Dict[str, NaiveBayes]]:
+    """(Re)carga el modelo; sin archivo (o inválido) queda desactivado."""
+    global _MODELS, _META, _LOADED
+    p = Path(path or MODEL_PATH)
+    models: Optional[Dict[str, NaiveBayes]] = None
+    meta: Dict[str, Any] = {}
+    if p.exists():
+        try:
+            data = json.loads(p.read_text(encoding="utf-8"))
+            models = {task: NaiveBayes.from_dict(d) for task, d in data.get("tasks", {}).items()}
+            meta = {k: v for k, v in data.items() if k != "tasks"}
+        except Exception as e:
+            print(f"[intent_model] no se pudo cargar {p}: {e}")
+    with _LOCK:
+        _MODELS, _META, _LOADED = models, meta, True
+    return models
+
+
+def set_models(models: Optional[Dict[str, NaiveBayes]]) -> None:
+    """Fija los modelos en memoria (None desactiva); lo usa el entrenamiento."""
+    global _MODELS, _LOADED
+    with _LOCK:
+        _MODELS, _LOADED = models, True
+
+
+def _models() -> Dict[str, NaiveBayes]:
+    if not _LOADED:
+        load()
+    return _MODELS or {}
+
+
+def predict(task: str, msg: str) -> Optional[str]:
+    """Etiqueta local si la confianza ≥ MIN_CONF; None → el llamador usa el LLM."""
+    model = _models().get(task)
+    if model is None:
+        ROUTED.inc(1, task, "llm")
+        return None
+    t0 = time.perf_counter()
+    label, conf = model.predict(tokens(msg))
+    dt = time.perf_counter() - t0
+    with _LOCK:
+        _PREDICT_S["sum"] += dt
+        _PREDICT_S["n"] += 1
+    if conf < MIN_CONF:
+        ROUTED.inc(1, task, "llm")
+        return None
+    ROUTED.inc(1, task, "model")
+    return label
+
+
+def snapshot() -> Dict[str, Any]:
+    """Decisiones por origen y latencia ahorrada estimada (media del site en llm_telemetry)."""
+    routed = ROUTED.snapshot()
+    llm_sites = llm_telemetry.snapshot()["sites"]
+    tasks: Dict[str, Any] = {}
+    saved_s = 0.0
+    for task in TASKS:
+        by_model = int(routed.get((task, "model"), 0))
+        by_llm = int(routed.get((task, "llm"), 0))
+        avg_ms = llm_sites.get(TASK_SITES[task], {}).get("latency_avg_ms", 0.0)
+        saved_s += by_model * avg_ms / 1000
+        tasks[task] = {
+            "model": by_model,
+            "llm": by_llm,
+            "coverage": round(by_model / (by_model + by_llm), 4) if by_model + by_llm else None,
+            "llm_latency_avg_ms": avg_ms,
+        }
+    with _LOCK:
+        n = _PREDICT_S["n"]
+        avg_us = round(1e6 * _PREDICT_S["sum"] / n, 1) if n else None
+    return {
+        "loaded": bool(_MODELS),
+        "path": str(MODEL_PATH),
+        "min_conf": MIN_CONF,
+        "meta": _META,
+        "predict_avg_us": avg_us,
+        "tasks": tasks,
+        "estimated_saved_s": round(saved_s, 3),
+    }
@@ -0,0 +1,122 @@
+"""
+Autómata Aho-Corasick para varias listas de palabras clave a la vez.
+
+Todas las listas (competencia, catálogo, cotizar, ...) se compilan en un solo
+autómata; scan(texto) recorre el texto una vez y devuelve los nombres de las
+listas con alguna coincidencia, con la misma semántica que
+any(k in texto for k in lista) para cada una.
+
+Las transiciones se completan (DFA) al construir, así el recorrido es una
+búsqueda en dict por carácter, sin seguir enlaces de fallo.
+
+Palabras extra sin tocar código: ECOLITE_KEYWORDS_FILE (por defecto
+backend/data/keywords.json), un JSON {"lista": ["palabra", ...]} que se suma a
+las listas del código al construir o recargar. Las palabras extra se normalizan
+con text_norm.norm_ascii, igual que el texto que se escanea ("Cotización" →
+"cotizacion").
+"""
+from __future__ import annotations
+import json
+import os
+from collections import deque
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+try:
+    from backend.services.text_norm import norm_ascii
+except Exception:
+    from text_norm import norm_ascii
+
+EXTRA_PATH = Path(os.getenv(
+    "ECOLITE_KEYWORDS_FILE",
+    str(Path(__file__).resolve().parent.parent / "data" / "keywords.json"),
+))
+
+
+class KeywordAutomaton:
+    def __init__(self, sets: Dict[str, Iterable[str]]):
+        self.sets: Dict[str, FrozenSet[str]] = {
+            name: frozenset(w for w in words if w) for name, words in sets.items()
+        }
+        goto: List[Dict[str, int]] = [{}]
+        out: List[set] = [set()]
+        for name, words in self.sets.items():
+            for w in words:
+                s = 0
+                for ch in w:
+                    nxt = goto[s].get(ch)
+                    if nxt is None:
+                        nxt = len(goto)
+                        goto[s][ch] = nxt
+                        goto.append({})
+                        out.append(set())
+                    s = nxt
+                out[s].add(name)
+
+        # BFS: enlaces de fallo, salidas heredadas y transiciones completas
+        fail = [0] * len(goto)
+        delta: List[Dict[str, int]] = [dict(goto[0])] + [{} for _ in range(len(goto) - 1)]
+        queue = deque(goto[0].values())
+        while queue:
+            s = queue.popleft()
+            out[s] |= out[fail[s]]
+            delta[s] = {**delta[fail[s]], **goto[s]}
+            for ch, nxt in goto[s].items():
+                fail[nxt] = delta[fail[s]].get(ch, 0) if s else 0
+                queue.append(nxt)
+
+        self._delta = delta
+        self._out: Tuple[FrozenSet[str], ...] = tuple(frozenset(o) for o in out)
+        self._all = frozenset(name for name, words in self.sets.items() if words)
+
+    @property
+    def states(self) -> int:
+        return len(self._delta)
+
+    def scan(self, text: str) -> FrozenSet[str]:
+        """Nombres de las listas con al menos una palabra contenida en `text`."""
+        delta, out, target = self._delta, self._out, self._all
+        found: FrozenSet[str] = frozenset()
+        s = 0
+        for ch in text:
+            s = delta[s].get(ch, 0)
+            if out[s]:
+                found = found | out[s]
+                if found == target:
+                    break
+        return found
+
+
+def parse_extra(data: object) -> Dict[str, List[str]]:
+    """Valida {"lista": ["palabra", ...]} y normaliza las palabras; ValueError si no tiene esa forma."""
+    if not isinstance(data, dict):
+        raise ValueError(f"se esperaba un objeto {{lista: [palabras]}}, no {type(data).__name__}")
+    out: Dict[str, List[str]] = {}
+    for k, v in data.items():
+        if not isinstance(v, list) or not all(isinstance(w, str) for w in v):
+            raise ValueError(f"la lista {k!r} debe ser una lista de textos")
+        out[str(k)] = [w for w in (norm_ascii(w) for w in v) if w]
+    return out
+
+
+def load_extra(path: Optional[Path] = None, strict: bool = False) -> Dict[str, List[str]]:
+    """
+    Palabras extra por lista desde el archivo de configuración ({} si no existe).
+    Si el archivo es inválido: con strict lanza ValueError (recarga en caliente,
+    se conserva el autómata anterior); sin strict avisa y devuelve {} (arranque).
+    """
+    p = Path(path or EXTRA_PATH)
+    if not p.exists():
+        return {}
+    try:
+        return parse_extra(json.loads(p.read_text(encoding="utf-8")))
+    except (OSError, ValueError) as e:
+        if strict:
+            raise ValueError(f"{p}: {e}") from e
+        print(f"[keyword_automaton] no se pudo leer {p}: {e}")
+        return {}
+
+
+def merge(base: Dict[str, Iterable[str]], extra: Dict[str, Iterable[str]]) -> Dict[str, FrozenSet[str]]:
+    """Listas del código + extra; las listas extra desconocidas se ignoran."""
+    return {name: frozenset(words) | frozenset(extra.get(name, ())) for name, words in base.items()}
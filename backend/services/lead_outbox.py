@@ -0,0 +1,292 @@
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+LEADS_DB_PATH = Path(__file__).resolve().parent.parent / "data" / "leads.db"
+
+# ====================================
+# ⚙️ CONFIGURACIÓN
+# ====================================
+MAX_ATTEMPTS = int(os.getenv("LEAD_OUTBOX_MAX_ATTEMPTS", "8"))
+BACKOFF_BASE = float(os.getenv("LEAD_OUTBOX_BACKOFF_BASE", "5"))      # segundos
+BACKOFF_MAX = float(os.getenv("LEAD_OUTBOX_BACKOFF_MAX", "3600"))
+POLL_INTERVAL = float(os.getenv("LEAD_OUTBOX_POLL_INTERVAL", "2"))
+BATCH_SIZE = int(os.getenv("LEAD_OUTBOX_BATCH", "20"))
+CONCURRENCY = int(os.getenv("LEAD_OUTBOX_CONCURRENCY", "4"))
+# Tiempo que una fila reclamada queda oculta; si el proceso muere, vuelve a la cola.
+LEASE_SECONDS = float(os.getenv("LEAD_OUTBOX_LEASE", "120"))
+
+STATUS_PENDING = "pending"
+STATUS_SENT = "sent"
+STATUS_DEAD = "dead"
+
+
+def connect() -> sqlite3.Connection:
+    con = sqlite3.connect(LEADS_DB_PATH, timeout=10)
+    con.execute("PRAGMA journal_mode=WAL")
+    return con
+
+
+def _now_iso() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def init_outbox() -> None:
+    con = connect()
+    try:
+        con.execute("""
+            CREATE TABLE IF NOT EXISTS lead_outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                last_error TEXT,
+                created_at TEXT,
+                updated_at TEXT
+            )
+        """)
+        con.execute("""
+            CREATE INDEX IF NOT EXISTS idx_lead_outbox_due
+            ON lead_outbox (status, next_attempt_at)
+        """)
+        con.commit()
+    finally:
+        con.close()
+
+
+def enqueue_lead(raw: Dict[str, Any], con: Optional[sqlite3.Connection] = None) -> int:
+    """
+    Guarda el lead en la cola de salida y devuelve su id.
+    Si se pasa `con`, se inserta dentro de la transacción del llamador.
+    """
+    payload = json.dumps(raw, ensure_ascii=False)
+    now = _now_iso()
+    sql = """
+        INSERT INTO lead_outbox (payload, status, attempts, next_attempt_at, created_at, updated_at)
+        VALUES (?, ?, 0, ?, ?, ?)
+    """
+    params = (payload, STATUS_PENDING, time.time(), now, now)
+    if con is not None:
+        return con.execute(sql, params).lastrowid
+
+    init_outbox()
+    own = connect()
+    try:
+        rowid = own.execute(sql, params).lastrowid
+        own.commit()
+        return rowid
+    finally:
+        own.close()
+
+
+def claim_due(limit: int = BATCH_SIZE) -> List[Tuple[int, Dict[str, Any], int]]:
+    """
+    Reclama hasta `limit` envíos vencidos (id, payload, attempts) moviendo su
+    next_attempt_at al final del lease, para que otro worker no los tome.
+    """
+    now = time.time()
+    con = connect()
+    try:
+        con.execute("BEGIN IMMEDIATE")
+        rows = con.execute(
+            """
+            SELECT id, payload, attempts FROM lead_outbox
+            WHERE status = ? AND next_attempt_at <= ?
+            ORDER BY next_attempt_at ASC
+            LIMIT ?
+            """,
+            (STATUS_PENDING, now, int(limit)),
+        ).fetchall()
+        if rows:
+            con.executemany(
+                "UPDATE lead_outbox SET next_attempt_at = ? WHERE id = ?",
+                [(now + LEASE_SECONDS, r[0]) for r in rows],
+            )
+        con.commit()
+    finally:
+        con.close()
+    return [(rid, json.loads(payload), attempts) for rid, payload, attempts in rows]
+
+
+def backoff_delay(attempts: int) -> float:
+    """Backoff exponencial con jitter: base·2^(n-1), acotado por BACKOFF_MAX."""
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** max(0, attempts - 1)))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def mark_sent(outbox_id: int, attempts: int) -> None:
+    con = connect()
+    try:
+        con.execute(
+            "UPDATE lead_outbox SET status = ?, attempts = ?, last_error = NULL, updated_at = ? WHERE id = ?",
+            (STATUS_SENT, attempts, _now_iso(), outbox_id),
+        )
+        con.commit()
+    finally:
+        con.close()
+
+
+def mark_failed(outbox_id: int, attempts: int, error: str) -> str:
+    """Reprograma el envío o lo pasa a dead-letter; devuelve el nuevo estado."""
+    status = STATUS_DEAD if attempts >= MAX_ATTEMPTS else STATUS_PENDING
+    next_at = time.time() + backoff_delay(attempts)
+    con = connect()
+    try:
+        con.execute(
+            """
+            UPDATE lead_outbox
+            SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ?, updated_at = ?
+            WHERE id = ?
+            """,
+            (status, attempts, next_at, (error or "")[:500], _now_iso(), outbox_id),
+        )
+        con.commit()
+    finally:
+        con.close()
+    return status
+
+
+def requeue_dead() -> int:
+    """Devuelve los dead-letters a la cola con el contador de intentos en cero."""
+    init_outbox()
+    con = connect()
+    try:
+        cur = con.execute(
+            "UPDATE lead_outbox SET status = ?, attempts = 0, next_attempt_at = ?, updated_at = ? WHERE status = ?",
+            (STATUS_PENDING, time.time(), _now_iso(), STATUS_DEAD),
+        )
+        con.commit()
+        return cur.rowcount
+    finally:
+        con.close()
+
+
+def outbox_stats() -> Dict[str, int]:
+    init_outbox()
+    con = connect()
+    try:
+        rows = con.execute("SELECT status, COUNT(*) FROM lead_outbox GROUP BY status").fetchall()
+    finally:
+        con.close()
+    stats = {STATUS_PENDING: 0, STATUS_SENT: 0, STATUS_DEAD: 0}
+    stats.update({status: n for status, n in rows})
+    return stats
+
+
+# ====================================
+# 🔁 WORKER
+# ====================================
+def _default_deliver_batch(raws: List[Dict[str, Any]]) -> List[bool]:
+    from backend.services.datacrm_client import send_contacts_to_datacrm
+    return send_contacts_to_datacrm(raws)
+
+
+async def _deliver_chunk(items: List[Tuple[int, Dict[str, Any], int]],
+                         deliver_batch: Callable[[List[Dict[str, Any]]], List[bool]],
+                         sem: asyncio.Semaphore) -> int:
+    """Entrega un trozo del lote en una llamada y marca cada fila con su resultado."""
+    async with sem:
+        try:
+            oks = list(await asyncio.to_thread(deliver_batch, [raw for _, raw, _ in items]))
+            if len(oks) != len(items):
+                raise RuntimeError(f"{len(oks)} resultados para {len(items)} leads")
+            errors = ["" if ok else "DataCRM rechazó el lead" for ok in oks]
+        except Exception as e:
+            oks, errors = [False] * len(items), [str(e)] * len(items)
+    for (outbox_id, _, attempts), ok, error in zip(items, oks, errors):
+        attempts += 1
+        if ok:
+            await asyncio.to_thread(mark_sent, outbox_id, attempts)
+        else:
+            status = await asyncio.to_thread(mark_failed, outbox_id, attempts, error)
+            if status == STATUS_DEAD:
+                print(f"[Outbox] ☠️ Lead {outbox_id} en dead-letter tras {attempts} intentos: {error}")
+    return sum(1 for ok in oks if ok)
+
+
+async def drain_once(deliver: Optional[Callable[[Dict[str, Any]], bool]] = None,
+                     limit: int = BATCH_SIZE,
+                     deliver_batch: Optional[Callable[[List[Dict[str, Any]]], List[bool]]] = None) -> int:
+    """
+    Procesa un lote de envíos vencidos; devuelve cuántos se reclamaron.
+    Por defecto el lote se reparte en CONCURRENCY trozos y cada trozo va a
+    DataCRM con send_contacts_to_datacrm (una sesión para todos sus leads).
+    Con `deliver` (un lead por llamada) cada lead es su propio trozo.
+    """
+    items = await asyncio.to_thread(claim_due, limit)
+    if not items:
+        return 0
+    sem = asyncio.Semaphore(max(1, CONCURRENCY))
+    if deliver is not None:
+        chunks = [[it] for it in items]
+        batch_fn = lambda raws: [bool(deliver(raws[0]))]
+    else:
+        size = -(-len(items) // max(1, CONCURRENCY))
+        chunks = [items[i:i + size] for i in range(0, len(items), size)]
+        batch_fn = deliver_batch or _default_deliver_batch
+    await asyncio.gather(*(_deliver_chunk(chunk, batch_fn, sem) for chunk in chunks))
+    return len(items)
+
+
+async def run_worker(stop: asyncio.Event,
+                     deliver: Optional[Callable[[Dict[str, Any]], bool]] = None) -> None:
+    """Bucle del worker: vacía la cola y duerme POLL_INTERVAL cuando no hay trabajo."""
+    await asyncio.to_thread(init_outbox)
+    while not stop.is_set():
+        try:
+            claimed = await drain_once(deliver)
+        except Exception as e:
+            print("[Outbox] ❌ Error en el worker:", e)
+            claimed = 0
+        if claimed:
+            continue
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+
+
+_STOP: Optional[asyncio.Event] = None
+_TASK: Optional[asyncio.Task] = None
+
+
+def start_worker() -> None:
+    """Arranca el worker en el event loop actual (startup de la app)."""
+    global _STOP, _TASK
+    if _TASK is not None and not _TASK.done():
+        return
+    _STOP = asyncio.Event()
+    _TASK = asyncio.get_running_loop().create_task(run_worker(_STOP))
+
+
+async def stop_worker() -> None:
+    if _STOP is not None:
+        _STOP.set()
+    if _TASK is not None:
+        await _TASK
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cola de salida de leads hacia DataCRM.")
+    parser.add_argument("--stats", action="store_true", help="muestra conteos por estado")
+    parser.add_argument("--requeue-dead", action="store_true", help="reencola los dead-letters")
+    parser.add_argument("--drain", action="store_true", help="procesa la cola hasta vaciarla y termina")
+    args = parser.parse_args()
+    if args.requeue_dead:
+        print(f"[Outbox] {requeue_dead()} leads reencolados")
+    if args.drain:
+        async def _drain() -> None:
+            init_outbox()
+            while await drain_once():
+                pass
+        asyncio.run(_drain())
+    print(json.dumps(outbox_stats()))
@@ -0,0 +1,184 @@
+from __future__ import annotations
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from backend.services import lead_outbox
+
+_READY = False
+_READY_LOCK = threading.Lock()
+
+
+def normalize_email(email: str | None) -> Optional[str]:
+    e = (email or "").strip().lower()
+    return e or None
+
+
+def normalize_phone(phone: str | None) -> Optional[str]:
+    """Solo dígitos; quita el indicativo 57 de celulares colombianos (+57 3xx...)."""
+    d = re.sub(r"\D+", "", phone or "")
+    if len(d) == 12 and d.startswith("57"):
+        d = d[2:]
+    return d or None
+
+
+def init_leads_db() -> None:
+    """
+    Asegura la tabla leads (esquema histórico de leads.db) y la migra una vez:
+    columnas normalizadas + índices únicos por sesión e idempotency key.
+    """
+    global _READY
+    if _READY:
+        return
+    with _READY_LOCK:
+        if _READY:
+            return
+        lead_outbox.init_outbox()
+        con = lead_outbox.connect()
+        try:
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS leads (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id TEXT,
+                    name TEXT,
+                    email TEXT,
+                    phone TEXT,
+                    profession TEXT,
+                    city TEXT,
+                    user_agent TEXT,
+                    created_at TEXT
+                )
+            """)
+            cols = {r[1] for r in con.execute("PRAGMA table_info(leads)")}
+            added = False
+            for col in ("email_norm", "phone_norm", "idempotency_key", "updated_at"):
+                if col not in cols:
+                    con.execute(f"ALTER TABLE leads ADD COLUMN {col} TEXT")
+                    added = added or col in {"email_norm", "phone_norm"}
+            con.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS ux_leads_session_email
+                ON leads (session_id, email_norm) WHERE email_norm IS NOT NULL
+            """)
+            con.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS ux_leads_session_phone
+                ON leads (session_id, phone_norm) WHERE phone_norm IS NOT NULL
+            """)
+            con.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS ux_leads_idempotency
+                ON leads (idempotency_key) WHERE idempotency_key IS NOT NULL
+            """)
+            if added:
+                _backfill_norms(con)
+            con.commit()
+        finally:
+            con.close()
+        _READY = True
+
+
+def _backfill_norms(con: sqlite3.Connection) -> None:
+    """
+    Rellena las columnas normalizadas de los leads históricos. Se recorre del
+    más reciente al más antiguo: ante duplicados se queda el último registro
+    y los anteriores conservan NULL (quedan fuera de los índices únicos).
+    """
+    rows = con.execute("SELECT id, email, phone FROM leads ORDER BY id DESC").fetchall()
+    for lead_id, email, phone in rows:
+        con.execute("UPDATE OR IGNORE leads SET email_norm = ? WHERE id = ?",
+                    (normalize_email(email), lead_id))
+        con.execute("UPDATE OR IGNORE leads SET phone_norm = ? WHERE id = ?",
+                    (normalize_phone(phone), lead_id))
+
+
+def _find_existing(con: sqlite3.Connection, session_id: str,
+                   email_norm: Optional[str], phone_norm: Optional[str]) -> Optional[int]:
+    row = con.execute(
+        """
+        SELECT id FROM leads
+        WHERE session_id = ? AND (email_norm = ? OR phone_norm = ?)
+        ORDER BY id DESC LIMIT 1
+        """,
+        (session_id, email_norm, phone_norm),
+    ).fetchone()
+    return row[0] if row else None
+
+
+def save_lead(raw: Dict[str, Any], idempotency_key: Optional[str] = None) -> Tuple[int, bool]:
+    """
+    Guarda (upsert) el lead y, solo si es nuevo, lo encola para DataCRM en la
+    misma transacción. Devuelve (lead_id, creado).
+    - Con idempotency key repetida: una búsqueda por índice y no se toca nada.
+    - Mismo email o teléfono normalizado en la sesión: actualiza el perfil sin reenviar al CRM
+      y completa el email/teléfono (y sus normalizados) que faltaban.
+    """
+    init_leads_db()
+    session_id = str(raw.get("session_id") or "")
+    email_norm = normalize_email(raw.get("email"))
+    phone_norm = normalize_phone(raw.get("phone"))
+    key = (idempotency_key or "").strip()[:200] or None
+    now = datetime.now().isoformat(timespec="seconds")
+
+    con = lead_outbox.connect()
+    try:
+        if key:
+            row = con.execute("SELECT id FROM leads WHERE idempotency_key = ?", (key,)).fetchone()
+            if row:
+                return row[0], False
+
+        con.execute("BEGIN IMMEDIATE")
+        if key:
+            # Otra petición con la misma key pudo confirmar mientras esperábamos el lock
+            row = con.execute("SELECT id FROM leads WHERE idempotency_key = ?", (key,)).fetchone()
+            if row:
+                con.rollback()
+                return row[0], False
+        existing = _find_existing(con, session_id, email_norm, phone_norm)
+        if existing is not None:
+            con.execute(
+                """
+                UPDATE leads
+                SET name = ?, profession = ?, city = ?, user_agent = ?, updated_at = ?,
+                    email = COALESCE(NULLIF(email, ''), ?),
+                    phone = COALESCE(NULLIF(phone, ''), ?),
+                    idempotency_key = COALESCE(idempotency_key, ?)
+                WHERE id = ?
+                """,
+                (raw.get("name"), raw.get("profession"), raw.get("city"),
+                 raw.get("user_agent"), now, raw.get("email"), raw.get("phone"), key, existing),
+            )
+            # Las claves normalizadas siguen a email/phone (un teléfono que llega después
+            # también deduplica). OR IGNORE: si ya es de otro lead de la sesión, se deja NULL.
+            con.execute("UPDATE OR IGNORE leads SET email_norm = COALESCE(email_norm, ?) WHERE id = ?",
+                        (email_norm, existing))
+            con.execute("UPDATE OR IGNORE leads SET phone_norm = COALESCE(phone_norm, ?) WHERE id = ?",
+                        (phone_norm, existing))
+            con.commit()
+            return existing, False
+
+        try:
+            lead_id = con.execute(
+                """
+                INSERT INTO leads (session_id, name, email, phone, profession, city,
+                                   user_agent, created_at, email_norm, phone_norm,
+                                   idempotency_key, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (session_id, raw.get("name"), raw.get("email"), raw.get("phone"),
+                 raw.get("profession"), raw.get("city"), raw.get("user_agent"),
+                 raw.get("created_at") or now, email_norm, phone_norm, key, now),
+            ).lastrowid
+        except sqlite3.IntegrityError:
+            # Carrera con otra petición que acaba de insertar el mismo lead
+            con.rollback()
+            row = con.execute(
+                "SELECT id FROM leads WHERE idempotency_key = ?", (key,)
+            ).fetchone() if key else None
+            lead_id = row[0] if row else _find_existing(con, session_id, email_norm, phone_norm)
+            return lead_id, False
+
+        lead_outbox.enqueue_lead(raw, con=con)
+        con.commit()
+        return lead_id, True
+    finally:
+        con.close()
@@ -0,0 +1,97 @@
+"""
+Control de admisión de llamadas al LLM y decisión de modo degradado.
+
+- acquire()/release(): como máximo LLM_MAX_CONCURRENCY llamadas a la vez; las
+  demás esperan (cuentan como "en cola") hasta su timeout y si no entran se
+  descartan (el cliente responde con su fallback).
+- degrade_reason(): al inicio de cada turno decide si el turno completo va en
+  modo determinista (sin LLM) porque hay demasiadas llamadas en vuelo o en cola,
+  o porque el breaker del LLM está abierto.
+"""
+from __future__ import annotations
+import os
+import threading
+from typing import Any, Dict, Optional
+
+try:
+    from backend.services.metrics import counter, gauge
+except Exception:
+    from metrics import counter, gauge
+
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+# Umbrales para degradar un turno nuevo (por defecto: todas las ranuras ocupadas
+# o cualquier llamada esperando turno).
+DEGRADE_INFLIGHT = int(os.getenv("ECOLITE_DEGRADE_INFLIGHT", str(MAX_CONCURRENCY)))
+DEGRADE_QUEUED = int(os.getenv("ECOLITE_DEGRADE_QUEUED", "1"))
+QUEUE_TIMEOUT_S = float(os.getenv("LLM_QUEUE_TIMEOUT_S", "2"))
+
+_SLOTS = threading.BoundedSemaphore(max(1, MAX_CONCURRENCY))
+_LOCK = threading.Lock()
+_IN_FLIGHT = 0
+_QUEUED = 0
+
+DEGRADED_TURNS = counter("ecolite_degraded_turns_total", "Turnos servidos en modo determinista.", ("reason",))
+SHED_CALLS = counter("ecolite_llm_shed_total", "Llamadas al LLM descartadas por falta de ranura.")
+gauge("ecolite_llm_in_flight", "Llamadas al LLM en curso.", lambda: _IN_FLIGHT)
+gauge("ecolite_llm_queued", "Llamadas al LLM esperando ranura.", lambda: _QUEUED)
+
+
+def acquire(timeout: Optional[float] = None) -> bool:
+    """Reserva una ranura; espera como mucho `timeout` (o LLM_QUEUE_TIMEOUT_S)."""
+    global _IN_FLIGHT, _QUEUED
+    if _SLOTS.acquire(blocking=False):
+        with _LOCK:
+            _IN_FLIGHT += 1
+        return True
+    wait = QUEUE_TIMEOUT_S if timeout is None else min(QUEUE_TIMEOUT_S, max(0.0, timeout))
+    with _LOCK:
+        _QUEUED += 1
+    try:
+        ok = wait > 0 and _SLOTS.acquire(timeout=wait)
+    finally:
+        with _LOCK:
+            _QUEUED -= 1
+    if ok:
+        with _LOCK:
+            _IN_FLIGHT += 1
+    else:
+        SHED_CALLS.inc()
+    return ok
+
+
+def release() -> None:
+    global _IN_FLIGHT
+    with _LOCK:
+        _IN_FLIGHT -= 1
+    _SLOTS.release()
+
+
+def degrade_reason(breaker_open: bool = False) -> Optional[str]:
+    """Motivo para degradar el turno que empieza, o None si el LLM tiene capacidad."""
+    if breaker_open:
+        return "breaker_open"
+    with _LOCK:
+        in_flight, queued = _IN_FLIGHT, _QUEUED
+    if queued >= DEGRADE_QUEUED > 0:
+        return "queued"
+    if in_flight >= DEGRADE_INFLIGHT > 0:
+        return "in_flight"
+    return None
+
+
+def note_degraded(reason: str) -> None:
+    DEGRADED_TURNS.inc(1, reason)
+
+
+def snapshot() -> Dict[str, Any]:
+    with _LOCK:
+        in_flight, queued = _IN_FLIGHT, _QUEUED
+    return {
+        "in_flight": in_flight,
+        "queued": queued,
+        "max_concurrency": MAX_CONCURRENCY,
+        "degrade_inflight": DEGRADE_INFLIGHT,
+        "degrade_queued": DEGRADE_QUEUED,
+        "degraded_turns": {k[0]: int(v) for k, v in DEGRADED_TURNS.snapshot().items()},
+        "shed_calls": int(sum(SHED_CALLS.snapshot().values())),
+    }
@@ -0,0 +1,149 @@
+"""
+Telemetría de llamadas al LLM por punto de llamada (site): latencia,
+tokens de prompt/completion, errores, timeouts y costo estimado.
+
+Cada llamada deja una línea JSON en stdout (ECOLITE_LLM_LOG=0 la apaga)
+y actualiza agregados en memoria, expuestos en /metrics y /metrics/llm.
+"""
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+try:
+    from backend.services.metrics import counter, histogram
+except Exception:
+    from metrics import counter, histogram
+
+LOG_ENABLED = os.getenv("ECOLITE_LLM_LOG", "1").strip().lower() not in {"0", "false", "no", "off"}
+
+# USD por millón de tokens (entrada, salida). Ajustable por entorno para
+# modelos nuevos o cambios de tarifa: OPENAI_PRICE_INPUT_PER_M / OPENAI_PRICE_OUTPUT_PER_M.
+PRICES_PER_M: Dict[str, tuple[float, float]] = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4.1": (2.00, 8.00),
+}
+
+LLM_SECONDS = histogram(
+    "ecolite_llm_latency_seconds", "Latencia upstream de las llamadas al LLM.", ("site",),
+    buckets=(0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 8.0, 13.0, 21.0),
+)
+LLM_CALLS = counter("ecolite_llm_calls_total", "Llamadas al LLM por site y resultado.", ("site", "status"))
+LLM_TOKENS = counter("ecolite_llm_tokens_total", "Tokens consumidos por site y tipo.", ("site", "kind"))
+LLM_COALESCED = counter("ecolite_llm_coalesced_total",
+                        "Llamadas resueltas con el resultado de una idéntica en curso.", ("site",))
+LLM_COST = counter("ecolite_llm_cost_usd_total", "Costo estimado en USD por site.", ("site",))
+
+_LOCK = threading.Lock()
+_AGG: Dict[str, Dict[str, float]] = {}
+
+
+def _price(model: str) -> tuple[float, float]:
+    env_in = os.getenv("OPENAI_PRICE_INPUT_PER_M")
+    env_out = os.getenv("OPENAI_PRICE_OUTPUT_PER_M")
+    if env_in and env_out:
+        return float(env_in), float(env_out)
+    # Coincidencia por prefijo más largo (gpt-4o-mini-2024-07-18 → gpt-4o-mini)
+    for name in sorted(PRICES_PER_M, key=len, reverse=True):
+        if model.startswith(name):
+            return PRICES_PER_M[name]
+    return (0.0, 0.0)
+
+
+def _site_agg(site: str) -> Dict[str, float]:
+    """Agregado del site (crear si no existe); llamar con _LOCK tomado."""
+    return _AGG.setdefault(site, {
+        "calls": 0, "errors": 0, "timeouts": 0, "latency_sum": 0.0, "latency_max": 0.0,
+        "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0,
+    })
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    p_in, p_out = _price(model or "")
+    return (prompt_tokens * p_in + completion_tokens * p_out) / 1_000_000
+
+
+def record(site: str, model: str, latency: float, status: str = "ok",
+           prompt_tokens: int = 0, completion_tokens: int = 0,
+           error: Optional[str] = None) -> None:
+    """Registra una llamada. status: ok | error | timeout (u otros que defina el cliente)."""
+    site = site or "other"
+    cost = estimate_cost(model, prompt_tokens, completion_tokens)
+
+    LLM_SECONDS.observe(latency, site)
+    LLM_CALLS.inc(1, site, status)
+    if prompt_tokens:
+        LLM_TOKENS.inc(prompt_tokens, site, "prompt")
+    if completion_tokens:
+        LLM_TOKENS.inc(completion_tokens, site, "completion")
+    if cost:
+        LLM_COST.inc(cost, site)
+
+    with _LOCK:
+        a = _site_agg(site)
+        a["calls"] += 1
+        if status == "error":
+            a["errors"] += 1
+        elif status == "timeout":
+            a["timeouts"] += 1
+        a["latency_sum"] += latency
+        a["latency_max"] = max(a["latency_max"], latency)
+        a["prompt_tokens"] += prompt_tokens
+        a["completion_tokens"] += completion_tokens
+        a["cost_usd"] += cost
+
+    if LOG_ENABLED:
+        line: Dict[str, Any] = {
+            "event": "llm_call", "ts": round(time.time(), 3), "site": site, "model": model,
+            "status": status, "latency_ms": round(latency * 1000, 1),
+            "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "cost_usd": round(cost, 8),
+        }
+        if error:
+            line["error"] = error[:200]
+        print(json.dumps(line, ensure_ascii=False), flush=True)
+
+
+def record_skipped(site: str, reason: str) -> None:
+    """Llamada no realizada (breaker abierto, sin presupuesto): cuenta sin latencia ni tokens."""
+    site = site or "other"
+    LLM_CALLS.inc(1, site, reason)
+    with _LOCK:
+        a = _site_agg(site)
+        a[f"skipped_{reason}"] = a.get(f"skipped_{reason}", 0) + 1
+    if LOG_ENABLED:
+        print(json.dumps({"event": "llm_skipped", "ts": round(time.time(), 3), "site": site,
+                          "reason": reason}), flush=True)
+
+
+def record_coalesced(site: str) -> None:
+    """Llamada que no fue upstream porque se sumó a una idéntica en curso."""
+    site = site or "other"
+    LLM_COALESCED.inc(1, site)
+    with _LOCK:
+        a = _site_agg(site)
+        a["coalesced"] = a.get("coalesced", 0) + 1
+
+
+def snapshot() -> Dict[str, Any]:
+    """Agregados por site con latencia media y costo acumulado."""
+    with _LOCK:
+        sites = {k: dict(v) for k, v in _AGG.items()}
+    total_cost = 0.0
+    for a in sites.values():
+        a["latency_avg_ms"] = round(1000 * a["latency_sum"] / a["calls"], 1) if a["calls"] else 0.0
+        a["latency_max_ms"] = round(1000 * a.pop("latency_max"), 1)
+        a.pop("latency_sum")
+        a["cost_usd"] = round(a["cost_usd"], 6)
+        total_cost += a["cost_usd"]
+    return {"sites": sites, "total_cost_usd": round(total_cost, 6)}
+
+
+def reset() -> None:
+    with _LOCK:
+        _AGG.clear()
@@ -0,0 +1,192 @@
+"""
+Huella de memoria de las estructuras en proceso y snapshots de tracemalloc.
+
+- footprint(): tamaño profundo (objetos alcanzables, sin contar dos veces los
+  compartidos) del catálogo, el índice de búsqueda, las sesiones y de una
+  reconstrucción del vocabulario por request, más el RSS del proceso.
+- start/take_snapshot/diff: tracemalloc bajo demanda para detectar fugas
+  (p. ej. los dicts de sesión que nunca se purgan).
+"""
+from __future__ import annotations
+import gc
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+MAX_SNAPSHOTS = 10
+TRACE_FRAMES = 10
+
+_LOCK = threading.Lock()
+_SNAPSHOTS: "OrderedDict[str, Tuple[float, tracemalloc.Snapshot]]" = OrderedDict()
+
+# Tipos inmutables "hoja" que no hace falta recorrer
+_ATOMIC = (str, bytes, int, float, bool, type(None), complex)
+
+
+def deep_sizeof(obj: Any, seen: Optional[set] = None) -> int:
+    """
+    Bytes de obj y todo lo que referencia vía contenedores estándar y __dict__.
+    `seen` permite sumar varias estructuras sin contar dos veces lo compartido.
+    """
+    if seen is None:
+        seen = set()
+    total = 0
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        oid = id(o)
+        if oid in seen:
+            continue
+        seen.add(oid)
+        total += sys.getsizeof(o)
+        if isinstance(o, _ATOMIC):
+            continue
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            stack.extend(o)
+        d = getattr(o, "__dict__", None)
+        if isinstance(d, dict):
+            stack.append(d)
+    return total
+
+
+def _rss_bytes() -> Optional[int]:
+    """RSS actual (Linux /proc) o pico de RSS vía resource como respaldo."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except Exception:
+        return None
+
+
+def _structures() -> Dict[str, Callable[[], Any]]:
+    """Estructuras a medir; se resuelven al vuelo para ver el estado actual."""
+    from backend.services import product_loader, search_service, state_manager
+    from backend.routers import chat
+
+    return {
+        "catalog": lambda: product_loader.PRODUCTOS,
+        "search_index": lambda: search_service._INDEX,
+        "search_vocab": lambda: search_service._VOCAB,
+        "search_df": lambda: search_service._DF,
+        "chat_sessions": lambda: chat._SESS,
+        "state_sessions": lambda: state_manager._SESSIONS,
+    }
+
+
+def _len(obj: Any) -> Optional[int]:
+    try:
+        return len(obj)
+    except TypeError:
+        return None
+
+
+def footprint() -> Dict[str, Any]:
+    """Tamaños profundos por estructura (cada una medida por separado) y total sin duplicados."""
+    out: Dict[str, Any] = {}
+    shared: set = set()
+    total = 0
+    for name, get in _structures().items():
+        obj = get()
+        out[name] = {"items": _len(obj), "bytes": deep_sizeof(obj)}
+        total += deep_sizeof(obj, shared)
+
+    # Reconstrucción de vocabulario que hace cada turno de /chat
+    from backend.routers import chat
+    from backend.services.product_loader import load_products
+    try:
+        catalog, _ = load_products()
+        products = list(catalog.values())
+        t0 = time.perf_counter()
+        vocab = chat._build_vocab_dynamic(products)
+        ms = (time.perf_counter() - t0) * 1000
+        out["per_request_vocab"] = {"items": len(vocab), "bytes": deep_sizeof(vocab), "build_ms": round(ms, 2)}
+    except Exception as e:
+        out["per_request_vocab"] = {"error": str(e)}
+
+    return {
+        "structures": out,
+        "structures_total_bytes": total,
+        "rss_bytes": _rss_bytes(),
+        "gc_objects": len(gc.get_objects()),
+        "tracemalloc": tracing_status(),
+    }
+
+
+# ---------- tracemalloc ----------
+def tracing_status() -> Dict[str, Any]:
+    if not tracemalloc.is_tracing():
+        return {"tracing": False, "snapshots": list(_SNAPSHOTS)}
+    current, peak = tracemalloc.get_traced_memory()
+    return {"tracing": True, "current_bytes": current, "peak_bytes": peak,
+            "snapshots": list(_SNAPSHOTS)}
+
+
+def start(frames: int = TRACE_FRAMES) -> Dict[str, Any]:
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(max(1, int(frames)))
+    return tracing_status()
+
+
+def stop() -> Dict[str, Any]:
+    tracemalloc.stop()
+    with _LOCK:
+        _SNAPSHOTS.clear()
+    return tracing_status()
+
+
+def take_snapshot(name: Optional[str] = None) -> str:
+    """Guarda un snapshot con nombre (por defecto un timestamp). Requiere start()."""
+    if not tracemalloc.is_tracing():
+        raise RuntimeError("tracemalloc no está activo")
+    snap = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+    name = (name or time.strftime("%H%M%S")).strip()[:64]
+    with _LOCK:
+        _SNAPSHOTS.pop(name, None)
+        _SNAPSHOTS[name] = (time.time(), snap)
+        while len(_SNAPSHOTS) > MAX_SNAPSHOTS:
+            _SNAPSHOTS.popitem(last=False)
+    return name
+
+
+def _stat_row(stat) -> Dict[str, Any]:
+    frame = stat.traceback[0]
+    row = {"where": f"{frame.filename}:{frame.lineno}", "bytes": stat.size, "count": stat.count}
+    if hasattr(stat, "size_diff"):
+        row["bytes_diff"] = stat.size_diff
+        row["count_diff"] = stat.count_diff
+    return row
+
+
+def top(name: str, limit: int = 20, group_by: str = "lineno") -> List[Dict[str, Any]]:
+    with _LOCK:
+        entry = _SNAPSHOTS.get(name)
+    if entry is None:
+        raise KeyError(name)
+    return [_stat_row(s) for s in entry[1].statistics(group_by)[:limit]]
+
+
+def diff(old: str, new: str, limit: int = 20, group_by: str = "lineno") -> List[Dict[str, Any]]:
+    """Líneas con mayor crecimiento entre dos snapshots."""
+    with _LOCK:
+        a = _SNAPSHOTS.get(old)
+        b = _SNAPSHOTS.get(new)
+    if a is None or b is None:
+        raise KeyError(old if a is None else new)
+    return [_stat_row(s) for s in b[1].compare_to(a[1], group_by)[:limit]]
@@ -0,0 +1,113 @@
+"""
+Análisis de un mensaje de chat en una sola pasada.
+
+El router necesita, para cada turno, la misma batería de señales: texto
+normalizado, FAQ (id y respuesta, ver faq_matcher), listas de palabras clave (competencia,
+catálogo, cotizar, ventilador) y los patrones de "ver más", insultos,
+preguntas, "muéstrame/recomiéndame", seguimientos y código de producto.
+MessageAnalyzer normaliza una vez, busca todas las listas de palabras clave en
+un solo recorrido (KeywordAutomaton) y evalúa cada patrón una sola vez; el
+resultado es un MessageFeatures inmutable.
+
+Los patrones y listas viven en el router (chat.py) y se inyectan al crear el
+analizador, así este módulo no depende del router.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, Iterable, Optional, Pattern, Tuple
+
+try:
+    from backend.services.keyword_automaton import KeywordAutomaton
+except Exception:
+    from keyword_automaton import KeywordAutomaton
+
+# Listas de palabras clave (coincidencia por substring sobre el texto normalizado)
+KEYWORD_FIELDS = ("competitor_brand", "competitor", "catalog", "cotizar", "ventilador")
+# Patrones evaluados con .search sobre el texto crudo
+PATTERN_FIELDS = ("more", "abuse", "show", "suggest", "ask_prefix", "followup", "faq_topic")
+
+
+@dataclass(frozen=True)
+class MessageFeatures:
+    raw: str
+    norm: str
+    faq_id: Optional[str]
+    faq_answer: Optional[str]
+    competitor_brand: bool      # marcas de la guarda inicial
+    competitor: bool            # COMPETITOR_KEYWORDS completo
+    catalog: bool
+    cotizar: bool
+    ventilador: bool
+    more: bool
+    abuse: bool
+    question: bool
+    show: bool
+    suggest: bool
+    ask_prefix: bool
+    followup: bool
+    faq_topic: bool
+    code_token: Optional[Tuple[str, str]]
+
+    @property
+    def mode_override(self) -> Optional[str]:
+        """Equivalente a _product_mode_override: "muéstrame/recomiéndame" → LISTAR."""
+        return "LISTAR" if self.show or self.suggest else None
+
+
+class MessageAnalyzer:
+    def __init__(self, *, normalize: Callable[[str], str],
+                 faq_match: Callable[[str], Optional[Tuple[str, str]]],
+                 is_question: Callable[[str], bool],
+                 code_token: Callable[[str], Optional[Tuple[str, str]]],
+                 keywords: Dict[str, Iterable[str]],
+                 patterns: Dict[str, Pattern]):
+        unknown = (set(keywords) - set(KEYWORD_FIELDS)) | (set(patterns) - set(PATTERN_FIELDS))
+        if unknown:
+            raise ValueError(f"campos desconocidos: {sorted(unknown)}")
+        self._normalize = normalize
+        self._faq_match = faq_match
+        self._is_question = is_question
+        self._code_token = code_token
+        self._patterns = dict(patterns)
+        self.set_keywords(keywords)
+
+    def set_keywords(self, keywords: Dict[str, Iterable[str]]) -> None:
+        """(Re)construye el autómata; el cambio es atómico para análisis en curso."""
+        unknown = set(keywords) - set(KEYWORD_FIELDS)
+        if unknown:
+            raise ValueError(f"campos desconocidos: {sorted(unknown)}")
+        self.automaton = KeywordAutomaton(keywords)
+
+    def _keyword_hits(self, norm: str) -> FrozenSet[str]:
+        return self.automaton.scan(norm)
+
+    def analyze(self, msg: str) -> MessageFeatures:
+        raw = (msg or "").strip()
+        norm = self._normalize(raw)
+        hits = self._keyword_hits(norm)
+        pat = {f: bool(rx.search(raw)) for f, rx in self._patterns.items()}
+        try:
+            faq = self._faq_match(raw)
+        except Exception:
+            faq = None
+        faq_id, faq_answer = faq or (None, None)
+        return MessageFeatures(
+            raw=raw,
+            norm=norm,
+            faq_id=faq_id,
+            faq_answer=faq_answer,
+            competitor_brand="competitor_brand" in hits,
+            competitor="competitor" in hits,
+            catalog="catalog" in hits,
+            cotizar="cotizar" in hits,
+            ventilador="ventilador" in hits,
+            more=pat.get("more", False),
+            abuse=pat.get("abuse", False),
+            question=self._is_question(raw),
+            show=pat.get("show", False),
+            suggest=pat.get("suggest", False),
+            ask_prefix=pat.get("ask_prefix", False),
+            followup=pat.get("followup", False),
+            faq_topic=pat.get("faq_topic", False),
+            code_token=self._code_token(raw),
+        )
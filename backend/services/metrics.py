@@ -0,0 +1,257 @@
+"""
+Métricas en proceso con salida en formato de texto Prometheus.
+
+- span("etapa")        → context manager que mide una etapa del pipeline.
+- timed("etapa")       → decorador equivalente para funciones completas.
+- request_span("chat") → mide un turno completo y lo etiqueta con la rama
+                         de respuesta marcada con set_branch("faq"), etc.
+
+Con ECOLITE_METRICS=0 span() devuelve un objeto no-op compartido y timed()
+deja la función intacta, así que el costo es prácticamente nulo.
+"""
+from __future__ import annotations
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+ENABLED = os.getenv("ECOLITE_METRICS", "1").strip().lower() not in {"0", "false", "no", "off"}
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _fmt_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(v: str) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_num(x: float) -> str:
+    if x == float("inf"):
+        return "+Inf"
+    return repr(float(x)) if isinstance(x, float) else str(x)
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(label_values)
+            if s is None:
+                s = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            s[0][idx] += 1
+            s[1] += value
+            s[2] += 1
+
+    def snapshot(self) -> Dict[Tuple[str, ...], Tuple[List[int], float, int]]:
+        with self._lock:
+            return {k: (list(v[0]), v[1], v[2]) for k, v in self._series.items()}
+
+    def render(self) -> List[str]:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for lv, (counts, total, n) in sorted(self.snapshot().items()):
+            acc = 0
+            for b, c in zip(self.buckets + (float("inf"),), counts):
+                acc += c
+                le = 'le="' + _fmt_num(b) + '"'
+                out.append(f"{self.name}_bucket{_fmt_labels(self.labels, lv, le)} {acc}")
+            out.append(f"{self.name}_sum{_fmt_labels(self.labels, lv)} {total}")
+            out.append(f"{self.name}_count{_fmt_labels(self.labels, lv)} {n}")
+        return out
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, *label_values: str) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def snapshot(self) -> Dict[Tuple[str, ...], float]:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> List[str]:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for lv, v in sorted(self.snapshot().items()):
+            out.append(f"{self.name}{_fmt_labels(self.labels, lv)} {v}")
+        return out
+
+
+class Gauge:
+    """Gauge calculado al momento de exportar (callback sin etiquetas)."""
+
+    def __init__(self, name: str, help_text: str, fn: Callable[[], float]):
+        self.name = name
+        self.help = help_text
+        self.fn = fn
+
+    def render(self) -> List[str]:
+        try:
+            value = float(self.fn())
+        except Exception:
+            return []
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge", f"{self.name} {value}"]
+
+
+_REGISTRY: List = []
+
+
+def histogram(name: str, help_text: str, labels: Sequence[str] = (),
+              buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    h = Histogram(name, help_text, labels, buckets)
+    _REGISTRY.append(h)
+    return h
+
+
+def counter(name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+    c = Counter(name, help_text, labels)
+    _REGISTRY.append(c)
+    return c
+
+
+def gauge(name: str, help_text: str, fn: Callable[[], float]) -> Gauge:
+    g = Gauge(name, help_text, fn)
+    _REGISTRY.append(g)
+    return g
+
+
+def render_prometheus() -> str:
+    lines: List[str] = []
+    for m in _REGISTRY:
+        lines.extend(m.render())
+    return "\n".join(lines) + "\n"
+
+
+# ===== Métricas del pipeline =====
+STAGE_SECONDS = histogram(
+    "ecolite_stage_seconds", "Duración por etapa del pipeline de chat.", ("stage",)
+)
+REQUEST_SECONDS = histogram(
+    "ecolite_request_seconds", "Duración total del turno por endpoint y rama de respuesta.",
+    ("endpoint", "branch"),
+)
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("stage", "t0")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.t0 = 0.0
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        STAGE_SECONDS.observe(time.perf_counter() - self.t0, self.stage)
+        return False
+
+
+def span(stage: str):
+    """Mide el bloque `with` como la etapa `stage`."""
+    return _Span(stage) if ENABLED else _NOOP
+
+
+def timed(stage: str):
+    """Decorador: mide cada llamada a la función como la etapa `stage`."""
+    def deco(fn):
+        if not ENABLED:
+            return fn
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                STAGE_SECONDS.observe(time.perf_counter() - t0, stage)
+        return wrapper
+    return deco
+
+
+# ===== Turno completo + rama de respuesta =====
+_CURRENT: ContextVar[Optional[dict]] = ContextVar("ecolite_request", default=None)
+
+
+class _RequestSpan:
+    __slots__ = ("endpoint", "t0", "state", "token")
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.state = {"branch": "unknown"}
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        self.token = _CURRENT.set(self.state)
+        return self.state
+
+    def __exit__(self, exc_type, *exc) -> bool:
+        _CURRENT.reset(self.token)
+        if exc_type is not None and self.state["branch"] == "unknown":
+            self.state["branch"] = "error"
+        if ENABLED:
+            REQUEST_SECONDS.observe(time.perf_counter() - self.t0, self.endpoint, self.state["branch"])
+        return False
+
+
+def request_span(endpoint: str) -> _RequestSpan:
+    """Abre el contexto de un turno; devuelve el dict de estado (incluye 'branch')."""
+    return _RequestSpan(endpoint)
+
+
+def set_branch(branch: str) -> None:
+    """Marca la rama de respuesta del turno en curso (faq, catalog, listing, ...)."""
+    state = _CURRENT.get()
+    if state is not None:
+        state["branch"] = branch
+
+
+def set_degraded(reason: str) -> None:
+    """Marca el turno en curso como servido en modo degradado (sin LLM) y por qué."""
+    state = _CURRENT.get()
+    if state is not None:
+        state["degraded"] = reason
+
+
+def current_branch() -> Optional[str]:
+    state = _CURRENT.get()
+    return state["branch"] if state is not None else None
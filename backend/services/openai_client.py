@@ -1,4 +1,64 @@
-import os, re
+import os, re, threading, time
+
+try:
+    from backend.services.metrics import span, gauge
+    from backend.services import llm_telemetry
+    from backend.services.circuit_breaker import CircuitBreaker, STATE_CODES
+    from backend.services.deadline import remaining as deadline_remaining
+    from backend.services import llm_admission
+except Exception:
+    from metrics import span, gauge
+    import llm_telemetry
+    from circuit_breaker import CircuitBreaker, STATE_CODES
+    from deadline import remaining as deadline_remaining
+    import llm_admission
+
+# Timeout por llamada (s). El presupuesto del request (deadline_scope) puede recortarlo.
+LLM_TIMEOUT_S = float(os.getenv("OPENAI_TIMEOUT_S", "6"))
+# Reintentos del SDK: por defecto ninguno, el deadline del turno manda.
+LLM_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "0"))
+# Con menos presupuesto que esto no vale la pena intentar la llamada.
+LLM_MIN_CALL_S = float(os.getenv("OPENAI_MIN_CALL_S", "0.3"))
+# Llamadas concurrentes idénticas (prompt, mensaje normalizado, modelo) comparten una sola upstream.
+LLM_COALESCE = os.getenv("LLM_COALESCE", "1").strip().lower() not in {"0", "false", "no", "off"}
+
+BREAKER = CircuitBreaker(
+    "llm",
+    failure_threshold=int(os.getenv("LLM_BREAKER_FAILURES", "5")),
+    reset_timeout=float(os.getenv("LLM_BREAKER_RESET_S", "30")),
+)
+gauge("ecolite_llm_breaker_state", "Estado del breaker del LLM (0=closed, 1=half_open, 2=open).",
+      lambda: STATE_CODES[BREAKER.state])
+
+_CLIENT = None
+_CLIENT_KEY = None
+_CLIENT_LOCK = threading.Lock()
+
+
+class _Flight:
+    """Llamada en curso a la que se suman las idénticas que llegan mientras tanto."""
+    __slots__ = ("done", "result")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+_FLIGHTS: dict = {}
+_FLIGHTS_LOCK = threading.Lock()
+gauge("ecolite_llm_flights", "Llamadas al LLM en curso con coalescencia (claves distintas).",
+      lambda: len(_FLIGHTS))
+
+
+def _client(api_key: str):
+    """Cliente OpenAI reutilizado (pool HTTP compartido entre llamadas)."""
+    global _CLIENT, _CLIENT_KEY
+    with _CLIENT_LOCK:
+        if _CLIENT is None or _CLIENT_KEY != api_key:
+            from openai import OpenAI
+            _CLIENT = OpenAI(api_key=api_key, timeout=LLM_TIMEOUT_S, max_retries=LLM_MAX_RETRIES)
+            _CLIENT_KEY = api_key
+        return _CLIENT
 
 def _brief(s: str, max_words: int = 25) -> str:
     s = re.sub(r"\s+", " ", (s or "").strip())
@@ -11,29 +71,126 @@ def _brief(s: str, max_words: int = 25) -> str:
         s += "."
     return s or "¿Te ayudo a encontrar iluminación del catálogo?"
 
-def chat(system_prompt: str, user_msg: str) -> str:
+def _is_timeout(exc: Exception) -> bool:
+    name = type(exc).__name__
+    return "Timeout" in name or isinstance(exc, TimeoutError)
+
+def _fallback() -> str:
+    return _brief("Puedo ayudarte con iluminación del catálogo; dime el espacio o especificaciones.")
+
+def is_fallback(text: str) -> bool:
+    """True si `text` es la respuesta de respaldo (no vino del modelo)."""
+    return text == _fallback()
+
+def chat(system_prompt: str, user_msg: str, site: str = "other") -> str:
     """
     IA ultra-concisa y a prueba de fallos:
     - Si hay OPENAI_API_KEY y librería, usa OpenAI.
     - Si no, fallback local (una sola frase).
+    `site` identifica el punto de llamada (intent, product_mode, asesorar, ...)
+    para la telemetría de latencia, tokens y costo.
+    El timeout de cada llamada es min(OPENAI_TIMEOUT_S, presupuesto restante del
+    request); con el breaker abierto o sin presupuesto se usa el fallback sin llamar.
+    Como mucho LLM_MAX_CONCURRENCY llamadas a la vez (llm_admission); si no se
+    consigue ranura dentro del presupuesto, la llamada se descarta con el fallback.
+    Con LLM_COALESCE, las llamadas idénticas simultáneas esperan el resultado de
+    la primera en vez de repetirla; si la primera terminó en fallback, cada una
+    hace su propia llamada (con las mismas guardas).
     """
     api_key = os.getenv("OPENAI_API_KEY")
-    if api_key:
-        try:
-            from openai import OpenAI
-            client = OpenAI(api_key=api_key)
-            sys = (system_prompt or "").strip() + "\n\nResponde en UNA sola frase (≤25 palabras)."
+    if not api_key:
+        return _fallback()
+    model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+    if not LLM_COALESCE:
+        return _guarded_chat(api_key, model, system_prompt, user_msg, site)
+
+    key = (system_prompt or "", " ".join((user_msg or "").lower().split()), model)
+    with _FLIGHTS_LOCK:
+        flight = _FLIGHTS.get(key)
+        leader = flight is None
+        if leader:
+            flight = _FLIGHTS[key] = _Flight()
+    if not leader:
+        left = deadline_remaining()
+        wait = LLM_TIMEOUT_S + llm_admission.QUEUE_TIMEOUT_S
+        if flight.done.wait(wait if left is None else min(wait, left)) and flight.result \
+                and not is_fallback(flight.result):
+            llm_telemetry.record_coalesced(site)
+            return flight.result
+        # El líder no consiguió respuesta del modelo (shed, breaker, deadline, error)
+        # o tardó demasiado: el respaldo no se comparte, esta llamada pasa por su cuenta
+        return _guarded_chat(api_key, model, system_prompt, user_msg, site)
+    try:
+        flight.result = _guarded_chat(api_key, model, system_prompt, user_msg, site)
+        return flight.result
+    finally:
+        with _FLIGHTS_LOCK:
+            _FLIGHTS.pop(key, None)
+        flight.done.set()
+
+def _guarded_chat(api_key: str, model: str, system_prompt: str, user_msg: str, site: str) -> str:
+    """Deadline, breaker y admisión alrededor de una llamada upstream."""
+    timeout = LLM_TIMEOUT_S
+    left = deadline_remaining()
+    if left is not None:
+        if left < LLM_MIN_CALL_S:
+            llm_telemetry.record_skipped(site, "deadline")
+            return _fallback()
+        timeout = min(timeout, left)
+    # Con el breaker abierto no se ocupa cola (blocked() no consume la prueba de half_open)
+    if BREAKER.blocked():
+        llm_telemetry.record_skipped(site, "breaker_open")
+        return _fallback()
+    if not llm_admission.acquire(timeout=left):
+        llm_telemetry.record_skipped(site, "shed")
+        return _fallback()
+    try:
+        left = deadline_remaining()   # la espera en cola consume presupuesto
+        if left is not None:
+            if left < LLM_MIN_CALL_S:
+                llm_telemetry.record_skipped(site, "deadline")
+                return _fallback()
+            timeout = min(timeout, left)
+        # allow() va justo antes de _call: en half_open marca la prueba en curso y
+        # _call siempre la cierra con record_success/record_failure
+        if not BREAKER.allow():
+            llm_telemetry.record_skipped(site, "breaker_open")
+            return _fallback()
+        return _call(api_key, model, system_prompt, user_msg, site, timeout)
+    finally:
+        llm_admission.release()
+
+def _call(api_key: str, model: str, system_prompt: str, user_msg: str, site: str, timeout: float) -> str:
+    t0 = time.perf_counter()
+    try:
+        client = _client(api_key)
+        sys = (system_prompt or "").strip() + "\n\nResponde en UNA sola frase (≤25 palabras)."
+        with span("llm_call"):
             resp = client.chat.completions.create(
-                model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
+                model=model,
                 temperature=0.2,
                 max_tokens=60,
                 messages=[
                     {"role": "system", "content": sys},
                     {"role": "user", "content": user_msg or ""},
                 ],
+                timeout=timeout,
             )
-            text = (resp.choices[0].message.content or "").strip()
-            return _brief(text)
-        except Exception:
-            pass
-    return _brief("Puedo ayudarte con iluminación del catálogo; dime el espacio o especificaciones.")
+        BREAKER.record_success()
+        usage = getattr(resp, "usage", None)
+        llm_telemetry.record(
+            site, getattr(resp, "model", None) or model, time.perf_counter() - t0,
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+        )
+        text = (resp.choices[0].message.content or "").strip()
+        return _brief(text)
+    except Exception as e:
+        err = f"{type(e).__name__}: {e}"
+        BREAKER.record_failure(err)
+        llm_telemetry.record(
+            site, model, time.perf_counter() - t0,
+            status="timeout" if _is_timeout(e) else "error",
+            error=err,
+        )
+    return _fallback()
@@ -1,5 +1,6 @@
 from __future__ import annotations
 import json
+import threading
 from pathlib import Path
 from typing import Dict, Tuple
 
@@ -12,6 +13,11 @@ _CANDIDATES = [
 
 PRODUCTOS: Dict[str, dict] = {}
 DATA_PATH: Path | None = None
+# Sube en cada carga desde disco; los índices derivados (trie de códigos) se reconstruyen al cambiar
+VERSION = 0
+# (catálogo, versión) publicados juntos: quien lee uno ve la versión del otro
+_CURRENT: Tuple[Dict[str, dict], int] = ({}, 0)
+_LOCK = threading.Lock()
 
 def _find_path() -> Path:
     for p in _CANDIDATES:
@@ -38,15 +44,32 @@ def _load_from_disk() -> Dict[str, dict]:
 
     raise ValueError("Formato de productos.json no soportado (usa dict o lista).")
 
+def _publish(productos: Dict[str, dict]) -> Dict[str, dict]:
+    """Sube la versión solo con el catálogo nuevo ya asignado (nunca versión nueva con datos viejos)."""
+    global PRODUCTOS, VERSION, _CURRENT
+    with _LOCK:
+        version = VERSION + 1
+        PRODUCTOS = productos
+        _CURRENT = (productos, version)
+        VERSION = version
+    return productos
+
 def load_products() -> Tuple[Dict[str, dict], Path]:
     """Carga y cachea el catálogo; retorna (productos, ruta_encontrada)."""
-    global PRODUCTOS, DATA_PATH
     if not PRODUCTOS:
-        PRODUCTOS = _load_from_disk()
+        _publish(_load_from_disk())
     return PRODUCTOS, DATA_PATH or _find_path()
 
 def reload_products() -> Tuple[Dict[str, dict], Path]:
     """Recarga desde disco (útil para debug)."""
-    global PRODUCTOS
-    PRODUCTOS = _load_from_disk()
-    return PRODUCTOS, DATA_PATH 
+    return _publish(_load_from_disk()), DATA_PATH 
+
+def load_catalog() -> Tuple[Dict[str, dict], int]:
+    """(productos, versión) del mismo snapshot; usar para índices cacheados por versión."""
+    if not PRODUCTOS:
+        load_products()
+    return _CURRENT
+
+def catalog_version() -> int:
+    """Versión del catálogo cargado (0 si aún no se cargó)."""
+    return VERSION
@@ -0,0 +1,183 @@
+"""
+Perfilado bajo demanda de un turno de chat.
+
+Dos modos:
+- "cprofile": determinista (cProfile). Guarda el volcado pstats y el top de
+  funciones por tiempo acumulado.
+- "sample": muestreo del hilo del request cada SAMPLE_INTERVAL segundos.
+  Produce pilas colapsadas ("a;b;c N"), el formato que consumen
+  flamegraph.pl, speedscope o inferno.
+
+Los perfiles quedan en memoria (últimos MAX_PROFILES) y se consultan en
+/__debug/profiles. Un request sin marca de perfilado no pasa por aquí.
+"""
+from __future__ import annotations
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+MODES = ("cprofile", "sample")
+MAX_PROFILES = int(os.getenv("ECOLITE_PROFILE_KEEP", "20"))
+SAMPLE_INTERVAL = float(os.getenv("ECOLITE_PROFILE_INTERVAL", "0.001"))
+TOP_N = 25
+
+# Archivos cuyo detalle interesa ver por separado en el top
+FOCUS_FILES = ("search_service.py", os.path.join("routers", "chat.py"))
+
+_LOCK = threading.Lock()
+_PROFILES: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+
+def _short(filename: str) -> str:
+    parts = filename.replace("\\", "/").split("/")
+    return "/".join(parts[-2:]) if len(parts) >= 2 else filename
+
+
+def _store(profile: Dict[str, Any]) -> str:
+    pid = uuid.uuid4().hex[:12]
+    profile["id"] = pid
+    with _LOCK:
+        _PROFILES[pid] = profile
+        while len(_PROFILES) > MAX_PROFILES:
+            _PROFILES.popitem(last=False)
+    return pid
+
+
+def get_profile(pid: str) -> Optional[Dict[str, Any]]:
+    with _LOCK:
+        return _PROFILES.get(pid)
+
+
+def list_profiles() -> List[Dict[str, Any]]:
+    with _LOCK:
+        items = list(_PROFILES.values())
+    return [{k: p[k] for k in ("id", "mode", "label", "created_at", "wall_ms")} for p in reversed(items)]
+
+
+# ---------- cProfile ----------
+def _top_from_pstats(stats: pstats.Stats, focus: bool) -> List[Dict[str, Any]]:
+    rows = []
+    for (filename, line, func), (cc, nc, tt, ct, _callers) in stats.stats.items():
+        if focus and not any(f in filename for f in FOCUS_FILES):
+            continue
+        rows.append({
+            "function": f"{_short(filename)}:{line}({func})",
+            "calls": nc,
+            "self_ms": round(tt * 1000, 3),
+            "cumulative_ms": round(ct * 1000, 3),
+        })
+    rows.sort(key=lambda r: -r["cumulative_ms"])
+    return rows[:TOP_N]
+
+
+def _folded_from_pstats(stats: pstats.Stats) -> str:
+    """
+    Aproximación de pilas colapsadas a partir del grafo caller→callee
+    (cProfile no guarda pilas completas): una línea "caller;callee µs" por arco.
+    """
+    lines = []
+    for (filename, line, func), (_cc, _nc, _tt, _ct, callers) in stats.stats.items():
+        callee = f"{_short(filename)}:{func}"
+        for (cf, cl, cfn), vals in callers.items():
+            ct = vals[3]
+            us = int(ct * 1_000_000)
+            if us > 0:
+                lines.append(f"{_short(cf)}:{cfn};{callee} {us}")
+    return "\n".join(sorted(lines)) + "\n"
+
+
+def _run_cprofile(fn: Callable[[], Any]) -> Tuple[Any, Dict[str, Any]]:
+    prof = cProfile.Profile()
+    prof.enable()
+    try:
+        result = fn()
+    finally:
+        prof.disable()
+    stats = pstats.Stats(prof, stream=io.StringIO())
+    prof.create_stats()
+    return result, {
+        "top": _top_from_pstats(stats, focus=False),
+        "top_focus": _top_from_pstats(stats, focus=True),
+        "folded": _folded_from_pstats(stats),
+        "pstats": marshal.dumps(prof.stats),
+    }
+
+
+# ---------- muestreo ----------
+def _frame_stack(frame) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{_short(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def _run_sampling(fn: Callable[[], Any]) -> Tuple[Any, Dict[str, Any]]:
+    target = threading.get_ident()
+    stacks: Counter = Counter()
+    done = threading.Event()
+
+    def sampler() -> None:
+        while not done.is_set():
+            frame = sys._current_frames().get(target)
+            if frame is not None:
+                stacks[_frame_stack(frame)] += 1
+            done.wait(SAMPLE_INTERVAL)
+
+    th = threading.Thread(target=sampler, name="ecolite-profiler", daemon=True)
+    th.start()
+    try:
+        result = fn()
+    finally:
+        done.set()
+        th.join()
+
+    # Tiempo propio (hoja) e inclusivo por función, en número de muestras
+    self_c: Counter = Counter()
+    incl_c: Counter = Counter()
+    for stack, n in stacks.items():
+        frames = stack.split(";")
+        self_c[frames[-1]] += n
+        for f in set(frames):
+            incl_c[f] += n
+    total = max(1, sum(stacks.values()))
+
+    def _rows(focus: bool) -> List[Dict[str, Any]]:
+        rows = [
+            {"function": f, "self_samples": self_c.get(f, 0), "samples": n,
+             "inclusive_pct": round(100.0 * n / total, 1)}
+            for f, n in incl_c.items()
+            if not focus or any(ff.replace(os.sep, "/") in f for ff in FOCUS_FILES)
+        ]
+        rows.sort(key=lambda r: (-r["samples"], -r["self_samples"]))
+        return rows[:TOP_N]
+
+    folded = "\n".join(f"{s} {n}" for s, n in sorted(stacks.items())) + "\n"
+    return result, {"top": _rows(False), "top_focus": _rows(True), "folded": folded,
+                    "samples": total, "interval_s": SAMPLE_INTERVAL}
+
+
+def profile_call(fn: Callable[[], Any], mode: str = "cprofile", label: str = "") -> Tuple[Any, str]:
+    """Ejecuta fn() bajo el perfilador pedido y devuelve (resultado, id_del_perfil)."""
+    mode = (mode or "").strip().lower()
+    if mode not in MODES:
+        mode = "cprofile"
+    t0 = time.perf_counter()
+    runner = _run_sampling if mode == "sample" else _run_cprofile
+    result, data = runner(fn)
+    data.update({
+        "mode": mode,
+        "label": label[:200],
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "wall_ms": round((time.perf_counter() - t0) * 1000, 3),
+    })
+    return result, _store(data)
@@ -0,0 +1,35 @@
+"""
+Registro de motores de búsqueda intercambiables.
+
+Un motor es cualquier callable (products, query, limit) -> List[producto]
+con la misma semántica que search_service.search_candidates. El registro
+permite medir (bench/search_bench.py) o comparar motores sin tocar chat.py.
+"""
+from __future__ import annotations
+from typing import Callable, Dict, List
+
+try:
+    from backend.services.search_service import search_candidates
+except Exception:
+    from search_service import search_candidates
+
+SearchEngine = Callable[[List[Dict], str, int], List[Dict]]
+
+DEFAULT_ENGINE = "baseline"
+
+_ENGINES: Dict[str, SearchEngine] = {DEFAULT_ENGINE: search_candidates}
+
+
+def register_engine(name: str, fn: SearchEngine) -> None:
+    _ENGINES[name] = fn
+
+
+def get_engine(name: str = DEFAULT_ENGINE) -> SearchEngine:
+    try:
+        return _ENGINES[name]
+    except KeyError:
+        raise KeyError(f"motor de búsqueda desconocido: {name} (disponibles: {', '.join(_ENGINES)})")
+
+
+def available_engines() -> List[str]:
+    return list(_ENGINES)
@@ -1,66 +1,17 @@
 import re
-import unicodedata
 import random
-from typing import List, Dict, Tuple, Set
+from typing import Callable, Dict, Iterable, Iterator, List, Set, Tuple
 
-# -------- Utilidades --------
-def _norm(s: str) -> str:
-    s = (s or "").lower()
-    s = unicodedata.normalize("NFD", s)
-    s = "".join(ch for ch in s if unicodedata.category(ch) != "Mn")
-    s = re.sub(r"[^a-z0-9%.\s-]", " ", s)
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
-
-def _tok(s: str) -> List[str]:
-    """
-    Tokeniza y añade la forma singular de cada token
-    para que 'nichos', 'postes', 'paneles', etc. coincidan con el índice.
-    No hace expansiones adicionales.
-    """
-    base = [t for t in _norm(s).split() if t]
-    out: List[str] = []
-    seen = set()
-    for t in base:
-        if t not in seen:
-            out.append(t); seen.add(t)
-        sg = singularize_es(t)
-        if sg and sg != t and sg not in seen:
-            out.append(sg); seen.add(sg)
-    return out
-
-
-def singularize_es(token: str) -> str:
-    t = (token or "").strip().lower()
-
-    EXC = {"leds": "led"}
-    if t in EXC:
-        return EXC[t]
-
-    if len(t) <= 4:
-        return t
+try:
+    from backend.services.metrics import span, timed
+    from backend.services.text_norm import norm_search, search_tokens, singularize_es
+except Exception:
+    from metrics import span, timed
+    from text_norm import norm_search, search_tokens, singularize_es
 
-    vowels = set("aeiou")
-
-    # luces -> luz
-    if t.endswith("ces") and len(t) > 3:
-        return t[:-3] + "z"
-
-    # NUEVO: adjetivos/nombres en -ble/-ible: amables->amable, sumergibles->sumergible
-    if t.endswith("ables") or t.endswith("ibles") or t.endswith("bles"):
-        return t[:-1]
-
-    # consonante + 'es' -> quitar 'es' cuando termina en l/r/n/d/z (papeles->papel, reflectores->reflector)
-    if t.endswith("es") and len(t) > 3:
-        stem = t[:-2]
-        if stem and stem[-1] in {"l", "r", "n", "d", "z"}:
-            return stem
-
-    # vocal + 's' -> quitar 's' (postes->poste, nichos->nicho)
-    if t.endswith("s") and len(t) > 3 and t[-2] in vowels:
-        return t[:-1]
-
-    return t
+# -------- Utilidades --------
+_norm = norm_search
+_tok = search_tokens
 
 
 def _is_number_like(tok: str) -> bool:
@@ -118,6 +69,7 @@ _DOCS: int = 0              # <--- NUEVO: cantidad de documentos
 _BUILT = False
 
 
+@timed("search_index_build")
 def _ensure_index(products: List[Dict]) -> None:
     """Índice y vocabulario derivados 100% del catálogo (sin sinónimos fijos)."""
     global _VOCAB, _INDEX, _BUILT
@@ -224,12 +176,13 @@ def _best_token_sim(q: str, toks: List[str]) -> float:
             best = s
     return best
 
+W_NAME, W_TAGS, W_CAT, W_DESC = 1.0, 0.85, 0.65, 0.35
+
 def _score(row: Dict, q_terms: List[str]) -> float:
     """Puntaje por campo + bonus por substring; sin reglas fijas."""
     if not q_terms:
         return 0.0
 
-    W_NAME, W_TAGS, W_CAT, W_DESC = 1.0, 0.85, 0.65, 0.35
     score = 0.0
     matched = 0
 
@@ -263,11 +216,17 @@ def search_candidates(products: List[Dict], query: str, limit: int = 12) -> List
     """
     _ensure_index(products)
 
-    raw_terms = _expand_query(query)
+    with span("search_expand_query"):
+        raw_terms = _expand_query(query)
     if not raw_terms:
         return []
+    return _rank(raw_terms, limit, lambda _i, row, terms: _score(row, terms))
+
 
-        # Extraer watt_X de los tokens
+def _rank(raw_terms: List[str], limit: int,
+          score_row: Callable[[int, Dict, List[str]], float]) -> List[Dict]:
+    """Filtros y orden de search_candidates; score_row(i, fila, términos) da el puntaje de la fila i."""
+    # Extraer watt_X de los tokens
     watt_value = None
     for t in raw_terms:
         if t.startswith("watt_"):
@@ -281,8 +240,8 @@ def search_candidates(products: List[Dict], query: str, limit: int = 12) -> List
 
     if not q_terms:
         scored: List[Tuple[float, Dict]] = []
-        for row in _INDEX:
-            s = _score(row, raw_terms)
+        for i, row in enumerate(_INDEX):
+            s = score_row(i, row, raw_terms)
             if s > 0:
                 scored.append((s, row["ref"]))
 
@@ -326,17 +285,82 @@ def search_candidates(products: List[Dict], query: str, limit: int = 12) -> List
 
 
     scored: List[Tuple[float, Dict]] = []
-    for row in _INDEX:
-        blob = row["blob"]
+    with span("search_scoring"):
+        for i, row in enumerate(_INDEX):
+            blob = row["blob"]
 
-        if REQUIRED and not all(t in blob for t in REQUIRED):
-            continue
+            if REQUIRED and not all(t in blob for t in REQUIRED):
+                continue
 
-        s = _score(row, q_terms)
-        if s > 0:
-            scored.append((s, row["ref"]))
+            s = score_row(i, row, q_terms)
+            if s > 0:
+                scored.append((s, row["ref"]))
 
     scored.sort(key=lambda x: (-x[0], _norm(x[1].get("name",""))))
     return [p for _, p in scored[:limit * 5]]
 
 
+# -------- Búsqueda por lotes --------
+def _term_scores(t: str) -> Tuple[List[float], bytes, bytes]:
+    """
+    Aporte del término t a _score en cada fila del índice, con las mismas
+    operaciones y en el mismo orden: (aporte, coincide ≥0.72, bonus numérico).
+    """
+    number_like = _is_number_like(t)
+    contrib: List[float] = []
+    matched = bytearray(len(_INDEX))
+    bonus = bytearray(len(_INDEX))
+    for i, row in enumerate(_INDEX):
+        s_name = _best_token_sim(t, row["name_tok"])
+        s_tags = _best_token_sim(t, row["tags_tok"])
+        s_cat  = _best_token_sim(t, row["cat_tok"])
+        s_desc = _best_token_sim(t, row["desc_tok"])
+        substr_bonus = 0.15 if t in row["blob"] else 0.0
+        if max(s_name, s_tags, s_cat, s_desc) >= 0.72:
+            matched[i] = 1
+        contrib.append((s_name * W_NAME) + (s_tags * W_TAGS) + (s_cat * W_CAT) + (s_desc * W_DESC) + substr_bonus)
+        if number_like and t in row["blob"]:
+            bonus[i] = 1
+    return contrib, bytes(matched), bytes(bonus)
+
+
+def search_batch(products: List[Dict], queries: Iterable[str],
+                 limit: int = 12) -> Iterator[Tuple[int, List[Dict]]]:
+    """
+    search_candidates para muchas consultas (planillas de cotización):
+    devuelve (posición, candidatos) en el orden de entrada, idénticos a llamar
+    search_candidates(products, q, limit) por cada una.
+
+    Cada consulta se normaliza y expande una vez; las consultas con los mismos
+    términos comparten resultado y cada término distinto recorre el índice una
+    sola vez (su aporte por fila se reutiliza en todas las consultas que lo
+    contienen). Los aportes se calculan en el proceso a medida que aparecen
+    los términos, así los resultados se emiten sin esperar al lote completo.
+    """
+    _ensure_index(products)
+    with span("search_expand_query"):
+        plans = [tuple(_expand_query(q)) for q in queries]
+
+    table: Dict[str, Tuple[List[float], bytes, bytes]] = {}
+
+    def score_row(i: int, _row: Dict, terms: List[str]) -> float:
+        score = 0.0
+        matched = 0
+        for t in terms:
+            contrib, hit, bonus = table[t]
+            if hit[i]:
+                matched += 1
+            score += contrib[i]
+            if bonus[i]:
+                score += 0.25
+        score += matched * 0.2
+        return score
+
+    done: Dict[Tuple[str, ...], List[Dict]] = {}
+    for n, plan in enumerate(plans):
+        if plan not in done:
+            for t in plan:
+                if t not in table:
+                    table[t] = _term_scores(t)
+            done[plan] = _rank(list(plan), limit, score_row) if plan else []
+        yield n, list(done[plan])
@@ -0,0 +1,197 @@
+from __future__ import annotations
+import argparse
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from backend.routers.db import (
+    DB_PATH,
+    init_db,
+    guardar_resumen,
+    obtener_resumen,
+    ultimo_mensaje_id,
+)
+
+try:
+    from backend.services.openai_client import chat as llm_chat, is_fallback
+except Exception:
+    llm_chat = None
+    is_fallback = lambda text: False
+
+SUMMARY_PENDING = "Generando resumen de la conversación… recarga en unos segundos."
+SUMMARY_NO_LLM = "Resumen no disponible (cliente LLM no configurado en el servidor)."
+SUMMARY_EMPTY = "No se encontraron mensajes del cliente para resumir."
+SUMMARY_FAILED = "No se pudo generar el resumen automáticamente."
+# Textos que no son un resumen: no se guardan para que se reintente en la próxima visita
+_NOT_A_SUMMARY = {SUMMARY_NO_LLM, SUMMARY_EMPTY, SUMMARY_FAILED}
+
+# Sesiones con una regeneración en curso (evita llamadas duplicadas al LLM
+# cuando varias personas abren la misma sesión a la vez).
+_IN_FLIGHT: set[str] = set()
+_LOCK = threading.Lock()
+
+
+def build_session_summary(mensajes: list[tuple[str, str, str]]) -> str:
+    """
+    Genera un resumen breve y natural del interés del cliente usando el LLM.
+    mensajes: lista de tuplas (mensaje_usuario, respuesta_bot, timestamp)
+    """
+    # Si por algún motivo no tenemos LLM disponible:
+    if llm_chat is None:
+        return SUMMARY_NO_LLM
+
+    # Tomamos los turnos de conversación (usuario + bot)
+    turns = []
+    for user, bot, ts in mensajes:
+        if user:
+            turns.append(f"Usuario: {user}")
+        if bot:
+            turns.append(f"Asistente: {bot}")
+
+    if not turns:
+        return SUMMARY_EMPTY
+
+    # Limitamos tamaño: si hay demasiados mensajes, nos quedamos con los primeros y los últimos
+    joined = "\n".join(turns)
+    if len(joined) > 6000:
+        head = "\n".join(turns[:30])
+        tail = "\n".join(turns[-30:])
+        joined = head + "\n...\n" + tail
+
+    system_prompt = (
+        "Eres un analista de conversaciones para Ecolite, una empresa de iluminación LED en Colombia.\n"
+        "Te daré la transcripción de un chat entre un cliente y un asistente.\n\n"
+        "Tu tarea es escribir un RESUMEN MUY BREVE, en español neutro, en 1 o 2 frases, que responda:\n"
+        "- ¿Qué está buscando el cliente? (tipo de proyecto de iluminación y espacios: bodega, oficina, casa, etc.)\n"
+        "- ¿Qué tipo de productos o especificaciones le interesan? (paneles, reflectores, highbay, tiras LED, potencias, temperatura de color, etc.)\n\n"
+        "No devuelvas bullets ni títulos. No repitas los mensajes literalmente. No menciones al asistente.\n"
+        "Ejemplos de estilo:\n"
+        "- \"El usuario quiere iluminar una bodega y un local comercial con luminarias tipo highbay y paneles LED, y pidió orientación sobre potencias y cantidad de equipos.\"\n"
+        "- \"La conversación se centró en iluminación para oficina y áreas residenciales, con interés en paneles 60x60 y downlights empotrables, incluyendo precios y cotización.\"\n"
+    )
+
+    # Usamos el mismo helper llm_chat(sys_prompt, user_text) que en chat.py
+    try:
+        summary = llm_chat(system_prompt, joined, site="history_summary") or ""
+    except Exception:
+        return SUMMARY_FAILED
+
+    summary = (summary or "").strip()
+    if not summary or is_fallback(summary):
+        return SUMMARY_FAILED
+
+    return summary
+
+
+def _load_session(session_id: str) -> Tuple[List[tuple], Optional[int]]:
+    """Mensajes (usuario, bot, timestamp) de la sesión y el id del último turno."""
+    init_db()
+    con = sqlite3.connect(DB_PATH)
+    try:
+        rows = con.execute(
+            """
+            SELECT id, mensaje_usuario, respuesta_bot, timestamp
+            FROM conversaciones
+            WHERE session_id = ?
+            ORDER BY id ASC
+            """,
+            (session_id,),
+        ).fetchall()
+    finally:
+        con.close()
+    if not rows:
+        return [], None
+    return [(u, b, ts) for _id, u, b, ts in rows], rows[-1][0]
+
+
+def get_cached_summary(session_id: str, last_msg_id: Optional[int] = None) -> Tuple[Optional[str], bool]:
+    """
+    Devuelve (resumen_cacheado, necesita_regenerar) sin llamar al LLM.
+    last_msg_id puede pasarse si el llamador ya lo conoce (evita otra consulta).
+    """
+    if last_msg_id is None:
+        last_msg_id = ultimo_mensaje_id(session_id)
+    if last_msg_id is None:
+        return None, False
+    cached = obtener_resumen(session_id)
+    if cached is None:
+        return None, True
+    resumen, cached_id = cached
+    return resumen, (cached_id or 0) < last_msg_id
+
+
+def refresh_summary(session_id: str) -> Optional[str]:
+    """
+    Regenera y persiste el resumen si hay turnos nuevos desde el último resumen.
+    Pensado para ejecutarse fuera del request (BackgroundTasks o backfill).
+    Si el LLM no dio un resumen (sin cliente, error, fallback) no se guarda nada
+    y devuelve None: la sesión sigue pendiente y se reintenta más adelante.
+    """
+    with _LOCK:
+        if session_id in _IN_FLIGHT:
+            return None
+        _IN_FLIGHT.add(session_id)
+    try:
+        mensajes, last_id = _load_session(session_id)
+        if last_id is None:
+            return None
+        cached = obtener_resumen(session_id)
+        if cached is not None and (cached[1] or 0) >= last_id:
+            return cached[0]
+        resumen = build_session_summary(mensajes)
+        if resumen in _NOT_A_SUMMARY:
+            return None
+        guardar_resumen(session_id, last_id, resumen)
+        return resumen
+    finally:
+        with _LOCK:
+            _IN_FLIGHT.discard(session_id)
+
+
+def stale_sessions(limit: Optional[int] = None) -> List[str]:
+    """Sesiones sin resumen o con mensajes posteriores al último resumen."""
+    init_db()
+    con = sqlite3.connect(DB_PATH)
+    try:
+        sql = """
+            SELECT c.session_id
+            FROM conversaciones c
+            LEFT JOIN resumenes_sesion r ON r.session_id = c.session_id
+            GROUP BY c.session_id
+            HAVING MAX(c.id) > COALESCE(MAX(r.last_msg_id), 0)
+            ORDER BY MAX(c.id) DESC
+        """
+        params: tuple = ()
+        if limit:
+            sql += " LIMIT ?"
+            params = (int(limit),)
+        rows = con.execute(sql, params).fetchall()
+    finally:
+        con.close()
+    return [r[0] for r in rows if r[0] is not None]
+
+
+def backfill_summaries(max_workers: int = 4, limit: Optional[int] = None) -> int:
+    """
+    Genera los resúmenes pendientes con concurrencia acotada (max_workers
+    llamadas simultáneas al LLM). Devuelve cuántas sesiones se procesaron.
+    """
+    pending = stale_sessions(limit)
+    if not pending:
+        return 0
+    done = 0
+    with ThreadPoolExecutor(max_workers=max(1, int(max_workers))) as pool:
+        for result in pool.map(refresh_summary, pending):
+            if result is not None:
+                done += 1
+    return done
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill de resúmenes de sesión para /history.")
+    parser.add_argument("--workers", type=int, default=4, help="llamadas concurrentes al LLM")
+    parser.add_argument("--limit", type=int, default=None, help="máximo de sesiones a procesar")
+    args = parser.parse_args()
+    n = backfill_summaries(max_workers=args.workers, limit=args.limit)
+    print(f"[summaries] {n} sesiones resumidas")
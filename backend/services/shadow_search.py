@@ -0,0 +1,184 @@
+"""
+Ejecución en sombra de un motor de búsqueda candidato.
+
+_filtered_page sigue respondiendo con search_candidates; si
+ECOLITE_SHADOW_ENGINE está configurado, la misma consulta se corre además en
+el motor candidato en un hilo aparte, fuera del camino del request, y se
+registran el solapamiento de resultados y la diferencia de latencia.
+
+ECOLITE_SHADOW_ENGINE acepta un nombre del registro (search_engines) o
+"paquete.modulo:funcion". Sin configurar, submit() retorna de inmediato.
+"""
+from __future__ import annotations
+import importlib
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Deque, Dict, List, Optional
+
+try:
+    from backend.services import search_engines
+    from backend.services.metrics import counter, histogram
+    from backend.services.search_engines import SearchEngine
+except Exception:
+    import search_engines
+    from metrics import counter, histogram
+    from search_engines import SearchEngine
+
+ENGINE_SPEC = os.getenv("ECOLITE_SHADOW_ENGINE", "").strip()
+SAMPLE_RATE = float(os.getenv("ECOLITE_SHADOW_SAMPLE", "1.0"))
+MAX_PENDING = int(os.getenv("ECOLITE_SHADOW_MAX_PENDING", "8"))
+WORKERS = int(os.getenv("ECOLITE_SHADOW_WORKERS", "1"))
+TOP_K = 5
+KEEP_DIFFS = 50
+KEEP_DELTAS = 1000
+
+SHADOW_SECONDS = histogram("ecolite_shadow_search_seconds", "Latencia del motor en sombra.", ("engine",))
+SHADOW_RUNS = counter("ecolite_shadow_runs_total", "Ejecuciones en sombra por resultado.", ("engine", "status"))
+SHADOW_OVERLAP = histogram(
+    "ecolite_shadow_overlap_ratio", "Solapamiento top-k entre motor actual y motor en sombra.", ("engine",),
+    buckets=(0.0, 0.2, 0.4, 0.6, 0.8, 0.99, 1.0),
+)
+
+_LOCK = threading.Lock()
+_PENDING = threading.BoundedSemaphore(max(1, MAX_PENDING))
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_ENGINE: Optional[SearchEngine] = None
+_STATS: Dict[str, float] = {}
+_DELTAS: Deque[float] = deque(maxlen=KEEP_DELTAS)
+_DIFFS: Deque[Dict[str, Any]] = deque(maxlen=KEEP_DIFFS)
+
+
+def _resolve(spec: str) -> SearchEngine:
+    if ":" in spec:
+        mod, _, attr = spec.partition(":")
+        return getattr(importlib.import_module(mod), attr)
+    return search_engines.get_engine(spec)
+
+
+def configure(spec: str) -> None:
+    """Activa (o con "" desactiva) el motor en sombra; también lo usa /__debug/shadow."""
+    global ENGINE_SPEC, ENABLED, _ENGINE, _EXECUTOR
+    engine = _resolve(spec) if spec else None
+    with _LOCK:
+        ENGINE_SPEC = spec
+        _ENGINE = engine
+        ENABLED = engine is not None
+        if ENABLED and _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(max_workers=max(1, WORKERS), thread_name_prefix="ecolite-shadow")
+        _STATS.clear()
+        _DELTAS.clear()
+        _DIFFS.clear()
+
+
+ENABLED = False
+if ENGINE_SPEC:
+    try:
+        configure(ENGINE_SPEC)
+    except Exception as e:
+        print(f"[shadow_search] motor '{ENGINE_SPEC}' no disponible: {e}")
+
+
+def _key(p: Dict[str, Any]) -> str:
+    return str(p.get("code") or p.get("sku") or p.get("id") or p.get("name") or id(p))
+
+
+def overlap(primary: List[Dict[str, Any]], shadow: List[Dict[str, Any]], k: int) -> float:
+    """|top-k ∩ top-k| / tamaño del top-k del motor actual (1.0 si ambos vacíos)."""
+    a = [_key(p) for p in primary[:k]]
+    b = {_key(p) for p in shadow[:k]}
+    if not a:
+        return 1.0 if not b else 0.0
+    return sum(1 for x in a if x in b) / len(a)
+
+
+def _bump(**values: float) -> None:
+    with _LOCK:
+        for k, v in values.items():
+            _STATS[k] = _STATS.get(k, 0.0) + v
+
+
+def _run(engine: SearchEngine, spec: str, products: List[Dict[str, Any]], query: str, limit: int,
+         primary: List[Dict[str, Any]], primary_s: float) -> None:
+    try:
+        t0 = time.perf_counter()
+        try:
+            shadow = engine(products, query, limit)
+        except Exception as e:
+            SHADOW_RUNS.inc(1, spec, "error")
+            _bump(errors=1)
+            with _LOCK:
+                _DIFFS.append({"query": query, "error": f"{type(e).__name__}: {e}"[:200]})
+            return
+        shadow_s = time.perf_counter() - t0
+        ov_k = overlap(primary, shadow, TOP_K)
+        ov_all = overlap(primary, shadow, limit)
+        SHADOW_SECONDS.observe(shadow_s, spec)
+        SHADOW_OVERLAP.observe(ov_k, spec)
+        SHADOW_RUNS.inc(1, spec, "ok")
+        _bump(runs=1, overlap_k=ov_k, overlap_all=ov_all, primary_s=primary_s, shadow_s=shadow_s,
+              exact_top=1.0 if ov_k == 1.0 else 0.0)
+        with _LOCK:
+            _DELTAS.append(shadow_s - primary_s)
+            if ov_k < 1.0:
+                _DIFFS.append({
+                    "query": query,
+                    "overlap_top_k": round(ov_k, 3),
+                    "primary": [_key(p) for p in primary[:TOP_K]],
+                    "shadow": [_key(p) for p in shadow[:TOP_K]],
+                })
+    finally:
+        _PENDING.release()
+
+
+def submit(products: List[Dict[str, Any]], query: str, limit: int,
+           primary: List[Dict[str, Any]], primary_s: float) -> bool:
+    """
+    Encola la consulta en el motor en sombra sin bloquear. Se descarta (y se
+    cuenta) si hay demasiadas pendientes; devuelve si se encoló.
+    """
+    engine, spec, executor = _ENGINE, ENGINE_SPEC, _EXECUTOR
+    if engine is None or executor is None:
+        return False
+    if SAMPLE_RATE < 1.0 and random.random() >= SAMPLE_RATE:
+        return False
+    if not _PENDING.acquire(blocking=False):
+        SHADOW_RUNS.inc(1, spec, "dropped")
+        _bump(dropped=1)
+        return False
+    try:
+        executor.submit(_run, engine, spec, products, query, limit, list(primary), primary_s)
+    except RuntimeError:
+        _PENDING.release()
+        return False
+    return True
+
+
+def snapshot() -> Dict[str, Any]:
+    with _LOCK:
+        s = dict(_STATS)
+        deltas = sorted(_DELTAS)
+        diffs = list(_DIFFS)
+    runs = s.get("runs", 0.0)
+
+    def pct(p: float) -> float:
+        return round(deltas[min(len(deltas) - 1, int(len(deltas) * p))] * 1000, 3) if deltas else 0.0
+
+    return {
+        "engine": ENGINE_SPEC or None,
+        "enabled": ENABLED,
+        "sample_rate": SAMPLE_RATE,
+        "runs": int(runs),
+        "errors": int(s.get("errors", 0)),
+        "dropped": int(s.get("dropped", 0)),
+        "overlap_top_k": round(s.get("overlap_k", 0.0) / runs, 4) if runs else None,
+        "overlap_all": round(s.get("overlap_all", 0.0) / runs, 4) if runs else None,
+        "identical_top_k_rate": round(s.get("exact_top", 0.0) / runs, 4) if runs else None,
+        "primary_avg_ms": round(1000 * s.get("primary_s", 0.0) / runs, 3) if runs else None,
+        "shadow_avg_ms": round(1000 * s.get("shadow_s", 0.0) / runs, 3) if runs else None,
+        "delta_ms": {"p50": pct(0.50), "p95": pct(0.95), "p99": pct(0.99)},
+        "recent_diffs": diffs[-20:],
+    }
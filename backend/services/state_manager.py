@@ -1,19 +1,15 @@
 from __future__ import annotations
-import re
 from typing import Literal
 
+try:
+    from backend.services.text_norm import norm_ascii as _norm
+except Exception:
+    from text_norm import norm_ascii as _norm
+
 Intent = Literal["search", "more", "faq"]
 
 _SESSIONS: dict[str, dict] = {}
 
-def _norm(s: str) -> str:
-    import unicodedata
-    s = unicodedata.normalize("NFKD", s).encode("ascii","ignore").decode("ascii")
-    s = s.lower()
-    s = re.sub(r"[^a-z0-9]+"," ", s)
-    s = re.sub(r"\s+"," ", s).strip()
-    return s
-
 def get_state(session_id: str) -> dict:
     if session_id not in _SESSIONS:
         _SESSIONS[session_id] = {
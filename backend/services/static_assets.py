@@ -0,0 +1,51 @@
+from __future__ import annotations
+import hashlib
+from functools import lru_cache
+from pathlib import Path
+from urllib.parse import parse_qs
+
+from fastapi.staticfiles import StaticFiles
+
+FRONTEND_DIR = Path(__file__).resolve().parent.parent.parent / "frontend"
+STATIC_PREFIX = "/static"
+
+# Un año: los recursos versionados (?v=<hash>) nunca cambian de contenido.
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+
+
+@lru_cache(maxsize=None)
+def asset_hash(name: str) -> str:
+    """Hash corto del contenido del archivo (se calcula una vez por proceso)."""
+    try:
+        data = (FRONTEND_DIR / name).read_bytes()
+    except OSError:
+        return ""
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def asset_url(name: str) -> str:
+    """URL de /static con el hash de contenido como versión: /static/x.css?v=ab12..."""
+    digest = asset_hash(name)
+    url = f"{STATIC_PREFIX}/{name}"
+    return f"{url}?v={digest}" if digest else url
+
+
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles que marca como inmutables las respuestas pedidas con
+    ?v=<hash> cuando el hash es el del contenido actual del archivo.
+    Sin versión, o con otra (URL vieja, ?nav=1, ?v=x), se mantiene el
+    comportamiento por defecto (validación por ETag).
+    """
+
+    async def get_response(self, path: str, scope):
+        response = await super().get_response(path, scope)
+        if response.status_code == 200 and _is_current_version(path, scope.get("query_string") or b""):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE
+        return response
+
+
+def _is_current_version(path: str, query_string: bytes) -> bool:
+    versions = parse_qs(query_string.decode("latin-1")).get("v")
+    digest = asset_hash(path.replace("\\", "/"))
+    return bool(digest) and versions == [digest]
@@ -0,0 +1,165 @@
+"""
+Normalización de texto compartida (chat, búsqueda, estado, guarda).
+
+Había cuatro _norm con unicodedata.normalize + varios re.sub cada uno. Aquí
+cada variante es una tabla para str.translate: la entrada de cada carácter se
+calcula una vez aplicando el pipeline original a ese carácter (descomponer,
+quitar acentos, minúsculas, reemplazar lo no permitido por espacio) y el texto
+completo se resuelve con un translate + split/join. Las descomposiciones NFD/
+NFKD son por carácter, así que el resultado es idéntico al de los _norm
+originales.
+
+Variantes (mismas reglas que antes en cada módulo):
+  norm_ascii   chat, state_manager, intent_model: NFKD→ascii, [a-z0-9] y espacios
+  norm_search  search_service: NFD sin marcas Mn, conserva % . -
+  norm_guard   conversation_guard: NFKD sin combinantes, conserva - . _ # /
+
+Las funciones de texto completo, tokens() y singularize_es() están
+memoizadas con LRU acotado (ECOLITE_NORM_CACHE): los nombres del catálogo y
+las consultas se repiten en cada turno.
+"""
+from __future__ import annotations
+import os
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Tuple
+
+CACHE_SIZE = int(os.getenv("ECOLITE_NORM_CACHE", "8192"))
+# Caracteres con entrada precalculada en la tabla; el resto se calcula al vuelo
+_TABLE_SPAN = 0x2000
+
+
+class _CharTable(dict):
+    """Tabla de translate: ord → texto ya normalizado de ese carácter."""
+
+    def __init__(self, char_fn: Callable[[str], str]):
+        super().__init__()
+        self._char_fn = char_fn
+        for cp in range(_TABLE_SPAN):
+            self[cp] = char_fn(chr(cp))
+
+    def __missing__(self, cp: int) -> str:
+        return self._char_fn(chr(cp))
+
+
+def _ascii_char(c: str) -> str:
+    s = unicodedata.normalize("NFKD", c).encode("ascii", "ignore").decode("ascii").lower()
+    return re.sub(r"[^a-z0-9]", " ", s)
+
+
+def _search_char(c: str) -> str:
+    s = unicodedata.normalize("NFD", c.lower())
+    s = "".join(ch for ch in s if unicodedata.category(ch) != "Mn")
+    return re.sub(r"[^a-z0-9%.-]", " ", s)
+
+
+def _guard_char(c: str) -> str:
+    s = unicodedata.normalize("NFKD", c)
+    s = "".join(ch for ch in s if not unicodedata.combining(ch)).lower()
+    return re.sub(r"[^a-z0-9\-._#/]", " ", s)
+
+
+_ASCII = _CharTable(_ascii_char)
+_SEARCH = _CharTable(_search_char)
+_GUARD = _CharTable(_guard_char)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def norm_ascii(s: str) -> str:
+    return " ".join((s or "").translate(_ASCII).split())
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def norm_search(s: str) -> str:
+    return " ".join((s or "").translate(_SEARCH).split())
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def norm_guard(s: str) -> str:
+    return " ".join((s or "").translate(_GUARD).split())
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def singularize_es(token: str) -> str:
+    t = (token or "").strip().lower()
+
+    EXC = {"leds": "led"}
+    if t in EXC:
+        return EXC[t]
+
+    if len(t) <= 4:
+        return t
+
+    vowels = set("aeiou")
+
+    # luces -> luz
+    if t.endswith("ces") and len(t) > 3:
+        return t[:-3] + "z"
+
+    # NUEVO: adjetivos/nombres en -ble/-ible: amables->amable, sumergibles->sumergible
+    if t.endswith("ables") or t.endswith("ibles") or t.endswith("bles"):
+        return t[:-1]
+
+    # consonante + 'es' -> quitar 'es' cuando termina en l/r/n/d/z (papeles->papel, reflectores->reflector)
+    if t.endswith("es") and len(t) > 3:
+        stem = t[:-2]
+        if stem and stem[-1] in {"l", "r", "n", "d", "z"}:
+            return stem
+
+    # vocal + 's' -> quitar 's' (postes->poste, nichos->nicho)
+    if t.endswith("s") and len(t) > 3 and t[-2] in vowels:
+        return t[:-1]
+
+    return t
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _search_tokens(s: str) -> Tuple[str, ...]:
+    out: List[str] = []
+    seen = set()
+    for t in norm_search(s).split():
+        if t not in seen:
+            out.append(t); seen.add(t)
+        sg = singularize_es(t)
+        if sg and sg != t and sg not in seen:
+            out.append(sg); seen.add(sg)
+    return tuple(out)
+
+
+def search_tokens(s: str) -> List[str]:
+    """
+    Tokeniza y añade la forma singular de cada token
+    para que 'nichos', 'postes', 'paneles', etc. coincidan con el índice.
+    No hace expansiones adicionales.
+    """
+    return list(_search_tokens(s))
+
+
+def ascii_tokens(msg: str) -> List[str]:
+    """Tokens de norm_ascii en singular (modelo de intención, caché de asesoría)."""
+    return [singularize_es(t) or t for t in norm_ascii(msg).split()]
+
+
+_CACHED = {
+    "norm_ascii": norm_ascii,
+    "norm_search": norm_search,
+    "norm_guard": norm_guard,
+    "singularize_es": singularize_es,
+    "search_tokens": _search_tokens,
+}
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    out = {}
+    for name, fn in _CACHED.items():
+        info = fn.cache_info()
+        looked = info.hits + info.misses
+        out[name] = {"hits": info.hits, "misses": info.misses, "size": info.currsize,
+                     "hit_rate": round(info.hits / looked, 4) if looked else None}
+    return out
+
+
+def cache_clear() -> None:
+    for fn in _CACHED.values():
+        fn.cache_clear()
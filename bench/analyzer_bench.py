@@ -0,0 +1,196 @@
+"""
+Benchmark del análisis de mensajes: cadena original de chat() contra
+MessageAnalyzer (una sola pasada).
+
+La "cadena" reproduce lo que hacía _chat_turn en un turno que llega hasta la
+búsqueda: _norm cuatro veces, faq_try_answer, las dos guardas de competencia,
+CATALOG_KEYWORDS, COTIZAR_KEYWORDS, los patrones de ver-más/insulto/pregunta/
+muéstrame/seguimiento y el token de código. Antes de medir se verifica que
+ambos caminos den las mismas señales para todo el corpus. Como faq_try_answer
+domina el costo, también se reportan ambos caminos sin la parte de FAQ.
+
+La sección "keywords" aísla la búsqueda de palabras clave: any() por lista,
+una alternación regex por lista y el autómata Aho-Corasick (una pasada), con
+las listas actuales y con listas infladas (--keyword-scale) para ver cómo
+escala cada uno al crecer la configuración.
+
+Corpus: mensajes de chat.db + consultas sintéticas de bench.catalog_gen.
+
+    python -m bench.analyzer_bench
+    python -m bench.analyzer_bench --repeat 20 --json analyzer.json
+"""
+from __future__ import annotations
+import argparse
+import json
+import random
+import re
+import string
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from bench.catalog_gen import generate, query_corpus
+from bench.replay import DEFAULT_DB, load_sessions
+from bench.stats import latency_summary
+from backend.routers import chat
+from backend.routers.faq import faq_try_answer
+from backend.services.keyword_automaton import KeywordAutomaton
+from backend.services.message_analyzer import MessageAnalyzer
+
+
+def chain(msg_raw: str, with_faq: bool = True) -> Dict[str, Any]:
+    """Señales calculadas como en la versión previa de _chat_turn."""
+    msg_norm = chat._norm(msg_raw)
+    faq = faq_try_answer(msg_raw) if with_faq else None
+    brand = any(k in msg_norm for k in chat.COMPETITOR_BRANDS)
+    msg_norm = chat._norm(msg_raw)
+    catalog = any(k in msg_norm for k in chat.CATALOG_KEYWORDS)
+    msg_norm = chat._norm(msg_raw)
+    cotizar = any(k in msg_norm for k in chat.COTIZAR_KEYWORDS)
+    msg_norm = chat._norm(msg_raw)
+    ventilador = ("ventilador" in msg_norm) or ("ventiladores" in msg_norm)
+    return {
+        "norm": msg_norm,
+        "faq_answer": faq,
+        "competitor_brand": brand,
+        "competitor": any(k in msg_norm for k in chat.COMPETITOR_KEYWORDS),
+        "catalog": catalog,
+        "cotizar": cotizar,
+        "ventilador": ventilador,
+        "more": bool(chat._MORE_RE.search(msg_raw)),
+        "abuse": bool(chat.ABUSE_RE.search(msg_raw)),
+        "question": chat._is_question(msg_raw),
+        "mode_override": chat._product_mode_override(msg_raw),
+        "ask_prefix": bool(chat.ASK_PREFIX_RE.search(msg_raw)),
+        "followup": bool(chat.FOLLOWUP_RE.match(msg_raw)),
+        "faq_topic": bool(chat.FAQ_INTENT_RE.search(msg_raw)),
+        "code_token": chat._single_code_token_raw(msg_raw),
+    }
+
+
+FIELDS = tuple(chain("x"))
+NO_FAQ = MessageAnalyzer(
+    normalize=chat._norm, faq_match=lambda _m: None, is_question=chat._is_question,
+    code_token=chat._single_code_token_raw, keywords=chat.ANALYZER_KEYWORDS, patterns=chat.ANALYZER_PATTERNS,
+)
+
+
+def analyzer(msg_raw: str, an: MessageAnalyzer = chat.ANALYZER) -> Dict[str, Any]:
+    f = an.analyze(msg_raw)
+    return {k: getattr(f, k) for k in FIELDS}
+
+
+def corpus(db: Path, synthetic: int, seed: int) -> List[str]:
+    msgs = [m.strip() for _, turns in load_sessions(db) for m in turns if m.strip()]
+    if synthetic:
+        msgs += [q["query"] for q in query_corpus(generate(200, seed), synthetic, seed)]
+    return msgs
+
+
+def mismatches(msgs: List[str]) -> List[Dict[str, Any]]:
+    out = []
+    for m in msgs:
+        a, b = chain(m), analyzer(m)
+        diff = {k: [a[k], b[k]] for k in a if a[k] != b[k]}
+        if diff:
+            out.append({"message": m, "diff": diff})
+    return out
+
+
+def measure(fn: Callable[[str], Any], msgs: List[str], repeat: int) -> Dict[str, Any]:
+    per_msg: List[float] = []
+    t_all = time.perf_counter()
+    for m in msgs:
+        best = float("inf")
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn(m)
+            best = min(best, time.perf_counter() - t0)
+        per_msg.append(best)
+    wall = time.perf_counter() - t_all
+    out = latency_summary(per_msg, digits=4)
+    out = {k.replace("_ms", "_us"): round(v * 1000, 2) if isinstance(v, float) else v for k, v in out.items()}
+    out["wall_s"] = round(wall, 3)
+    return out
+
+
+def keyword_methods(sets: Dict[str, Any]) -> Dict[str, Callable[[str], Any]]:
+    regexes = {name: re.compile("|".join(map(re.escape, sorted(words, key=len, reverse=True))))
+               for name, words in sets.items() if words}
+    automaton = KeywordAutomaton(sets)
+    return {
+        "any": lambda t: frozenset(n for n, ws in sets.items() if any(k in t for k in ws)),
+        "regex": lambda t: frozenset(n for n, rx in regexes.items() if rx.search(t)),
+        "automaton": automaton.scan,
+    }
+
+
+def keyword_bench(msgs: List[str], repeat: int, scale: int, seed: int) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    sets = {name: set(words) for name, words in chat.ANALYZER_KEYWORDS.items()}
+    for words in sets.values():
+        base = len(words)
+        while len(words) < base * scale:
+            words.add("".join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 12))))
+    norms = [chat._norm(m) for m in msgs]
+    methods = keyword_methods(sets)
+    ref = [methods["any"](t) for t in norms]
+    out: Dict[str, Any] = {"keywords": sum(len(w) for w in sets.values())}
+    for name, fn in methods.items():
+        res = measure(fn, norms, repeat)
+        res["mismatches"] = sum(1 for t, r in zip(norms, ref) if fn(t) != r)
+        out[name] = res
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cadena de regex/normalización de chat() vs MessageAnalyzer.")
+    parser.add_argument("--db", default=str(DEFAULT_DB))
+    parser.add_argument("--synthetic", type=int, default=400, help="consultas sintéticas adicionales")
+    parser.add_argument("--seed", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=10, help="repeticiones por mensaje (se toma la mejor)")
+    parser.add_argument("--keyword-scale", type=int, default=20, help="factor de inflado de las listas")
+    parser.add_argument("--json", dest="json_out", default=None)
+    args = parser.parse_args()
+
+    msgs = corpus(Path(args.db), args.synthetic, args.seed)
+    bad = mismatches(msgs)
+    for fn in (chain, analyzer):   # calentar cachés de regex
+        for m in msgs[:50]:
+            fn(m)
+    report = {
+        "messages": len(msgs),
+        "mismatches": len(bad),
+        "mismatch_examples": bad[:10],
+        "chain": measure(chain, msgs, args.repeat),
+        "analyzer": measure(analyzer, msgs, args.repeat),
+        "chain_no_faq": measure(lambda m: chain(m, with_faq=False), msgs, args.repeat),
+        "analyzer_no_faq": measure(lambda m: analyzer(m, NO_FAQ), msgs, args.repeat),
+    }
+    report["keywords"] = {
+        "current": keyword_bench(msgs, args.repeat, 1, args.seed),
+        f"x{args.keyword_scale}": keyword_bench(msgs, args.repeat, args.keyword_scale, args.seed),
+    }
+    c, a = report["chain"], report["analyzer"]
+    report["speedup_p50"] = round(c["p50_us"] / a["p50_us"], 2) if a["p50_us"] else None
+    report["speedup_mean"] = round(c["mean_us"] / a["mean_us"], 2) if a["mean_us"] else None
+    cn, an = report["chain_no_faq"], report["analyzer_no_faq"]
+    report["speedup_p50_no_faq"] = round(cn["p50_us"] / an["p50_us"], 2) if an["p50_us"] else None
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.json_out:
+        Path(args.json_out).write_text(text, encoding="utf-8")
+    print(text)
+    print(f"[analyzer_bench] {len(msgs)} mensajes, {len(bad)} diferencias; cadena p50={c['p50_us']}µs "
+          f"analizador p50={a['p50_us']}µs (x{report['speedup_p50']}); sin FAQ "
+          f"{cn['p50_us']}µs vs {an['p50_us']}µs (x{report['speedup_p50_no_faq']})", file=sys.stderr)
+    for label, kb in report["keywords"].items():
+        print(f"[analyzer_bench] palabras clave {label} ({kb['keywords']}): "
+              + " ".join(f"{m}={kb[m]['p50_us']}µs" for m in ("any", "regex", "automaton")), file=sys.stderr)
+    if bad or any(kb[m]["mismatches"] for kb in report["keywords"].values() for m in ("regex", "automaton")):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark de search_batch contra un bucle de search_candidates.
+
+Simula una planilla de cotización: consultas de bench.catalog_gen más líneas
+repetidas (--repeat-ratio), como pasa en cotizaciones reales. Verifica que
+el lote devuelva exactamente los mismos candidatos, en el mismo orden, que
+search_candidates por consulta, y reporta tiempo total y consultas/s.
+
+    python -m bench.batch_search
+    python -m bench.batch_search --size 2000 --queries 200 --json batch.json
+"""
+from __future__ import annotations
+import argparse
+import json
+import random
+import sys
+import time
+from typing import Any, Dict, List
+
+from bench.catalog_gen import generate, query_corpus
+from backend.services import search_service
+
+
+def spreadsheet(catalog: Dict[str, Dict[str, Any]], n: int, repeat_ratio: float, seed: int) -> List[str]:
+    base = [q["query"] for q in query_corpus(catalog, n, seed)]
+    rng = random.Random(seed)
+    extra = int(len(base) * repeat_ratio)
+    return base + [rng.choice(base) for _ in range(extra)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="search_batch vs bucle de search_candidates.")
+    parser.add_argument("--size", type=int, default=500, help="productos del catálogo sintético")
+    parser.add_argument("--queries", type=int, default=80, help="consultas distintas")
+    parser.add_argument("--repeat-ratio", type=float, default=0.5, help="líneas repetidas por consulta distinta")
+    parser.add_argument("--limit", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", dest="json_out", default=None)
+    args = parser.parse_args()
+
+    catalog = generate(args.size, args.seed)
+    products = list(catalog.values())
+    queries = spreadsheet(catalog, args.queries, args.repeat_ratio, args.seed)
+    search_service._BUILT = False
+    search_service._ensure_index(products)
+
+    t0 = time.perf_counter()
+    expected = [search_service.search_candidates(products, q, args.limit) for q in queries]
+    loop_s = time.perf_counter() - t0
+
+    report: Dict[str, Any] = {
+        "size": args.size,
+        "lines": len(queries),
+        "distinct": len(set(queries)),
+        "loop": {"wall_s": round(loop_s, 3), "qps": round(len(queries) / loop_s, 2)},
+    }
+    t0 = time.perf_counter()
+    got = list(search_service.search_batch(products, queries, args.limit))
+    wall = time.perf_counter() - t0
+    mismatches = sum(1 for (i, found), exp in zip(got, expected) if found != exp)
+    in_order = [i for i, _ in got] == list(range(len(queries)))
+    report["batch"] = {
+        "wall_s": round(wall, 3), "qps": round(len(queries) / wall, 2),
+        "speedup": round(loop_s / wall, 2), "mismatches": mismatches, "in_order": in_order,
+    }
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+    r = report["batch"]
+    print(f"[batch_search] {len(queries)} líneas: bucle {report['loop']['wall_s']}s, lote "
+          f"{r['wall_s']}s (x{r['speedup']}), {r['mismatches']} diferencias", file=sys.stderr)
+    if mismatches or not in_order:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
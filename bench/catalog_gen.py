@@ -0,0 +1,194 @@
+"""
+Generador de catálogos sintéticos con la forma de productos.json
+(code, name, category, categories, family, tags, price, url, image).
+
+Las familias, códigos y potencias imitan el catálogo real de Ecolite para que
+el vocabulario, la frecuencia documental y los códigos se comporten parecido
+a escala 1k / 10k / 100k / 1M.
+
+    python -m bench.catalog_gen --size 10000 --out /tmp/catalog_10k.json
+"""
+from __future__ import annotations
+import argparse
+import json
+import random
+import string
+from typing import Any, Dict, List, Optional
+
+# (familia, category, categories, plantillas de nombre, prefijos de código, potencias, etiquetas extra)
+FAMILIES: List[Dict[str, Any]] = [
+    {"family": "Bombillo", "category": "Bombillo",
+     "categories": ["Bombillo", "Foco", "Bulbo", "Rosca e27", "e27", "par", "g9"],
+     "names": ["Bombillo LED {w}W rosca {socket} {code}", "Bombillo LED filamento {w}W rosca {socket} {code}",
+               "Foco LED PAR {w}W {code}"],
+     "prefixes": ["VING", "BLED", "ECOB", "PAR"], "watts": [4, 5, 7, 9, 12, 15, 18, 20],
+     "tags": ["Hogar", "Sala", "Habitación", "vintage"], "extra": {"socket": ["E27", "GU10", "G9", "E14"]}},
+    {"family": "Cinta LED", "category": "Cinta LED",
+     "categories": ["Cinta led", "Cintas led", "Tira led", "Led strip"],
+     "names": ["Cinta LED {w}W/M DC{v}V {code}", "Cinta LED neón {w}W/M {code}", "Extensión para cinta LED {code}"],
+     "prefixes": ["STR", "STRN", "STRU"], "watts": [5, 8, 10, 12, 14, 20],
+     "tags": ["Interior", "Decoración", "Indirecta"], "extra": {"v": ["12", "24", "48"]}},
+    {"family": "Panel", "category": "Panel",
+     "categories": ["Panel", "Panel led", "Paneles", "Oficina"],
+     "names": ["Panel LED {size} {w}W {code}", "Panel LED sobreponer {size} {w}W {code}",
+               "Panel LED incrustar redondo {w}W {code}"],
+     "prefixes": ["PNL", "ECOP", "PLR"], "watts": [6, 12, 18, 24, 36, 40, 48],
+     "tags": ["Oficina", "Colegio", "Hospital", "Incrustar"], "extra": {"size": ["60x60", "30x120", "30x30"]}},
+    {"family": "Reflector", "category": "Reflector",
+     "categories": ["Iluminación Exterior", "Reflector", "Reflectores LED", "IP65"],
+     "names": ["Reflector LED {w}W IP65 {code}", "Reflector LED 3 CCT {w}W {code}", "Reflector solar {w}W {code}"],
+     "prefixes": ["FLO", "ECOR", "RFL"], "watts": [10, 20, 30, 50, 100, 150, 200, 300],
+     "tags": ["Exterior", "Fachada", "Cancha", "Parqueadero", "3CCT"], "extra": {}},
+    {"family": "Highbay", "category": "Industrial",
+     "categories": ["Industrial", "Highbay", "Campana industrial", "Bodega"],
+     "names": ["Highbay campana industrial UFO {w}W {code}", "Luminaria lineal industrial {w}W {code}"],
+     "prefixes": ["ECO-HB", "HBL", "UFO"], "watts": [100, 150, 200, 240],
+     "tags": ["Bodega", "Industrial", "Fábrica", "Campana industrial"], "extra": {}},
+    {"family": "Aplique", "category": "Aplique",
+     "categories": ["Aplique", "Aplique led para pared", "Aplique pared", "Aplique nicho"],
+     "names": ["Aplique de pared LED {w}W {code}", "Aplique LED Acrílico {w}W {code}"],
+     "prefixes": ["LEDLC", "AP", "CORBATIN"], "watts": [3, 6, 9, 12, 18],
+     "tags": ["Fachada", "Baño", "Pasillo", "3000K"], "extra": {}},
+    {"family": "Sumergible / Piscina", "category": "Sumergible",
+     "categories": ["Sumergible / piscina", "Sumergible", "Ip68", "Piscina"],
+     "names": ["Bala LED sumergible {w}W {code}", "Luz LED sumergible RGB {w}W {code}"],
+     "prefixes": ["ECOPL", "SUM"], "watts": [6, 9, 12, 18, 24],
+     "tags": ["Piscina", "Jacuzzi", "RGB"], "extra": {}},
+    {"family": "Accesorio", "category": "Fuente de poder",
+     "categories": ["Accesorio", "Controlador", "Driver", "Fuente de poder"],
+     "names": ["Fuente de Poder {w}W DC{v}V {code}", "Fuente de poder Slim {w}W {code}", "Controlador RGB {code} DC{v}V"],
+     "prefixes": ["DR", "SLIM", "TWC"], "watts": [36, 60, 100, 150, 200, 350],
+     "tags": ["Driver", "Instalación", "Sistema"], "extra": {"v": ["12", "24", "42"]}},
+    {"family": "Riel magnético", "category": "Riel Magnético",
+     "categories": ["Riel magnético", "Sistema magnético", "Magnetico", "Magnetic track"],
+     "names": ["Spot magnético {w}W {code}", "Lineal magnético difuso {w}W {code}", "Riel magnético {len}m {code}"],
+     "prefixes": ["TLM", "MAG"], "watts": [6, 10, 12, 20],
+     "tags": ["Retail", "Tienda", "Showroom", "Oficina"], "extra": {"len": ["1", "2", "3"]}},
+    {"family": "Solar", "category": "Solar",
+     "categories": ["Solar", "Todo en uno", "Alumbrado Público Solar LED", "Iluminación Exterior"],
+     "names": ["Luminaria Solar LED {w}W {code}", "Poste Solar LED {w}W {code}", "Estaca solar {w}W {code}"],
+     "prefixes": ["SLSUN", "ECOSOL", "EST"], "watts": [5, 30, 60, 120, 200],
+     "tags": ["Exterior", "Jardin", "Sendero", "Parque"], "extra": {}},
+    {"family": "Emergencia", "category": "Emergencia",
+     "categories": ["Emergencia", "Luz de emergencia", "Salida"],
+     "names": ["Luz de emergencia LED {w}W {code}", "Aviso de salida LED {code}"],
+     "prefixes": ["EME", "EXIT"], "watts": [2, 3, 4, 6],
+     "tags": ["Seguridad", "Oficina", "Evacuación"], "extra": {}},
+]
+
+SUFFIXES = ["", "", "", "-C", "-F", "-B", "-D", "-RGB", "-3CCT"]
+
+
+def _code(rng: random.Random, fam: Dict[str, Any], w: int, serial: int) -> str:
+    prefix = rng.choice(fam["prefixes"])
+    body = f"{w}W" if rng.random() < 0.5 else str(serial)
+    if rng.random() < 0.3:
+        body += rng.choice(string.ascii_uppercase)
+    sep = "-" if "-" in prefix or rng.random() < 0.15 else ""
+    return f"{prefix}{sep}{body}{rng.choice(SUFFIXES)}"
+
+
+def generate(size: int, seed: int = 42) -> Dict[str, Dict[str, Any]]:
+    """Catálogo dict code -> producto, igual que productos.json. Determinista por seed."""
+    rng = random.Random(seed)
+    out: Dict[str, Dict[str, Any]] = {}
+    serial = 0
+    while len(out) < size:
+        serial += 1
+        fam = rng.choice(FAMILIES)
+        w = rng.choice(fam["watts"])
+        code = _code(rng, fam, w, serial)
+        if code in out:
+            code = f"{code}{serial}"
+        fields = {k: rng.choice(v) for k, v in fam["extra"].items()}
+        name = rng.choice(fam["names"]).format(w=w, code=code.split("-")[0] if rng.random() < 0.3 else code,
+                                               socket=fields.get("socket", ""), v=fields.get("v", "12"),
+                                               size=fields.get("size", ""), len=fields.get("len", "1"))
+        tags = [f"{w}W", code] + rng.sample(fam["tags"], k=min(len(fam["tags"]), rng.randint(1, 3)))
+        slug = "-".join(name.lower().replace("/", " ").split())
+        price = rng.randrange(8_000, 2_500_000, 10)
+        out[code] = {
+            "code": code,
+            "name": " ".join(name.split()),
+            "category": fam["category"],
+            "categories": rng.sample(fam["categories"], k=min(len(fam["categories"]), rng.randint(2, 4))),
+            "family": fam["family"],
+            "tags": tags,
+            "price": "${:,}".format(price).replace(",", "."),
+            "url": f"https://ecolite.com.co/producto/{slug}/",
+            "image": f"https://ecolite.com.co/wp-content/uploads/2025/01/{code}.webp",
+            "img_url": f"https://ecolite.com.co/wp-content/uploads/2025/01/{code}.webp",
+        }
+    return out
+
+
+# ---------- corpus de consultas ----------
+def _typo(rng: random.Random, word: str) -> str:
+    if len(word) < 5:
+        return word
+    i = rng.randrange(1, len(word) - 1)
+    op = rng.choice(("drop", "swap", "dup"))
+    if op == "drop":
+        return word[:i] + word[i + 1:]
+    if op == "swap":
+        return word[:i - 1] + word[i] + word[i - 1] + word[i + 1:]
+    return word[:i] + word[i] + word[i:]
+
+
+def query_corpus(catalog: Dict[str, Dict[str, Any]], n: int = 200, seed: int = 7,
+                 kinds: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Consultas realistas derivadas del catálogo: {kind, query, page}.
+    kinds: category, typo, code, code_loose, watt, phrase, followup.
+    """
+    rng = random.Random(seed)
+    products = list(catalog.values())
+    kinds = kinds or ["category", "typo", "code", "code_loose", "watt", "phrase", "followup"]
+    spaces = ["bodega", "oficina", "piscina", "fachada", "jardin", "sala", "parqueadero", "tienda"]
+    out: List[Dict[str, Any]] = []
+    for i in range(n):
+        kind = kinds[i % len(kinds)]
+        p = rng.choice(products)
+        cat = p["category"].lower()
+        w = next((t for t in p["tags"] if t.upper().endswith("W") and t[:-1].isdigit()), "")
+        if kind == "category":
+            q = rng.choice([cat, f"{cat}s", f"necesito {cat}"])
+        elif kind == "typo":
+            q = " ".join(_typo(rng, t) for t in p["name"].lower().split()[:3])
+        elif kind == "code":
+            q = p["code"]
+        elif kind == "code_loose":
+            q = rng.choice([p["code"].replace("-", ""), p["code"].split("-")[0].lower(),
+                            f"tienen el {p['code']}?"])
+        elif kind == "watt":
+            q = rng.choice([f"{cat} {w.lower()}", f"{cat} de {w[:-1]} watts" if w else cat, f"{w} {cat}"]).strip()
+        elif kind == "phrase":
+            q = f"{cat} para {rng.choice(spaces)}"
+        else:  # followup: "ver más" sobre la consulta anterior
+            prev = out[-1]["query"] if out else cat
+            out.append({"kind": kind, "query": prev, "page": rng.randint(1, 3)})
+            continue
+        out.append({"kind": kind, "query": q, "page": 0})
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Genera un catálogo sintético con formato productos.json.")
+    parser.add_argument("--size", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--queries-out", default=None, help="además, guardar un corpus de consultas")
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    catalog = generate(args.size, args.seed)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(catalog, f, ensure_ascii=False)
+    if args.queries_out:
+        with open(args.queries_out, "w", encoding="utf-8") as f:
+            json.dump(query_corpus(catalog, args.queries), f, ensure_ascii=False, indent=1)
+    print(f"[catalog_gen] {len(catalog)} productos → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Servidor local que imita el webservice de DataCRM (vtiger) y el formulario
+público WForms, para medir throughput y modos de falla del envío de leads
+sin tocar el CRM real.
+
+    python -m bench.fake_datacrm --port 8765 --latency-ms 120 --fail-rate 0.2
+
+Luego apunta el backend con:
+    DATACRM_URL=http://127.0.0.1:8765/webservice.php
+    DATACRM_WFORM_URL=http://127.0.0.1:8765/index.php
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import random
+import secrets
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeDataCRM:
+    """Estado compartido del servidor: tokens, sesiones, contactos y contadores."""
+
+    def __init__(self, user: str = "gerente", access_key: str = "I33s3VEeZ7XwTG8",
+                 latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 fail_rate: float = 0.0, login_fail_rate: float = 0.0,
+                 form_fail_rate: float = 0.0, session_ttl: float = 300.0,
+                 seed: Optional[int] = None):
+        self.user = user
+        self.access_key = access_key
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.fail_rate = fail_rate
+        self.login_fail_rate = login_fail_rate
+        self.form_fail_rate = form_fail_rate
+        self.session_ttl = session_ttl
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.tokens: Dict[str, float] = {}
+        self.sessions: Dict[str, float] = {}
+        self.contacts: list[dict] = []
+        self.stats: Counter = Counter()
+
+    def _count(self, key: str) -> None:
+        with self.lock:
+            self.stats[key] += 1
+
+    def _sleep(self) -> None:
+        if self.latency_ms or self.jitter_ms:
+            time.sleep(max(0.0, self.latency_ms + self.rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000.0)
+
+    def _roll(self, rate: float) -> bool:
+        with self.lock:
+            return self.rng.random() < rate
+
+    def getchallenge(self, username: str) -> Dict[str, Any]:
+        self._count("getchallenge")
+        if username != self.user:
+            return {"success": False, "error": {"code": "INVALID_USERNAME"}}
+        token = secrets.token_hex(8)
+        with self.lock:
+            self.tokens[token] = time.time() + 300
+        return {"success": True, "result": {"token": token, "serverTime": int(time.time()),
+                                            "expireTime": int(time.time()) + 300}}
+
+    def login(self, username: str, access_key: str) -> Dict[str, Any]:
+        self._count("login")
+        if self._roll(self.login_fail_rate):
+            self._count("login_failed")
+            return {"success": False, "error": {"code": "SERVER_BUSY"}}
+        with self.lock:
+            valid = [t for t, exp in self.tokens.items() if exp > time.time()
+                     and hashlib.md5((t + self.access_key).encode()).hexdigest() == access_key]
+            for t in valid:
+                self.tokens.pop(t, None)
+        if username != self.user or not valid:
+            self._count("login_failed")
+            return {"success": False, "error": {"code": "INVALID_AUTH_TOKEN"}}
+        session = secrets.token_hex(12)
+        with self.lock:
+            self.sessions[session] = time.time() + self.session_ttl
+        return {"success": True, "result": {"sessionName": session, "userId": "19x1"}}
+
+    def create(self, session: str, element_type: str, element: str) -> Dict[str, Any]:
+        self._count("create")
+        with self.lock:
+            exp = self.sessions.get(session)
+        if exp is None or exp < time.time():
+            self._count("create_unauthorized")
+            return {"success": False, "error": {"code": "INVALID_SESSIONID",
+                                                "message": "Session Identifier provided is Invalid"}}
+        if self._roll(self.fail_rate):
+            self._count("create_failed")
+            return {"success": False, "error": {"code": "DATABASE_QUERY_ERROR"}}
+        data = json.loads(element or "{}")
+        with self.lock:
+            self.contacts.append(data)
+            cid = f"12x{len(self.contacts)}"
+        return {"success": True, "result": {"id": cid, **data}}
+
+    def form(self, fields: Dict[str, str]) -> int:
+        self._count("form")
+        if self._roll(self.form_fail_rate):
+            self._count("form_failed")
+            return 500
+        with self.lock:
+            self.contacts.append({"via": "form", **fields})
+        return 200
+
+
+def _make_handler(crm: FakeDataCRM):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args) -> None:  # silencioso
+            pass
+
+        def _reply(self, status: int, body: Dict[str, Any]) -> None:
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _form(self) -> Dict[str, str]:
+            n = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(n).decode() if n else ""
+            return {k: v[0] for k, v in parse_qs(raw).items()}
+
+        def do_GET(self) -> None:
+            url = urlparse(self.path)
+            if url.path == "/__stats":
+                return self._reply(200, {"stats": dict(crm.stats), "contacts": len(crm.contacts)})
+            crm._sleep()
+            q = {k: v[0] for k, v in parse_qs(url.query).items()}
+            if q.get("operation") == "getchallenge":
+                return self._reply(200, crm.getchallenge(q.get("username", "")))
+            self._reply(404, {"success": False})
+
+        def do_POST(self) -> None:
+            url = urlparse(self.path)
+            crm._sleep()
+            fields = self._form()
+            if url.path.endswith("index.php"):
+                status = crm.form(fields)
+                return self._reply(status, {"success": status == 200})
+            op = fields.get("operation")
+            if op == "login":
+                return self._reply(200, crm.login(fields.get("username", ""), fields.get("accessKey", "")))
+            if op == "create":
+                return self._reply(200, crm.create(fields.get("sessionName", ""),
+                                                   fields.get("elementType", ""),
+                                                   fields.get("element", "")))
+            self._reply(400, {"success": False, "error": {"code": "UNKNOWN_OPERATION"}})
+
+    return Handler
+
+
+def serve(crm: FakeDataCRM, host: str = "127.0.0.1", port: int = 8765) -> ThreadingHTTPServer:
+    """Arranca el servidor en un hilo daemon y lo devuelve (server.server_port = puerto real)."""
+    server = ThreadingHTTPServer((host, port), _make_handler(crm))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DataCRM falso para pruebas locales.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fracción de create que falla")
+    parser.add_argument("--login-fail-rate", type=float, default=0.0)
+    parser.add_argument("--form-fail-rate", type=float, default=0.0)
+    parser.add_argument("--session-ttl", type=float, default=300.0)
+    args = parser.parse_args()
+    crm = FakeDataCRM(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                      fail_rate=args.fail_rate, login_fail_rate=args.login_fail_rate,
+                      form_fail_rate=args.form_fail_rate, session_ttl=args.session_ttl)
+    srv = serve(crm, args.host, args.port)
+    print(f"[fake-datacrm] escuchando en http://{args.host}:{srv.server_port}/webservice.php")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        srv.shutdown()
@@ -0,0 +1,197 @@
+"""
+Servidor local compatible con la API de OpenAI (POST /v1/chat/completions)
+para pruebas de carga de /chat/ sin llamar al LLM real.
+
+Responde de forma canónica a los prompts del backend:
+- clasificador de intención (PRODUCTO / FAQ / OTRO) por palabras clave
+- modo de producto (LISTAR / ASESORAR)
+- resto (asesoría, FAQ, smalltalk, resúmenes): una frase fija
+
+La latencia sigue una distribución configurable (fixed, uniform, lognormal)
+y se pueden inyectar errores 500, 429 y respuestas lentas (timeouts).
+
+    python -m bench.fake_llm --port 8766 --latency-ms 400 --dist lognormal --sigma 0.5 --error-rate 0.02
+
+Luego arranca el backend con:
+    OPENAI_API_KEY=fake OPENAI_BASE_URL=http://127.0.0.1:8766/v1
+"""
+from __future__ import annotations
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+FAQ_RE = re.compile(r"garant|env[ií]o|despach|horario|direcci|tienda f[ií]sica|contact|pago|devoluc|factura", re.I)
+PRODUCT_RE = re.compile(
+    r"led|panel|reflector|bombillo|cinta|highbay|aplique|luminaria|l[aá]mpara|foco|riel|poste|solar|"
+    r"piscina|bodega|oficina|\d+\s*w\b|watt",
+    re.I,
+)
+LIST_RE = re.compile(r"mu[eé]str|ver\b|lista|opciones|cu[aá]les|tienes|tienen|cat[aá]logo|precio", re.I)
+
+CANNED_REPLY = "Para ese espacio funcionan bien luminarias LED de buena eficiencia; te muestro opciones del catálogo."
+
+
+def canned_answer(system_prompt: str, user_msg: str) -> str:
+    """Respuesta determinista según el tipo de prompt que envía el backend."""
+    sys_up = (system_prompt or "").upper()
+    msg = user_msg or ""
+    if "PRODUCTO, FAQ U OTRO" in sys_up:
+        if FAQ_RE.search(msg):
+            return "FAQ"
+        if PRODUCT_RE.search(msg):
+            return "PRODUCTO"
+        return "OTRO"
+    if "LISTAR O ASESORAR" in sys_up:
+        return "LISTAR" if LIST_RE.search(msg) else "ASESORAR"
+    return CANNED_REPLY
+
+
+def _approx_tokens(text: str) -> int:
+    return max(1, len(text or "") // 4)
+
+
+class FakeLLM:
+    """Estado compartido del servidor: distribución de latencia, fallos y contadores."""
+
+    def __init__(self, latency_ms: float = 0.0, dist: str = "fixed", sigma: float = 0.5,
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0,
+                 timeout_rate: float = 0.0, timeout_s: float = 30.0,
+                 model: str = "gpt-4o-mini", seed: Optional[int] = None):
+        self.latency_ms = latency_ms
+        self.dist = dist
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.timeout_rate = timeout_rate
+        self.timeout_s = timeout_s
+        self.model = model
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats: Counter = Counter()
+
+    def _count(self, key: str) -> None:
+        with self.lock:
+            self.stats[key] += 1
+
+    def _delay_s(self) -> float:
+        with self.lock:
+            if self.dist == "uniform":
+                ms = self.rng.uniform(0, 2 * self.latency_ms)
+            elif self.dist == "lognormal" and self.latency_ms > 0:
+                # latency_ms es la mediana
+                ms = self.rng.lognormvariate(math.log(self.latency_ms), self.sigma)
+            else:
+                ms = self.latency_ms
+        return max(0.0, ms) / 1000.0
+
+    def _roll(self, rate: float) -> bool:
+        with self.lock:
+            return self.rng.random() < rate
+
+    def complete(self, body: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        """Procesa un chat.completions.create; devuelve (status, json)."""
+        self._count("requests")
+        if self._roll(self.timeout_rate):
+            self._count("timeouts")
+            time.sleep(self.timeout_s)
+        else:
+            time.sleep(self._delay_s())
+        if self._roll(self.rate_limit_rate):
+            self._count("rate_limited")
+            return 429, {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}}
+        if self._roll(self.error_rate):
+            self._count("errors")
+            return 500, {"error": {"message": "The server had an error", "type": "server_error", "code": None}}
+
+        messages = body.get("messages") or []
+        system = next((m.get("content", "") for m in messages if m.get("role") == "system"), "")
+        user = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+        text = canned_answer(system, user)
+        self._count("ok")
+        prompt_tokens = sum(_approx_tokens(m.get("content", "")) for m in messages)
+        completion_tokens = _approx_tokens(text)
+        return 200, {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model") or self.model,
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": text}}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        }
+
+
+def _make_handler(llm: FakeLLM):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args) -> None:  # silencioso
+            pass
+
+        def _reply(self, status: int, body: Dict[str, Any]) -> None:
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self) -> None:
+            if self.path.rstrip("/") == "/__stats":
+                return self._reply(200, {"stats": dict(llm.stats)})
+            self._reply(404, {"error": {"message": "not found"}})
+
+        def do_POST(self) -> None:
+            n = int(self.headers.get("Content-Length") or 0)
+            try:
+                body = json.loads(self.rfile.read(n) or b"{}")
+            except ValueError:
+                return self._reply(400, {"error": {"message": "invalid json"}})
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                return self._reply(404, {"error": {"message": "not found"}})
+            status, out = llm.complete(body)
+            self._reply(status, out)
+
+    return Handler
+
+
+def serve(llm: FakeLLM, host: str = "127.0.0.1", port: int = 8766) -> ThreadingHTTPServer:
+    """Arranca el servidor en un hilo daemon y lo devuelve (server.server_port = puerto real)."""
+    server = ThreadingHTTPServer((host, port), _make_handler(llm))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LLM falso compatible con OpenAI para pruebas de carga.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="latencia (mediana en lognormal)")
+    parser.add_argument("--dist", choices=("fixed", "uniform", "lognormal"), default="lognormal")
+    parser.add_argument("--sigma", type=float, default=0.5, help="dispersión de la lognormal")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fracción de respuestas 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fracción de respuestas 429")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="fracción de respuestas lentas")
+    parser.add_argument("--timeout-s", type=float, default=30.0, help="demora de las respuestas lentas")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    llm = FakeLLM(latency_ms=args.latency_ms, dist=args.dist, sigma=args.sigma,
+                  error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+                  timeout_rate=args.timeout_rate, timeout_s=args.timeout_s, seed=args.seed)
+    srv = serve(llm, args.host, args.port)
+    print(f"[fake-llm] escuchando en http://{args.host}:{srv.server_port}/v1")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        srv.shutdown()
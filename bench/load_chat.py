@@ -0,0 +1,190 @@
+"""
+Generador de carga para /chat/ con sesiones multi-turno realistas:
+búsqueda → "ver más" → FAQ → cotizar.
+
+Las sesiones arrancan a una tasa fija (lazo abierto: no se frena si la app se
+pone lenta) y cada sesión envía sus turnos en orden con un tiempo de
+"pensar" entre ellos. La rama de cada respuesta sale del header
+X-Ecolite-Branch, así que el reporte separa latencia y errores por rama; los
+turnos servidos sin LLM por saturación traen X-Ecolite-Degraded y se cuentan aparte.
+
+Con el backend apuntando al LLM falso (bench.fake_llm):
+
+    OPENAI_API_KEY=fake OPENAI_BASE_URL=http://127.0.0.1:8766/v1 uvicorn main:app --port 8000
+    python -m bench.load_chat --url http://127.0.0.1:8000 --rate 2 --duration 60 --json load.json
+"""
+from __future__ import annotations
+import argparse
+import http.client
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from bench.stats import latency_summary
+
+SEARCH_MSGS = [
+    "panel led 60x60 para oficina", "reflector 100w", "cinta led 12v para cocina", "highbay para bodega",
+    "bombillo e27 vintage", "luz sumergible para piscina", "aplique de pared para fachada",
+    "poste solar para jardin", "riel magnetico para tienda", "reflector solar 200w", "luminaria lineal",
+    "panel redondo 18w", "fuente de poder 12v", "luz de emergencia",
+]
+MORE_MSGS = ["ver más", "muéstrame más", "siguientes", "otras opciones"]
+FAQ_MSGS = [
+    "¿cuál es la garantía de los productos?", "hacen envíos a Medellín?", "cuál es el horario de atención",
+    "dónde queda la tienda física", "qué medios de pago aceptan",
+]
+COTIZAR_MSGS = ["quiero cotizar", "me puedes cotizar 20 paneles", "solicitar cotización", "cotizame esos reflectores"]
+
+
+def session_script(rng: random.Random) -> List[Tuple[str, str]]:
+    """Turnos (paso, mensaje) de una sesión; algunas omiten pasos como en la vida real."""
+    turns = [("search", rng.choice(SEARCH_MSGS))]
+    for _ in range(rng.choice((0, 1, 1, 2))):
+        turns.append(("more", rng.choice(MORE_MSGS)))
+    if rng.random() < 0.6:
+        turns.append(("faq", rng.choice(FAQ_MSGS)))
+    if rng.random() < 0.5:
+        turns.append(("cotizar", rng.choice(COTIZAR_MSGS)))
+    return turns
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples: List[Dict[str, Any]] = []
+
+    def add(self, **sample: Any) -> None:
+        with self.lock:
+            self.samples.append(sample)
+
+
+def _post_turn(conn: http.client.HTTPConnection, path: str, payload: Dict[str, Any],
+               timeout: float) -> Tuple[int, str, Optional[str], Optional[Dict[str, Any]]]:
+    body = json.dumps(payload).encode()
+    conn.timeout = timeout
+    conn.request("POST", path, body=body, headers={"Content-Type": "application/json"})
+    resp = conn.getresponse()
+    data = resp.read()
+    branch = resp.getheader("X-Ecolite-Branch") or ("http_%d" % resp.status)
+    degraded = resp.getheader("X-Ecolite-Degraded")
+    try:
+        parsed = json.loads(data) if resp.status == 200 else None
+    except ValueError:
+        parsed = None
+    return resp.status, branch, degraded, parsed
+
+
+def run_session(base: str, rec: Recorder, rng: random.Random, think_s: float, timeout: float) -> None:
+    url = urlparse(base)
+    conn_cls = http.client.HTTPSConnection if url.scheme == "https" else http.client.HTTPConnection
+    conn = conn_cls(url.hostname, url.port, timeout=timeout)
+    path = (url.path.rstrip("/") or "") + "/chat/"
+    sid = "load-" + uuid.uuid4().hex[:12]
+    page = 0
+    try:
+        for step, msg in session_script(rng):
+            if step == "more":
+                page += 1
+            elif step == "search":
+                page = 0
+            t0 = time.perf_counter()
+            try:
+                status, branch, degraded, _ = _post_turn(conn, path, {"session_id": sid, "message": msg, "page": page}, timeout)
+            except Exception as e:
+                status, branch = 0, "transport_error"
+                conn.close()
+                conn = conn_cls(url.hostname, url.port, timeout=timeout)
+                rec.add(step=step, branch=branch, status=status, latency=time.perf_counter() - t0,
+                        error=type(e).__name__)
+                continue
+            rec.add(step=step, branch=branch, status=status, latency=time.perf_counter() - t0,
+                    degraded=degraded)
+            if think_s:
+                time.sleep(rng.uniform(0.5 * think_s, 1.5 * think_s))
+    finally:
+        conn.close()
+
+
+def _group_stats(samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+    errors = sum(1 for s in samples if s["status"] != 200)
+    out = latency_summary((s["latency"] for s in samples), digits=1)
+    out["errors"] = errors
+    out["error_rate"] = round(errors / len(samples), 4) if samples else 0.0
+    degraded = sum(1 for s in samples if s.get("degraded"))
+    out["degraded_rate"] = round(degraded / len(samples), 4) if samples else 0.0
+    return out
+
+
+def report(samples: List[Dict[str, Any]], wall: float, sessions: int) -> Dict[str, Any]:
+    by_branch: Dict[str, List] = defaultdict(list)
+    by_step: Dict[str, List] = defaultdict(list)
+    for s in samples:
+        by_branch[s["branch"]].append(s)
+        by_step[s["step"]].append(s)
+    return {
+        "sessions": sessions,
+        "turns": len(samples),
+        "wall_s": round(wall, 2),
+        "throughput_tps": round(len(samples) / wall, 2) if wall else 0.0,
+        "status": dict(Counter(str(s["status"]) for s in samples)),
+        "degraded": dict(Counter(s["degraded"] for s in samples if s.get("degraded"))),
+        "overall": _group_stats(samples),
+        "by_branch": {k: _group_stats(v) for k, v in sorted(by_branch.items())},
+        "by_step": {k: _group_stats(v) for k, v in sorted(by_step.items())},
+    }
+
+
+def run(base: str, rate: float, duration: float, think_s: float, timeout: float,
+        max_sessions: int, seed: int) -> Dict[str, Any]:
+    rec = Recorder()
+    rng = random.Random(seed)
+    interval = 1.0 / rate if rate > 0 else 0.0
+    started = 0
+    t_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_sessions) as pool:
+        next_at = t_start
+        while time.perf_counter() - t_start < duration:
+            now = time.perf_counter()
+            if now < next_at:
+                time.sleep(next_at - now)
+            pool.submit(run_session, base, rec, random.Random(rng.random()), think_s, timeout)
+            started += 1
+            next_at += interval
+    return report(rec.samples, time.perf_counter() - t_start, started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Carga multi-turno contra /chat/.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--rate", type=float, default=1.0, help="sesiones nuevas por segundo")
+    parser.add_argument("--duration", type=float, default=30.0, help="segundos generando sesiones")
+    parser.add_argument("--think-ms", type=float, default=500.0, help="pausa media entre turnos de una sesión")
+    parser.add_argument("--timeout", type=float, default=30.0, help="timeout por request (s)")
+    parser.add_argument("--max-sessions", type=int, default=200, help="sesiones simultáneas como máximo")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", dest="json_out", default=None, help="guardar el reporte en JSON")
+    args = parser.parse_args()
+
+    out = run(args.url, args.rate, args.duration, args.think_ms / 1000.0, args.timeout,
+              args.max_sessions, args.seed)
+    text = json.dumps(out, indent=2, ensure_ascii=False)
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+    o = out["overall"]
+    print(f"[load_chat] {out['turns']} turnos en {out['wall_s']}s ({out['throughput_tps']}/s) "
+          f"p50={o['p50_ms']}ms p95={o['p95_ms']}ms p99={o['p99_ms']}ms errores={o['error_rate']:.2%} "
+          f"degradados={o['degraded_rate']:.2%}",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Micro-benchmark de la normalización de texto: los _norm/_tok/singularize_es
+anteriores (regex + unicodedata, copiados aquí como referencia) contra
+backend.services.text_norm (tablas de str.translate + LRU).
+
+Secciones:
+- calls:   µs por llamada de cada función sobre nombres, descripciones y
+           consultas: versión anterior, translate sin caché y con caché caliente.
+- request: µs por turno de chat._filtered_page (búsqueda + filtros + orden),
+           con las funciones anteriores parcheadas en chat/search_service contra
+           las actuales; se cuenta cuántas llamadas de normalización hace un
+           turno y se verifica que ambos caminos devuelvan los mismos productos.
+
+Antes de medir se comprueba que ambas versiones den exactamente el mismo texto
+para todo el corpus.
+
+    python -m bench.norm_bench
+    python -m bench.norm_bench --size 1000 --queries 200 --json norm.json
+"""
+from __future__ import annotations
+import argparse
+import json
+import re
+import sys
+import time
+import unicodedata
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List
+
+from bench.catalog_gen import generate, query_corpus
+from bench.stats import latency_summary
+from backend.routers import chat
+from backend.services import search_service, text_norm
+
+
+# ---------- versiones anteriores (referencia) ----------
+def legacy_norm_ascii(s: str) -> str:
+    s = (s or "").strip()
+    s = unicodedata.normalize("NFKD", s).encode("ascii", "ignore").decode("ascii")
+    s = s.lower()
+    s = re.sub(r"[^a-z0-9]+", " ", s)
+    s = re.sub(r"\s+", " ", s).strip()
+    return s
+
+
+def legacy_norm_search(s: str) -> str:
+    s = (s or "").lower()
+    s = unicodedata.normalize("NFD", s)
+    s = "".join(ch for ch in s if unicodedata.category(ch) != "Mn")
+    s = re.sub(r"[^a-z0-9%.\s-]", " ", s)
+    s = re.sub(r"\s+", " ", s).strip()
+    return s
+
+
+def legacy_norm_guard(text: str) -> str:
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = text.lower()
+    text = re.sub(r"[^a-z0-9\s\-\._#/]", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+legacy_singularize_es = text_norm.singularize_es.__wrapped__
+
+
+def legacy_tok(s: str) -> List[str]:
+    out: List[str] = []
+    seen = set()
+    for t in legacy_norm_search(s).split():
+        if t not in seen:
+            out.append(t); seen.add(t)
+        sg = legacy_singularize_es(t)
+        if sg and sg != t and sg not in seen:
+            out.append(sg); seen.add(sg)
+    return out
+
+
+PAIRS = {
+    "norm_ascii": (legacy_norm_ascii, text_norm.norm_ascii.__wrapped__, text_norm.norm_ascii),
+    "norm_search": (legacy_norm_search, text_norm.norm_search.__wrapped__, text_norm.norm_search),
+    "norm_guard": (legacy_norm_guard, text_norm.norm_guard.__wrapped__, text_norm.norm_guard),
+    "tok": (legacy_tok, lambda s: list(text_norm._search_tokens.__wrapped__(s)), text_norm.search_tokens),
+}
+
+
+def corpus(products: List[Dict[str, Any]], queries: List[Dict[str, Any]]) -> List[str]:
+    texts: List[str] = []
+    for p in products:
+        texts += [p.get("name", ""), p.get("category", ""), p.get("description", "")]
+        texts += [t for t in p.get("tags", []) if t]
+    texts += [q["query"] for q in queries]
+    texts += ["¿Tienen PANELES LED de 60×60 para oficinas?", "Reflectores 50W IP65 — 6500K",
+              "luces para jardín", "cinta neón ½ metro", "ﬁbra óptica²", "Ñandú Über Straße"]
+    return [t for t in texts if isinstance(t, str)]
+
+
+def mismatches(texts: List[str]) -> Dict[str, int]:
+    out = {}
+    for name, (old, _, new) in PAIRS.items():
+        out[name] = sum(1 for t in texts if old(t) != new(t))
+    toks = {t for s in texts for t in legacy_norm_search(s).split()}
+    out["singularize_es"] = sum(1 for t in toks if legacy_singularize_es(t) != text_norm.singularize_es(t))
+    return out
+
+
+def per_call_us(fn: Callable[[str], Any], texts: List[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for t in texts:
+            fn(t)
+        best = min(best, time.perf_counter() - t0)
+    return round(best / len(texts) * 1e6, 3)
+
+
+def calls_bench(texts: List[str], repeat: int) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    for name, (old, uncached, cached) in PAIRS.items():
+        for t in texts:   # calentar la caché
+            cached(t)
+        row = {"legacy_us": per_call_us(old, texts, repeat),
+               "translate_us": per_call_us(uncached, texts, repeat),
+               "cached_us": per_call_us(cached, texts, repeat)}
+        row["speedup_uncached"] = round(row["legacy_us"] / row["translate_us"], 2)
+        row["speedup_cached"] = round(row["legacy_us"] / row["cached_us"], 2)
+        out[name] = row
+    return out
+
+
+class _Counter:
+    def __init__(self, fn: Callable):
+        self.fn, self.n = fn, 0
+
+    def __call__(self, *a):
+        self.n += 1
+        return self.fn(*a)
+
+
+@contextmanager
+def _patched(norm: Callable, sing: Callable, norm_s: Callable, tok: Callable):
+    saved = (chat._norm, chat.singularize_es, search_service._norm, search_service._tok)
+    chat._norm, chat.singularize_es, search_service._norm, search_service._tok = norm, sing, norm_s, tok
+    try:
+        yield
+    finally:
+        chat._norm, chat.singularize_es, search_service._norm, search_service._tok = saved
+
+
+MODES = {
+    "legacy": (legacy_norm_ascii, legacy_singularize_es, legacy_norm_search, legacy_tok),
+    "text_norm": (text_norm.norm_ascii, text_norm.singularize_es, text_norm.norm_search, text_norm.search_tokens),
+}
+
+
+def _turn(products: List[Dict[str, Any]], q: Dict[str, Any]) -> List[str]:
+    items, _ = chat._filtered_page(products, q["query"], q["page"], filter_tokens=[], hard_tags=[])
+    return [chat._product_key(p) for p in items]
+
+
+def request_bench(products: List[Dict[str, Any]], queries: List[Dict[str, Any]], repeat: int) -> Dict[str, Any]:
+    search_service._BUILT = False
+    search_service._ensure_index(products)
+    out: Dict[str, Any] = {}
+    results: Dict[str, List[List[str]]] = {}
+    for mode, fns in MODES.items():
+        counters = [_Counter(f) for f in fns]
+        text_norm.cache_clear()
+        with _patched(*counters):
+            results[mode] = [_turn(products, q) for q in queries]   # primera pasada (caché fría)
+        calls = {name: round(c.n / len(queries), 1)
+                 for name, c in zip(("chat._norm", "singularize_es", "search._norm", "search._tok"), counters)}
+        per_turn: List[float] = []
+        with _patched(*fns):
+            for q in queries:
+                best = float("inf")
+                for _ in range(repeat):
+                    t0 = time.perf_counter()
+                    _turn(products, q)
+                    best = min(best, time.perf_counter() - t0)
+                per_turn.append(best)
+        out[mode] = {"calls_per_turn": calls, **latency_summary(per_turn, digits=3)}
+    out["result_mismatches"] = sum(1 for a, b in zip(results["legacy"], results["text_norm"]) if a != b)
+    old, new = out["legacy"], out["text_norm"]
+    out["saved_per_turn_ms"] = {"p50": round(old["p50_ms"] - new["p50_ms"], 3),
+                                "mean": round(old["mean_ms"] - new["mean_ms"], 3)}
+    out["speedup_mean"] = round(old["mean_ms"] / new["mean_ms"], 2) if new["mean_ms"] else None
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Normalización anterior (regex) vs text_norm (translate + LRU).")
+    parser.add_argument("--size", type=int, default=300, help="productos del catálogo sintético")
+    parser.add_argument("--queries", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=3, help="repeticiones (se toma la mejor)")
+    parser.add_argument("--json", dest="json_out", default=None)
+    args = parser.parse_args()
+
+    catalog = generate(args.size, args.seed)
+    products = list(catalog.values())
+    queries = query_corpus(catalog, args.queries, args.seed)
+    texts = corpus(products, queries)
+    bad = mismatches(texts)
+    report = {
+        "texts": len(texts),
+        "mismatches": bad,
+        "calls": calls_bench(texts, args.repeat),
+        "request": request_bench(products, queries, args.repeat),
+        "cache": text_norm.cache_stats(),
+    }
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+    for name, row in report["calls"].items():
+        print(f"[norm_bench] {name}: {row['legacy_us']}µs → {row['translate_us']}µs sin caché "
+              f"(x{row['speedup_uncached']}), {row['cached_us']}µs con caché (x{row['speedup_cached']})",
+              file=sys.stderr)
+    r = report["request"]
+    print(f"[norm_bench] turno _filtered_page: media {r['legacy']['mean_ms']}ms → {r['text_norm']['mean_ms']}ms "
+          f"(ahorro {r['saved_per_turn_ms']['mean']}ms, x{r['speedup_mean']}); "
+          f"{r['result_mismatches']} diferencias de resultado", file=sys.stderr)
+    if any(bad.values()) or r["result_mismatches"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
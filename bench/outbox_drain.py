@@ -0,0 +1,89 @@
+"""
+Mide cuánto tarda el worker de lead_outbox en vaciar N leads contra el
+DataCRM falso (bench.fake_datacrm), con latencia y tasa de fallos
+configurables. Usa una copia temporal de leads.db, nunca la real.
+
+    python -m bench.outbox_drain --leads 200 --latency-ms 80 --fail-rate 0.3
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from bench.fake_datacrm import FakeDataCRM, serve
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Throughput del outbox de leads contra DataCRM falso.")
+    parser.add_argument("--leads", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--login-fail-rate", type=float, default=0.0)
+    parser.add_argument("--form-fail-rate", type=float, default=0.0)
+    parser.add_argument("--max-attempts", type=int, default=4)
+    parser.add_argument("--backoff-base", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--json", dest="json_out", default=None, help="guardar el reporte en JSON")
+    args = parser.parse_args()
+
+    crm = FakeDataCRM(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                      fail_rate=args.fail_rate, login_fail_rate=args.login_fail_rate,
+                      form_fail_rate=args.form_fail_rate, seed=7)
+    srv = serve(crm, port=0)
+    base = f"http://127.0.0.1:{srv.server_port}"
+
+    # La configuración se lee al importar: se fija antes de importar los módulos del backend
+    os.environ["DATACRM_URL"] = f"{base}/webservice.php"
+    os.environ["DATACRM_WFORM_URL"] = f"{base}/index.php"
+    os.environ["LEAD_OUTBOX_MAX_ATTEMPTS"] = str(args.max_attempts)
+    os.environ["LEAD_OUTBOX_BACKOFF_BASE"] = str(args.backoff_base)
+    os.environ["LEAD_OUTBOX_CONCURRENCY"] = str(args.concurrency)
+
+    from backend.services import lead_outbox
+
+    tmpdir = tempfile.mkdtemp(prefix="outbox-bench-")
+    lead_outbox.LEADS_DB_PATH = Path(tmpdir) / "leads.db"
+    lead_outbox.init_outbox()
+
+    for i in range(args.leads):
+        lead_outbox.enqueue_lead({
+            "name": f"Lead {i}", "email": f"lead{i}@example.com", "phone": f"300{i:07d}",
+            "profession": "Arquitecto", "city": "Cali", "session_id": f"300{i:07d}",
+        })
+
+    async def _run() -> None:
+        while True:
+            claimed = await lead_outbox.drain_once()
+            stats = lead_outbox.outbox_stats()
+            if stats[lead_outbox.STATUS_PENDING] == 0:
+                return
+            if not claimed:
+                await asyncio.sleep(0.02)
+
+    t0 = time.perf_counter()
+    asyncio.run(_run())
+    elapsed = time.perf_counter() - t0
+    srv.shutdown()
+
+    stats = lead_outbox.outbox_stats()
+    report = {
+        "leads": args.leads,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_leads_s": round(args.leads / elapsed, 2) if elapsed else None,
+        "outbox": stats,
+        "crm_requests": dict(crm.stats),
+        "crm_requests_per_lead": round(sum(v for k, v in crm.stats.items()
+                                           if k in {"getchallenge", "login", "create", "form"}) / max(1, args.leads), 2),
+    }
+    print(json.dumps(report, indent=2))
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
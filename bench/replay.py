@@ -0,0 +1,245 @@
+"""
+Benchmark de regresión reproduciendo conversaciones reales de chat.db.
+
+Extrae las sesiones de `conversaciones`, reenvía los mensajes del usuario en
+orden por el pipeline de /chat en proceso (sin HTTP) y reporta latencia por
+turno y distribución de ramas. El log en SQLite se desactiva y el LLM se
+sustituye según --llm:
+
+- stub  (defecto): respuestas canónicas de bench.fake_llm, sin red
+- cache: usa un JSON (--llm-cache) sha1(prompt, mensaje) → respuesta; las
+         faltas van al LLM real y se guardan, así la segunda corrida es offline
+- live:  LLM real (necesita OPENAI_API_KEY)
+
+    python -m bench.replay run --db backend/data/chat.db --out before.json
+    git checkout otra-rama && python -m bench.replay run --out after.json
+    python -m bench.replay diff before.json after.json
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from bench.fake_llm import canned_answer
+from bench.stats import latency_summary
+
+DEFAULT_DB = Path(__file__).resolve().parent.parent / "backend" / "data" / "chat.db"
+
+
+def load_sessions(db_path: Path, limit: Optional[int] = None,
+                  session: Optional[str] = None) -> List[Tuple[str, List[str]]]:
+    """[(session_id, [mensajes del usuario en orden])], sesiones por orden de aparición."""
+    con = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        sql = "SELECT session_id, mensaje_usuario FROM conversaciones"
+        params: tuple = ()
+        if session:
+            sql += " WHERE session_id = ?"
+            params = (session,)
+        rows = con.execute(sql + " ORDER BY id ASC", params).fetchall()
+    finally:
+        con.close()
+    sessions: Dict[str, List[str]] = {}
+    for sid, msg in rows:
+        if sid is None or not (msg or "").strip():
+            continue
+        sessions.setdefault(sid, []).append(msg)
+    out = list(sessions.items())
+    return out[:limit] if limit else out
+
+
+class CachedLLM:
+    """LLM real con caché en disco por (prompt de sistema, mensaje)."""
+
+    def __init__(self, path: Path, real: Callable[..., str]):
+        self.path = path
+        self.real = real
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.data: Dict[str, str] = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+
+    @staticmethod
+    def key(system_prompt: str, user_msg: str) -> str:
+        return hashlib.sha1(f"{system_prompt}\x00{user_msg}".encode("utf-8")).hexdigest()
+
+    def __call__(self, system_prompt: str, user_msg: str, site: str = "other") -> str:
+        k = self.key(system_prompt or "", user_msg or "")
+        with self.lock:
+            if k in self.data:
+                self.hits += 1
+                return self.data[k]
+        ans = self.real(system_prompt, user_msg, site=site)
+        with self.lock:
+            self.misses += 1
+            self.data[k] = ans
+        return ans
+
+    def save(self) -> None:
+        self.path.write_text(json.dumps(self.data, ensure_ascii=False, indent=0), encoding="utf-8")
+
+
+def _stub_llm(system_prompt: str, user_msg: str, site: str = "other") -> str:
+    return canned_answer(system_prompt, user_msg)
+
+
+def replay(sessions: List[Tuple[str, List[str]]], llm: Callable[..., str]) -> List[Dict[str, Any]]:
+    from fastapi import HTTPException
+    from backend.routers import chat
+    from backend.services.metrics import request_span
+    from backend.services import advice_cache
+
+    advice_cache.clear()   # cada corrida arranca en frío: resultados comparables entre ramas
+    original_llm, original_log = chat.llm_chat, chat._log_conversation_safe
+    chat.llm_chat = llm
+    chat._log_conversation_safe = lambda *a, **k: None
+    turns: List[Dict[str, Any]] = []
+    try:
+        for sid, messages in sessions:
+            replay_sid = f"replay-{sid}"
+            chat._SESS.pop(replay_sid, None)
+            for i, msg in enumerate(messages):
+                t0 = time.perf_counter()
+                content, products, error = "", [], None
+                with request_span("replay") as state:
+                    try:
+                        out = chat._chat_turn(chat.ChatIn(session_id=replay_sid, message=msg))
+                        content = out.content
+                        products = [p.get("code") or p.get("name") for p in out.products]
+                    except HTTPException as e:
+                        error = f"http_{e.status_code}"
+                    except Exception as e:
+                        error = type(e).__name__
+                turns.append({
+                    "session": sid, "turn": i, "message": msg, "branch": state["branch"],
+                    "latency": time.perf_counter() - t0, "content": content,
+                    "products": products, "error": error,
+                })
+    finally:
+        chat.llm_chat, chat._log_conversation_safe = original_llm, original_log
+    return turns
+
+
+def summarize(turns: List[Dict[str, Any]]) -> Dict[str, Any]:
+    by_branch: Dict[str, List[float]] = defaultdict(list)
+    for t in turns:
+        by_branch[t["branch"]].append(t["latency"])
+    return {
+        "sessions": len({t["session"] for t in turns}),
+        "turns": len(turns),
+        "errors": sum(1 for t in turns if t["error"]),
+        "latency": latency_summary(t["latency"] for t in turns),
+        "branches": dict(Counter(t["branch"] for t in turns).most_common()),
+        "by_branch": {b: latency_summary(v) for b, v in sorted(by_branch.items())},
+    }
+
+
+def diff(old: Dict[str, Any], new: Dict[str, Any], show: int = 20) -> Dict[str, Any]:
+    """Cambios de rama, contenido y productos por (sesión, turno) entre dos corridas."""
+    old_turns = {(t["session"], t["turn"]): t for t in old["turns"]}
+    changes: Dict[str, List[Dict[str, Any]]] = {"branch": [], "products": [], "content": []}
+    missing = 0
+    for t in new["turns"]:
+        o = old_turns.get((t["session"], t["turn"]))
+        if o is None:
+            missing += 1
+            continue
+        base = {"session": t["session"], "turn": t["turn"], "message": t["message"]}
+        if o["branch"] != t["branch"]:
+            changes["branch"].append({**base, "old": o["branch"], "new": t["branch"]})
+        elif o["products"] != t["products"]:
+            changes["products"].append({**base, "old": o["products"], "new": t["products"]})
+        elif o["content"] != t["content"]:
+            changes["content"].append({**base, "old": o["content"], "new": t["content"]})
+
+    lat_old, lat_new = old["summary"]["latency"], new["summary"]["latency"]
+    return {
+        "compared_turns": len(new["turns"]) - missing,
+        "unmatched_turns": missing,
+        "changed": {k: len(v) for k, v in changes.items()},
+        "latency_delta_ms": {k: round(lat_new[k] - lat_old[k], 3) for k in ("p50_ms", "p95_ms", "p99_ms", "mean_ms")},
+        "branches_old": old["summary"]["branches"],
+        "branches_new": new["summary"]["branches"],
+        "examples": {k: v[:show] for k, v in changes.items()},
+    }
+
+
+def _cmd_run(args: argparse.Namespace) -> None:
+    sessions = load_sessions(Path(args.db), args.limit, args.session)
+    cache: Optional[CachedLLM] = None
+    if args.llm == "stub":
+        llm: Callable[..., str] = _stub_llm
+    else:
+        from backend.services.openai_client import chat as real_llm
+        if args.llm == "cache":
+            cache = CachedLLM(Path(args.llm_cache), real_llm)
+            llm = cache
+        else:
+            llm = real_llm
+
+    t0 = time.perf_counter()
+    turns = []
+    for _ in range(max(1, args.repeat)):
+        turns = replay(sessions, llm)
+    wall = time.perf_counter() - t0
+    if cache is not None:
+        cache.save()
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "db": str(args.db),
+        "llm": args.llm,
+        "wall_s": round(wall, 3),
+        "summary": summarize(turns),
+        "turns": [{**t, "latency": round(t["latency"], 6)} for t in turns],
+    }
+    if cache is not None:
+        report["llm_cache"] = {"hits": cache.hits, "misses": cache.misses}
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=1, ensure_ascii=False), encoding="utf-8")
+    print(json.dumps({k: v for k, v in report.items() if k != "turns"}, indent=2, ensure_ascii=False))
+
+
+def _cmd_diff(args: argparse.Namespace) -> None:
+    old = json.loads(Path(args.old).read_text(encoding="utf-8"))
+    new = json.loads(Path(args.new).read_text(encoding="utf-8"))
+    out = diff(old, new, args.show)
+    print(json.dumps(out, indent=2, ensure_ascii=False))
+    if args.fail_on_change and any(out["changed"].values()):
+        sys.exit(1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay de conversaciones de chat.db por el pipeline de /chat.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    run = sub.add_parser("run", help="reproducir sesiones y medir")
+    run.add_argument("--db", default=str(DEFAULT_DB))
+    run.add_argument("--limit", type=int, default=None, help="máximo de sesiones")
+    run.add_argument("--session", default=None, help="solo esta sesión")
+    run.add_argument("--llm", choices=("stub", "cache", "live"), default="stub")
+    run.add_argument("--llm-cache", default="bench/llm_cache.json")
+    run.add_argument("--repeat", type=int, default=1, help="repeticiones (se reporta la última, ya caliente)")
+    run.add_argument("--out", default=None, help="guardar reporte con todos los turnos (para diff)")
+    run.set_defaults(fn=_cmd_run)
+
+    d = sub.add_parser("diff", help="comparar dos reportes de run")
+    d.add_argument("old")
+    d.add_argument("new")
+    d.add_argument("--show", type=int, default=20, help="ejemplos por tipo de cambio")
+    d.add_argument("--fail-on-change", action="store_true", help="salir con código 1 si hay cambios")
+    d.set_defaults(fn=_cmd_diff)
+
+    args = parser.parse_args()
+    args.fn(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Benchmark de búsqueda sobre catálogos sintéticos (bench.catalog_gen).
+
+Por cada tamaño de catálogo y cada motor registrado en
+backend.services.search_engines mide tres rutas:
+- search:        motor(products, query, limit=12)
+- filtered_page: chat._filtered_page con el motor, incluida la paginación de "ver más"
+- code_lookup:   trie de códigos (code_trie.for_catalog) + find / pick y código exacto,
+                 tal como lo hace cada turno de /chat
+
+Reporta p50/p95/p99, throughput, tiempo de construcción del índice y memoria
+(pico de tracemalloc durante la construcción y tamaño profundo del índice).
+
+    python -m bench.search_bench --sizes 1000,10000 --queries 100 --json out.json
+    python -m bench.search_bench --sizes 1000 --compare base.json
+"""
+from __future__ import annotations
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from bench.catalog_gen import generate, query_corpus
+from bench.stats import latency_summary
+from backend.routers import chat
+from backend.services import code_trie, search_engines, search_service
+from backend.services.memory_report import deep_sizeof
+
+OPS = ("search", "filtered_page", "code_lookup")
+
+
+def _summary(latencies: List[float], wall: float) -> Dict[str, Any]:
+    out = latency_summary(latencies)
+    out["qps"] = round(len(latencies) / wall, 2) if wall > 0 else 0.0
+    return out
+
+
+@contextmanager
+def _engine_in_chat(engine: Callable):
+    """_filtered_page llama a chat.search_candidates: se sustituye durante la medición."""
+    original = chat.search_candidates
+    chat.search_candidates = engine
+    try:
+        yield
+    finally:
+        chat.search_candidates = original
+
+
+def _reset_index() -> None:
+    search_service._BUILT = False
+    search_service._INDEX = []
+    search_service._VOCAB = set()
+
+
+def _code_lookup(products: List[Dict[str, Any]], q: str) -> Optional[Dict[str, Any]]:
+    idx = code_trie.for_catalog(products, id(products))   # una versión por catálogo sintético
+    hit = idx.find(q)
+    if hit:
+        return idx.pick(hit, q)
+    sc = chat._single_code_token_raw(q)
+    if sc:
+        return idx.exact_norm(sc[1])
+    return None
+
+
+def _run_op(op: str, engine: Callable, products: List[Dict[str, Any]],
+            queries: List[Dict[str, Any]], budget_s: float) -> Dict[str, Any]:
+    lat: List[float] = []
+    t_start = time.perf_counter()
+    for q in queries:
+        t0 = time.perf_counter()
+        if op == "search":
+            engine(products, q["query"], 12)
+        elif op == "filtered_page":
+            with _engine_in_chat(engine):
+                chat._filtered_page(products, q["query"], q["page"], filter_tokens=[], hard_tags=[])
+        else:
+            _code_lookup(products, q["query"])
+        lat.append(time.perf_counter() - t0)
+        if budget_s and time.perf_counter() - t_start > budget_s:
+            break
+    out = _summary(lat, time.perf_counter() - t_start)
+    out["truncated"] = len(lat) < len(queries)
+    return out
+
+
+def bench_size(size: int, engines: List[str], n_queries: int, ops: List[str],
+               budget_s: float, seed: int) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    catalog = generate(size, seed)
+    products = list(catalog.values())
+    queries = query_corpus(catalog, n_queries, seed)
+    gen_s = time.perf_counter() - t0
+
+    result: Dict[str, Any] = {"size": size, "queries": len(queries), "generate_s": round(gen_s, 3), "engines": {}}
+    for name in engines:
+        engine = search_engines.get_engine(name)
+        _reset_index()
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        engine(products, "warmup", 1)   # construye índice/vocabulario del motor
+        build_s = time.perf_counter() - t0
+        _cur, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        per_engine: Dict[str, Any] = {
+            "index_build_s": round(build_s, 3),
+            "index_build_peak_bytes": peak,
+            "index_bytes": deep_sizeof([search_service._INDEX, search_service._VOCAB, search_service._DF]),
+            "ops": {},
+        }
+        for op in ops:
+            per_engine["ops"][op] = _run_op(op, engine, products, queries, budget_s)
+            print(f"[search_bench] size={size} engine={name} op={op} "
+                  f"p50={per_engine['ops'][op]['p50_ms']}ms p95={per_engine['ops'][op]['p95_ms']}ms "
+                  f"qps={per_engine['ops'][op]['qps']}", file=sys.stderr)
+        result["engines"][name] = per_engine
+    return result
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def compare(base: Dict[str, Any], new: Dict[str, Any]) -> List[str]:
+    """Delta de p50/p95/p99 por tamaño/motor/ruta entre dos reportes JSON."""
+    lines = []
+    base_by_size = {r["size"]: r for r in base.get("results", [])}
+    for r in new.get("results", []):
+        b = base_by_size.get(r["size"])
+        if not b:
+            continue
+        for eng, data in r["engines"].items():
+            beng = b["engines"].get(eng)
+            if not beng:
+                continue
+            for op, stats in data["ops"].items():
+                bstats = beng["ops"].get(op)
+                if not bstats:
+                    continue
+                deltas = []
+                for k in ("p50_ms", "p95_ms", "p99_ms"):
+                    old, cur = bstats[k], stats[k]
+                    pct = (cur - old) / old * 100 if old else 0.0
+                    deltas.append(f"{k[:-3]} {old:.2f}→{cur:.2f}ms ({pct:+.1f}%)")
+                lines.append(f"size={r['size']} {eng}/{op}: " + ", ".join(deltas))
+    return lines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de búsqueda con catálogos sintéticos.")
+    parser.add_argument("--sizes", default="1000", help="tamaños separados por coma (p. ej. 1000,10000,100000,1000000)")
+    parser.add_argument("--engines", default=",".join(search_engines.available_engines()))
+    parser.add_argument("--ops", default=",".join(OPS))
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--budget-s", type=float, default=60.0,
+                        help="tiempo máximo por ruta y tamaño (0 = sin límite); útil en 100k/1M")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", dest="json_out", default=None, help="guardar el reporte en JSON")
+    parser.add_argument("--compare", default=None, help="reporte JSON previo contra el que comparar")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    engines = [e.strip() for e in args.engines.split(",") if e.strip()]
+    ops = [o.strip() for o in args.ops.split(",") if o.strip() in OPS]
+
+    report = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "params": {"queries": args.queries, "seed": args.seed, "budget_s": args.budget_s},
+        "results": [bench_size(n, engines, args.queries, ops, args.budget_s, args.seed) for n in sizes],
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            base = json.load(f)
+        for line in compare(base, report):
+            print(line, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
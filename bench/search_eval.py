@@ -0,0 +1,199 @@
+"""
+Evaluación de calidad y latencia de búsqueda con consultas doradas
+(bench/golden_queries.json: consulta → códigos relevantes).
+
+Por cada motor de backend.services.search_engines calcula:
+- recall@k  : relevantes en el top k / min(k, nº de relevantes)
+- MRR       : 1 / posición del primer relevante (0 si no aparece en el top 10)
+- hit@1     : el primer resultado es relevante
+- zero_rate : fracción de consultas sin ningún resultado
+y la latencia p50/p95/p99, en total y por tipo de consulta. Antes de medir
+verifica que cada código relevante exista en el catálogo (si no, sale con 1).
+
+Con varios motores se reporta el delta de cada uno contra "baseline", y
+--compare contrasta contra un reporte previo (p. ej. antes de tocar _score).
+
+    python -m bench.search_eval
+    python -m bench.search_eval --engines baseline,inverted --json eval.json
+    python -m bench.search_eval --compare eval_main.json --max-recall-drop 0.02
+"""
+from __future__ import annotations
+import argparse
+import json
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from bench.stats import latency_summary
+from backend.services import search_engines
+from backend.services.product_loader import load_products
+
+GOLDEN_PATH = Path(__file__).resolve().parent / "golden_queries.json"
+MRR_DEPTH = 10
+
+
+def _code(p: Dict[str, Any]) -> Optional[str]:
+    return p.get("code") or p.get("sku") or p.get("id")
+
+
+def missing_codes(golden: Dict[str, Any], products: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+    """Códigos relevantes que no están en el catálogo, por id de consulta (un juicio así nunca puede acertar)."""
+    codes = {_code(p) for p in products}
+    out: Dict[str, List[str]] = {}
+    for q in golden.get("queries", []):
+        bad = [c for c in q["relevant"] if c not in codes]
+        if bad:
+            out[q["id"]] = bad
+    return out
+
+
+def score_query(ranked: List[Optional[str]], relevant: List[str], k: int) -> Dict[str, float]:
+    rel = set(relevant)
+    top_k = ranked[:k]
+    found = sum(1 for c in top_k if c in rel)
+    rr = 0.0
+    for i, c in enumerate(ranked[:MRR_DEPTH], start=1):
+        if c in rel:
+            rr = 1.0 / i
+            break
+    return {
+        "recall": found / min(k, len(rel)) if rel else 0.0,
+        "rr": rr,
+        "hit1": 1.0 if ranked and ranked[0] in rel else 0.0,
+        "zero": 1.0 if not ranked else 0.0,
+    }
+
+
+def _aggregate(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    n = len(rows) or 1
+    out = {
+        "queries": len(rows),
+        "recall_at_k": round(sum(r["recall"] for r in rows) / n, 4),
+        "mrr": round(sum(r["rr"] for r in rows) / n, 4),
+        "hit_at_1": round(sum(r["hit1"] for r in rows) / n, 4),
+        "zero_rate": round(sum(r["zero"] for r in rows) / n, 4),
+    }
+    out["latency"] = latency_summary(r["latency"] for r in rows)
+    return out
+
+
+def evaluate(engine_name: str, products: List[Dict[str, Any]], golden: Dict[str, Any],
+             repeat: int = 1) -> Dict[str, Any]:
+    engine = search_engines.get_engine(engine_name)
+    k = int(golden.get("k", 5))
+    engine(products, "warmup", 1)   # índice construido fuera de la medición
+
+    rows: List[Dict[str, Any]] = []
+    for q in golden["queries"]:
+        best = float("inf")
+        results: List[Dict[str, Any]] = []
+        for _ in range(max(1, repeat)):
+            t0 = time.perf_counter()
+            results = engine(products, q["query"], max(k, MRR_DEPTH))
+            best = min(best, time.perf_counter() - t0)
+        ranked = [_code(p) for p in results]
+        rows.append({**score_query(ranked, q["relevant"], k), "latency": best,
+                     "id": q["id"], "kind": q.get("kind", "other"), "top": ranked[:k]})
+
+    by_kind: Dict[str, List] = defaultdict(list)
+    for r in rows:
+        by_kind[r["kind"]].append(r)
+    return {
+        "k": k,
+        "overall": _aggregate(rows),
+        "by_kind": {kind: _aggregate(v) for kind, v in sorted(by_kind.items())},
+        "per_query": [
+            {"id": r["id"], "recall": round(r["recall"], 3), "rr": round(r["rr"], 3),
+             "top": r["top"], "latency_ms": round(r["latency"] * 1000, 3)}
+            for r in rows
+        ],
+    }
+
+
+def quality_delta(base: Dict[str, Any], cur: Dict[str, Any]) -> Dict[str, Any]:
+    """Diferencias de calidad (cur - base) y consultas cuyo recall cambió."""
+    b, c = base["overall"], cur["overall"]
+    per_base = {q["id"]: q for q in base.get("per_query", [])}
+    changed = [
+        {"id": q["id"], "recall": [per_base[q["id"]]["recall"], q["recall"]],
+         "rr": [per_base[q["id"]]["rr"], q["rr"]]}
+        for q in cur.get("per_query", [])
+        if q["id"] in per_base and (q["recall"], q["rr"]) != (per_base[q["id"]]["recall"], per_base[q["id"]]["rr"])
+    ]
+    return {
+        "recall_at_k": round(c["recall_at_k"] - b["recall_at_k"], 4),
+        "mrr": round(c["mrr"] - b["mrr"], 4),
+        "hit_at_1": round(c["hit_at_1"] - b["hit_at_1"], 4),
+        "zero_rate": round(c["zero_rate"] - b["zero_rate"], 4),
+        "p50_ms": round(c["latency"]["p50_ms"] - b["latency"]["p50_ms"], 3),
+        "p95_ms": round(c["latency"]["p95_ms"] - b["latency"]["p95_ms"], 3),
+        "changed_queries": changed,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Calidad (recall@k, MRR, cero resultados) y latencia de búsqueda.")
+    parser.add_argument("--golden", default=str(GOLDEN_PATH))
+    parser.add_argument("--engines", default=",".join(search_engines.available_engines()))
+    parser.add_argument("--repeat", type=int, default=3, help="repeticiones por consulta (se toma la mejor)")
+    parser.add_argument("--json", dest="json_out", default=None, help="guardar el reporte en JSON")
+    parser.add_argument("--compare", default=None, help="reporte previo contra el que comparar")
+    parser.add_argument("--max-recall-drop", type=float, default=None,
+                        help="salir con código 1 si recall@k cae más que esto frente a baseline/--compare")
+    args = parser.parse_args()
+
+    golden = json.loads(Path(args.golden).read_text(encoding="utf-8"))
+    catalog, _ = load_products()
+    products = list(catalog.values())
+    engines = [e.strip() for e in args.engines.split(",") if e.strip()]
+
+    missing = missing_codes(golden, products)
+    if missing:
+        for qid, codes in missing.items():
+            print(f"[search_eval] {qid}: códigos relevantes fuera del catálogo: {', '.join(codes)}", file=sys.stderr)
+        sys.exit(1)
+
+    report: Dict[str, Any] = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "golden": str(args.golden),
+        "catalog_size": len(products),
+        "engines": {name: evaluate(name, products, golden, args.repeat) for name in engines},
+    }
+    base_name = search_engines.DEFAULT_ENGINE
+    if base_name in report["engines"]:
+        for name, res in report["engines"].items():
+            if name != base_name:
+                res["vs_baseline"] = quality_delta(report["engines"][base_name], res)
+
+    previous = None
+    if args.compare:
+        previous = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        for name, res in report["engines"].items():
+            if name in previous.get("engines", {}):
+                res["vs_previous"] = quality_delta(previous["engines"][name], res)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.json_out:
+        Path(args.json_out).write_text(text, encoding="utf-8")
+
+    failed = False
+    for name, res in report["engines"].items():
+        o = res["overall"]
+        print(f"[search_eval] {name}: recall@{res['k']}={o['recall_at_k']:.3f} mrr={o['mrr']:.3f} "
+              f"hit@1={o['hit_at_1']:.3f} zero={o['zero_rate']:.3f} "
+              f"p50={o['latency']['p50_ms']}ms p95={o['latency']['p95_ms']}ms", file=sys.stderr)
+        if args.max_recall_drop is not None:
+            for key in ("vs_baseline", "vs_previous"):
+                if key in res and -res[key]["recall_at_k"] > args.max_recall_drop:
+                    print(f"[search_eval] {name}: recall@k cae {-res[key]['recall_at_k']:.3f} ({key})", file=sys.stderr)
+                    failed = True
+    if not args.json_out:
+        print(text)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""Percentiles y resúmenes de latencia compartidos por los benchmarks."""
+from __future__ import annotations
+import statistics
+from typing import Any, Dict, Iterable, List
+
+
+def percentile(sorted_vals: List[float], pct: float) -> float:
+    """Percentil con interpolación lineal sobre una lista ya ordenada."""
+    if not sorted_vals:
+        return 0.0
+    k = (len(sorted_vals) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_vals) - 1)
+    return sorted_vals[lo] + (sorted_vals[hi] - sorted_vals[lo]) * (k - lo)
+
+
+def latency_summary(latencies: Iterable[float], digits: int = 3) -> Dict[str, Any]:
+    """n, p50/p95/p99, media y máximo en milisegundos (latencias en segundos)."""
+    s = sorted(latencies)
+    ms = lambda x: round(x * 1000, digits)
+    return {
+        "n": len(s),
+        "p50_ms": ms(percentile(s, 50)),
+        "p95_ms": ms(percentile(s, 95)),
+        "p99_ms": ms(percentile(s, 99)),
+        "mean_ms": ms(statistics.fmean(s)) if s else 0.0,
+        "max_ms": ms(s[-1]) if s else 0.0,
+    }
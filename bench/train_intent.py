@@ -0,0 +1,198 @@
+"""
+Entrena el clasificador local de ruteo (backend.services.intent_model) con
+los mensajes de usuario registrados en chat.db.
+
+Cada mensaje distinto se etiqueta con las mismas funciones del pipeline
+(_llm_intent y _llm_product_mode, mismos prompts) contra el LLM elegido con
+--llm (stub | cache | live, como bench.replay). Luego:
+
+- validación cruzada k-fold: acuerdo con el LLM, cobertura y acuerdo efectivo
+  (modelo si supera el umbral, LLM si no) para varios umbrales;
+- latencia: predicción local vs llamada al LLM medida al etiquetar, y ahorro
+  estimado por turno;
+- entrena con todo y guarda el modelo (por defecto en bench/intent_model.json;
+  para ponerlo en producción, --out con la ruta de ECOLITE_INTENT_MODEL).
+  Con --llm stub las etiquetas son de juguete: no se permite escribir el
+  modelo que carga la aplicación.
+
+    python -m bench.train_intent --llm cache --json intent_report.json
+    python -m bench.train_intent --llm live --min-conf 0.9 --out backend/data/intent_model.json
+"""
+from __future__ import annotations
+import argparse
+import json
+import random
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from bench.replay import DEFAULT_DB, CachedLLM, _stub_llm, load_sessions
+from backend.services import intent_model, llm_telemetry
+from backend.services.intent_model import NaiveBayes, TASKS
+
+# Salida por defecto: fuera de la ruta que carga la app (ECOLITE_INTENT_MODEL)
+BENCH_MODEL_PATH = Path(__file__).resolve().parent / "intent_model.json"
+THRESHOLDS = (0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 0.99)
+
+
+def load_messages(db_path: Path, extra: Optional[Path] = None) -> List[str]:
+    """Mensajes de usuario distintos (en orden de aparición), más los de --extra."""
+    msgs = [m for _, turns in load_sessions(db_path) for m in turns]
+    if extra:
+        msgs += [l for l in extra.read_text(encoding="utf-8").splitlines() if l.strip()]
+    return list(dict.fromkeys(m.strip() for m in msgs if m.strip()))
+
+
+def label(messages: List[str], llm: Callable[..., str]) -> Tuple[Dict[str, List[str]], Dict[str, float]]:
+    """
+    Etiquetas del LLM por tarea y latencia media (s) por llamada: la upstream
+    de llm_telemetry si hubo llamadas reales (live o faltas de caché), si no la medida.
+    """
+    from backend.routers import chat
+
+    fns = {"intent": chat._llm_intent, "product_mode": chat._llm_product_mode}
+    labels: Dict[str, List[str]] = {task: [] for task in TASKS}
+    spent = {task: 0.0 for task in TASKS}
+    original = chat.llm_chat
+    chat.llm_chat = llm
+    intent_model.set_models(None)   # etiquetar siempre con el LLM
+    try:
+        for msg in messages:
+            for task in TASKS:
+                t0 = time.perf_counter()
+                labels[task].append(fns[task](msg))
+                spent[task] += time.perf_counter() - t0
+    finally:
+        chat.llm_chat = original
+        intent_model.load()
+    n = len(messages) or 1
+    sites = llm_telemetry.snapshot()["sites"]
+    latency = {}
+    for task in TASKS:
+        upstream_ms = sites.get(intent_model.TASK_SITES[task], {}).get("latency_avg_ms", 0.0)
+        latency[task] = upstream_ms / 1000 if upstream_ms else spent[task] / n
+    return labels, latency
+
+
+def cross_validate(docs: List[List[str]], ys: List[str], labels: Tuple[str, ...],
+                   folds: int, seed: int) -> List[Tuple[str, str, float]]:
+    """[(etiqueta LLM, predicción, confianza)] de cada mensaje cuando quedó fuera del entrenamiento."""
+    idx = list(range(len(docs)))
+    random.Random(seed).shuffle(idx)
+    k = max(2, min(folds, len(idx)))
+    out: List[Tuple[str, str, float]] = []
+    for f in range(k):
+        held = set(idx[f::k])
+        model = NaiveBayes(labels).fit((docs[i] for i in idx if i not in held),
+                                       (ys[i] for i in idx if i not in held))
+        for i in sorted(held):
+            pred, conf = model.predict(docs[i])
+            out.append((ys[i], pred, conf))
+    return out
+
+
+def threshold_table(rows: List[Tuple[str, str, float]]) -> List[Dict[str, Any]]:
+    n = len(rows) or 1
+    table = []
+    for th in THRESHOLDS:
+        covered = [(y, p) for y, p, c in rows if c >= th]
+        wrong = sum(1 for y, p in covered if y != p)
+        table.append({
+            "min_conf": th,
+            "coverage": round(len(covered) / n, 4),
+            "agreement_covered": round(1 - wrong / len(covered), 4) if covered else None,
+            # con fallback al LLM solo fallan las predicciones locales equivocadas
+            "agreement_effective": round(1 - wrong / n, 4),
+        })
+    return table
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Entrenar el clasificador local de intención/modo con chat.db.")
+    parser.add_argument("--db", default=str(DEFAULT_DB))
+    parser.add_argument("--extra", default=None, help="archivo con mensajes adicionales (uno por línea)")
+    parser.add_argument("--llm", choices=("stub", "cache", "live"), default="stub")
+    parser.add_argument("--llm-cache", default="bench/llm_cache.json")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--min-conf", type=float, default=intent_model.MIN_CONF,
+                        help="umbral con el que se reporta el ahorro (en runtime: ECOLITE_INTENT_MIN_CONF)")
+    parser.add_argument("--out", default=str(BENCH_MODEL_PATH),
+                        help="dónde guardar el modelo (la app carga ECOLITE_INTENT_MODEL)")
+    parser.add_argument("--json", dest="json_out", default=None, help="guardar el reporte en JSON")
+    args = parser.parse_args()
+
+    if args.llm == "stub" and Path(args.out).resolve() == intent_model.MODEL_PATH.resolve():
+        sys.exit("[train_intent] --llm stub no puede escribir el modelo de producción "
+                 f"({intent_model.MODEL_PATH}); usa --llm cache/live u otro --out")
+
+    messages = load_messages(Path(args.db), Path(args.extra) if args.extra else None)
+    if not messages:
+        sys.exit("[train_intent] no hay mensajes para entrenar")
+
+    cache: Optional[CachedLLM] = None
+    if args.llm == "stub":
+        llm: Callable[..., str] = _stub_llm
+    else:
+        from backend.services.openai_client import chat as real_llm
+        if args.llm == "cache":
+            cache = CachedLLM(Path(args.llm_cache), real_llm)
+            llm = cache
+        else:
+            llm = real_llm
+    ys, llm_latency = label(messages, llm)
+    if cache is not None:
+        cache.save()
+
+    docs = [intent_model.tokens(m) for m in messages]
+    models: Dict[str, NaiveBayes] = {}
+    tasks: Dict[str, Any] = {}
+    for task, labels in TASKS.items():
+        rows = cross_validate(docs, ys[task], labels, args.folds, args.seed)
+        table = threshold_table(rows)
+        at = min(table, key=lambda r: abs(r["min_conf"] - args.min_conf))
+        models[task] = model = NaiveBayes(labels).fit(docs, ys[task])
+
+        t0 = time.perf_counter()
+        for m in messages:
+            model.predict(intent_model.tokens(m))
+        predict_s = (time.perf_counter() - t0) / len(messages)
+
+        tasks[task] = {
+            "labels": dict(Counter(ys[task]).most_common()),
+            "agreement_argmax": round(sum(1 for y, p, _ in rows if y == p) / len(rows), 4),
+            "thresholds": table,
+            "at_min_conf": at,
+            "llm_latency_ms": round(llm_latency[task] * 1000, 3),
+            "model_latency_us": round(predict_s * 1e6, 2),
+            "saved_ms_per_turn": round(at["coverage"] * (llm_latency[task] - predict_s) * 1000, 3),
+        }
+
+    intent_model.save(models, Path(args.out), messages=len(messages), llm=args.llm,
+                      db=str(args.db), min_conf_hint=args.min_conf)
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "db": str(args.db),
+        "messages": len(messages),
+        "llm": args.llm,
+        "model": str(args.out),
+        "min_conf": args.min_conf,
+        "tasks": tasks,
+    }
+    if cache is not None:
+        report["llm_cache"] = {"hits": cache.hits, "misses": cache.misses}
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.json_out:
+        Path(args.json_out).write_text(text, encoding="utf-8")
+    print(text)
+    for task, t in tasks.items():
+        a = t["at_min_conf"]
+        print(f"[train_intent] {task}: acuerdo={t['agreement_argmax']:.3f} cobertura@{a['min_conf']}={a['coverage']:.3f} "
+              f"acuerdo_efectivo={a['agreement_effective']:.3f} llm={t['llm_latency_ms']}ms "
+              f"modelo={t['model_latency_us']}µs ahorro≈{t['saved_ms_per_turn']}ms/turno", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
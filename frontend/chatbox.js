@@ -751,9 +751,19 @@ function wireChat() {
     var btn = refs.leadForm.querySelector(".lead-submit");
     if (btn) btn.disabled = true;
 
+    // Misma clave para reintentos del mismo formulario: el backend no duplica el lead
+    if (!refs.leadForm.dataset.idemKey) {
+      refs.leadForm.dataset.idemKey = (window.crypto && crypto.randomUUID)
+        ? crypto.randomUUID()
+        : (Date.now().toString(36) + Math.random().toString(36).slice(2));
+    }
+
     fetch(LEADS_URL, {
       method: "POST",
-      headers: { "Content-Type": "application/json" },
+      headers: {
+        "Content-Type": "application/json",
+        "Idempotency-Key": refs.leadForm.dataset.idemKey,
+      },
       body: JSON.stringify(data),
     })
       .then(function (r) { return r.json(); })
@@ -1,6 +1,5 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 
 # Routers (están en backend/routers/)
@@ -11,6 +10,10 @@ from backend.routers import leads as leads_router
 
 # Servicios (producto)
 from backend.services.product_loader import load_products
+from backend.services.static_assets import CachedStaticFiles, FRONTEND_DIR
+from backend.services import lead_outbox
+from backend.services.openai_client import BREAKER as llm_breaker
+from backend.services import llm_admission
 
 
 app = FastAPI(title="Ecolite Assistant", version="3.3")
@@ -30,15 +33,29 @@ app.include_router(chat_router.router)
 if leads_router:
     app.include_router(leads_router.router)
 from backend.routers import history as history_router
+from backend.routers import metrics as metrics_router
+from backend.routers import admin as admin_router
+from backend.routers import search as search_router
 
 app.include_router(history_router.router)
+app.include_router(metrics_router.router)
+app.include_router(admin_router.router)
+app.include_router(search_router.router)
 
-# Archivos estáticos (frontend)
+# Archivos estáticos (frontend); con ?v=<hash> se sirven con caché inmutable
 try:
-    app.mount("/static", StaticFiles(directory="frontend"), name="static")
+    app.mount("/static", CachedStaticFiles(directory=str(FRONTEND_DIR)), name="static")
 except Exception:
     pass
 
+@app.on_event("startup")
+async def _start_lead_outbox():
+    lead_outbox.start_worker()
+
+@app.on_event("shutdown")
+async def _stop_lead_outbox():
+    await lead_outbox.stop_worker()
+
 @app.get("/")
 def index():
     try:
@@ -48,7 +65,11 @@ def index():
 
 @app.get("/healthz")
 def healthz():
-    return {"ok": True}
+    # El breaker abierto no tumba la instancia: el chat sigue con respuestas de respaldo
+    breaker = llm_breaker.snapshot()
+    admission = llm_admission.snapshot()
+    degraded = breaker["state"] != "closed" or llm_admission.degrade_reason() is not None
+    return {"ok": True, "degraded": degraded, "llm_breaker": breaker, "llm_admission": admission}
 
 @app.get("/__debug/catalog")
 def debug_catalog():
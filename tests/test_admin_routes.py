@@ -0,0 +1,29 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.routers import admin, leads
+from backend.services import lead_outbox
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(lead_outbox, "LEADS_DB_PATH", tmp_path / "leads.db")
+    monkeypatch.setenv("ECOLITE_ADMIN_TOKEN", "secreto")
+    app = FastAPI()
+    app.include_router(admin.router)
+    app.include_router(leads.router)
+    return TestClient(app)
+
+
+def test_outbox_stats_require_admin(client):
+    assert client.get("/__debug/outbox").status_code == 403
+    assert client.get("/__debug/outbox", headers={"X-Admin-Token": "otro"}).status_code == 403
+    lead_outbox.enqueue_lead({"name": "Ana"})
+    r = client.get("/__debug/outbox", headers={"X-Admin-Token": "secreto"})
+    assert r.status_code == 200
+    assert r.json() == {"pending": 1, "sent": 0, "dead": 0}
+
+
+def test_outbox_is_not_public(client):
+    assert client.get("/leads/outbox").status_code in (404, 405)
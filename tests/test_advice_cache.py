@@ -0,0 +1,51 @@
+import pytest
+
+from backend.services import advice_cache
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(advice_cache, "ENABLED", True)
+    advice_cache.clear()
+    yield
+    advice_cache.clear()
+
+
+def test_near_duplicate_hits():
+    advice_cache.store("qué luz para una bodega de 8 m", "Highbay de 150W.")
+    assert advice_cache.lookup("luces para bodegas de 8 m") == "Highbay de 150W."
+
+
+def test_other_scope_misses():
+    advice_cache.store("qué luz para una bodega de 8 m", "Highbay de 150W.", system_prompt="a")
+    assert advice_cache.lookup("qué luz para una bodega de 8 m", system_prompt="b") is None
+
+
+@pytest.mark.parametrize("stored, asked", [
+    ("bodega con polvo", "bodega sin polvo"),
+    ("bodega sin polvo", "bodega con polvo"),
+    ("reflector para bodega de 8 m de altura con polvo", "reflector para bodega de 8 m de altura sin polvo"),
+    ("quiero luz fría para la oficina", "no quiero luz fría para la oficina"),
+    ("panel 60x60 ni blanco ni cálido", "panel 60x60 blanco cálido"),
+])
+def test_negation_is_not_a_duplicate(stored, asked):
+    assert "sin" not in advice_cache.STOPWORDS
+    advice_cache.store(stored, "respuesta previa.")
+    assert advice_cache.lookup(asked) is None
+
+
+def test_same_negation_still_hits():
+    advice_cache.store("reflector para bodega sin polvo", "IP65.")
+    assert advice_cache.lookup("reflectores para bodegas sin polvo") == "IP65."
+
+
+@pytest.mark.parametrize("stored, asked", [
+    ("necesito iluminar una bodega industrial grande con techo de 8 metros de altura para trabajo pesado",
+     "necesito iluminar una bodega industrial grande con techo de 15 metros de altura para trabajo pesado"),
+    ("panel 60x60 de 48w para oficina amplia con cielo falso", "panel 60x60 de 36w para oficina amplia con cielo falso"),
+    ("reflector 100w para cancha de futbol en exteriores", "reflector para cancha de futbol en exteriores"),
+])
+def test_different_numbers_are_not_duplicates(stored, asked):
+    advice_cache.store(stored, "respuesta previa.")
+    assert advice_cache.lookup(asked) is None
+
@@ -0,0 +1,68 @@
+import json
+import threading
+
+import pytest
+
+from backend.services import code_trie, product_loader
+
+
+@pytest.fixture
+def catalog_file(tmp_path, monkeypatch):
+    f = tmp_path / "productos.json"
+    monkeypatch.setattr(product_loader, "_CANDIDATES", [f])
+    monkeypatch.setattr(product_loader, "PRODUCTOS", {})
+    monkeypatch.setattr(product_loader, "VERSION", 0)
+    monkeypatch.setattr(product_loader, "_CURRENT", ({}, 0))
+    monkeypatch.setattr(code_trie, "_CURRENT", None)
+
+    def write(codes):
+        f.write_text(json.dumps([{"sku": c, "code": c, "name": c} for c in codes]), encoding="utf-8")
+    return write
+
+
+def test_version_bumps_with_each_load(catalog_file):
+    catalog_file(["ABC-1"])
+    catalog, version = product_loader.load_catalog()
+    assert version == product_loader.catalog_version() == 1
+    assert list(catalog) == ["ABC-1"]
+    assert product_loader.load_catalog() == (catalog, 1)   # cacheado, misma versión
+
+    catalog_file(["XYZ-9"])
+    product_loader.reload_products()
+    catalog, version = product_loader.load_catalog()
+    assert (list(catalog), version) == (["XYZ-9"], 2)
+
+
+def test_trie_follows_reload(catalog_file):
+    catalog_file(["ABC-1"])
+    catalog, version = product_loader.load_catalog()
+    assert code_trie.for_catalog(list(catalog.values()), version).exact("ABC1")
+
+    catalog_file(["XYZ-9"])   # mismo tamaño: solo la versión distingue los catálogos
+    product_loader.reload_products()
+    catalog, version = product_loader.load_catalog()
+    trie = code_trie.for_catalog(list(catalog.values()), version)
+    assert trie.exact("XYZ9") and not trie.exact("ABC1")
+
+
+def test_version_never_runs_ahead_of_catalog(catalog_file):
+    """Con recargas concurrentes, cada versión observada corresponde a su catálogo."""
+    catalog_file(["A-0"])
+    product_loader.load_products()
+    seen, stop = {}, threading.Event()
+
+    def reader():
+        while not stop.is_set():
+            catalog, version = product_loader.load_catalog()
+            seen.setdefault(version, set()).add(id(catalog))
+
+    readers = [threading.Thread(target=reader) for _ in range(3)]
+    for t in readers:
+        t.start()
+    for _ in range(30):
+        product_loader.reload_products()
+    stop.set()
+    for t in readers:
+        t.join(2)
+    assert all(len(ids) == 1 for ids in seen.values())
+    assert product_loader.load_catalog()[1] == product_loader.catalog_version() == 31
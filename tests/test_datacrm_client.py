@@ -0,0 +1,138 @@
+import asyncio
+
+import pytest
+
+from bench.fake_datacrm import FakeDataCRM, serve
+from backend.services import datacrm_client, lead_outbox
+from backend.services.datacrm_client import DataCRMClient, DataCRMError
+
+
+@pytest.fixture(scope="module")
+def server():
+    fake = FakeDataCRM(seed=1)
+    srv = serve(fake, port=0)
+    fake.base = f"http://127.0.0.1:{srv.server_port}"
+    yield fake
+    srv.shutdown()
+
+
+@pytest.fixture
+def crm(server):
+    server.fail_rate = 0.0
+    with server.lock:
+        server.sessions.clear()
+        server.contacts.clear()
+        server.stats.clear()
+    return server
+
+
+@pytest.fixture
+def client(crm, monkeypatch):
+    c = DataCRMClient(url=f"{crm.base}/webservice.php", user=crm.user, key=crm.access_key, timeout=5)
+    monkeypatch.setattr(datacrm_client, "_CLIENT", c)
+    monkeypatch.setattr(datacrm_client, "DATACRM_WFORM_URL", f"{crm.base}/index.php")
+    return c
+
+
+def test_session_is_reused_across_calls(crm, client):
+    for i in range(3):
+        assert client.create_contact({"lastname": f"Lead {i}"})["id"]
+    assert client.logins == 1
+    assert crm.stats["login"] == 1 and crm.stats["create"] == 3
+
+
+def test_expired_server_session_relogs_and_retries_once(crm, client):
+    client.create_contact({"lastname": "a"})
+    with crm.lock:
+        crm.sessions.clear()   # el servidor invalida la sesión antes del TTL local
+    assert client.create_contact({"lastname": "b"})["lastname"] == "b"
+    assert client.logins == 2
+    assert crm.stats["create_unauthorized"] == 1
+    assert len(crm.contacts) == 2
+
+
+def test_local_ttl_forces_new_login(crm, client):
+    client.session_ttl = 0
+    client.create_contact({"lastname": "a"})
+    client.create_contact({"lastname": "b"})
+    assert client.logins == 2
+
+
+def test_non_auth_error_does_not_relogin(crm, client):
+    client.create_contact({"lastname": "a"})
+    crm.fail_rate = 1.0
+    with pytest.raises(DataCRMError) as exc:
+        client.create_contact({"lastname": "b"})
+    assert exc.value.code == "DATABASE_QUERY_ERROR"
+    assert client.logins == 1
+
+
+def test_persistent_auth_error_gives_up_after_one_retry(crm, client, monkeypatch):
+    monkeypatch.setattr(crm, "create", lambda *a: {"success": False, "error": {"code": "INVALID_SESSIONID"}})
+    with pytest.raises(DataCRMError):
+        client.create_contact({"lastname": "a"})
+    assert client.logins == 2
+
+
+def test_bulk_send_uses_one_session_and_falls_back_per_lead(crm, client, monkeypatch):
+    real_create = crm.create
+    calls = []
+
+    def flaky(session, element_type, element):
+        calls.append(element)
+        if len(calls) == 2:
+            return {"success": False, "error": {"code": "DATABASE_QUERY_ERROR"}}
+        return real_create(session, element_type, element)
+    monkeypatch.setattr(crm, "create", flaky)
+
+    raws = [{"name": f"Lead {i}", "email": f"l{i}@x.co"} for i in range(3)]
+    assert datacrm_client.send_contacts_to_datacrm(raws) == [True, True, True]
+    assert client.logins == 1
+    assert crm.stats["form"] == 1   # solo el segundo fue por formulario
+    assert sorted((c["lastname"], c.get("via")) for c in crm.contacts) == [
+        ("Lead 0", None), ("Lead 1", "form"), ("Lead 2", None)]
+
+
+@pytest.fixture
+def outbox_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(lead_outbox, "LEADS_DB_PATH", tmp_path / "leads.db")
+    lead_outbox.init_outbox()
+
+
+def test_outbox_delivers_claims_in_bulk(crm, client, outbox_db, monkeypatch):
+    monkeypatch.setattr(lead_outbox, "CONCURRENCY", 2)
+    for i in range(6):
+        lead_outbox.enqueue_lead({"name": f"Lead {i}", "email": f"l{i}@x.co"})
+    assert asyncio.run(lead_outbox.drain_once()) == 6
+    assert lead_outbox.outbox_stats()["sent"] == 6
+    assert client.logins == 1
+    assert len(crm.contacts) == 6
+
+
+def test_outbox_maps_batch_results_to_rows(outbox_db):
+    ids = [lead_outbox.enqueue_lead({"name": n}) for n in ("a", "b", "c")]
+    seen = []
+
+    def batch(raws):
+        seen.append([r["name"] for r in raws])
+        return [r["name"] != "b" for r in raws]
+
+    asyncio.run(lead_outbox.drain_once(deliver_batch=batch))
+    assert seen and sorted(n for chunk in seen for n in chunk) == ["a", "b", "c"]
+    con = lead_outbox.connect()
+    try:
+        status = dict(con.execute("SELECT id, status FROM lead_outbox").fetchall())
+    finally:
+        con.close()
+    assert [status[i] for i in ids] == ["sent", "pending", "sent"]
+
+
+def test_outbox_batch_error_fails_whole_chunk(outbox_db):
+    lead_outbox.enqueue_lead({"name": "a"})
+    lead_outbox.enqueue_lead({"name": "b"})
+
+    def boom(raws):
+        raise RuntimeError("CRM caído")
+
+    asyncio.run(lead_outbox.drain_once(deliver_batch=boom))
+    assert lead_outbox.outbox_stats() == {"pending": 2, "sent": 0, "dead": 0}
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.services import keyword_automaton
+from backend.services.keyword_automaton import KeywordAutomaton, load_extra, merge
+
+
+def test_scan_matches_substring_semantics():
+    ka = KeywordAutomaton({"cotizar": {"cotiz", "presupuesto"}, "catalog": {"catalogo"}})
+    assert ka.scan("quiero cotizar un panel") == {"cotizar"}
+    assert ka.scan("mandame el catalogo y un presupuesto") == {"cotizar", "catalog"}
+    assert ka.scan("hola") == frozenset()
+
+
+def test_extra_words_are_normalized_like_scanned_text(tmp_path):
+    f = tmp_path / "kw.json"
+    f.write_text(json.dumps({"cotizar": ["  Cotización ", "PRESUPUÉSTAME", ""], "otra": ["x"]}), encoding="utf-8")
+    extra = load_extra(f)
+    assert extra["cotizar"] == ["cotizacion", "presupuestame"]
+    ka = KeywordAutomaton(merge({"cotizar": set()}, extra))
+    assert ka.scan("necesito una cotizacion") == {"cotizar"}
+
+
+@pytest.mark.parametrize("content", ['["cotizar"]', '{"cotizar": "cotiz"}', '{"cotizar": [1, 2]}', "{no es json"])
+def test_invalid_file(tmp_path, content):
+    f = tmp_path / "kw.json"
+    f.write_text(content, encoding="utf-8")
+    assert load_extra(f) == {}
+    with pytest.raises(ValueError):
+        load_extra(f, strict=True)
+
+
+def test_missing_file_is_empty(tmp_path):
+    assert load_extra(tmp_path / "no.json", strict=True) == {}
+
+
+@pytest.fixture
+def admin_client(monkeypatch, tmp_path):
+    from backend.routers import admin
+    from backend.services.admin_auth import require_admin
+
+    app = FastAPI()
+    app.include_router(admin.router)
+    app.dependency_overrides[require_admin] = lambda: None
+    f = tmp_path / "kw.json"
+    monkeypatch.setattr(keyword_automaton, "EXTRA_PATH", f)
+    before = admin.chat_router.ANALYZER.automaton
+    yield TestClient(app), f
+    admin.chat_router.ANALYZER.automaton = before
+
+
+def test_reload_rejects_bad_shape_and_keeps_automaton(admin_client):
+    client, f = admin_client
+    from backend.routers import chat
+    before = chat.ANALYZER.automaton
+    f.write_text('["cotizar"]', encoding="utf-8")
+    r = client.post("/__debug/keywords/reload")
+    assert r.status_code == 400
+    assert chat.ANALYZER.automaton is before
+
+
+def test_reload_adds_normalized_words(admin_client):
+    client, f = admin_client
+    from backend.routers import chat
+    f.write_text(json.dumps({"competitor": ["Lúmina Pro"]}), encoding="utf-8")
+    r = client.post("/__debug/keywords/reload")
+    assert r.status_code == 200
+    assert chat.ANALYZER.analyze("¿y la LÚMINA PRO es mejor?").competitor
@@ -0,0 +1,169 @@
+import asyncio
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from backend.services import lead_outbox, lead_store
+
+
+@pytest.fixture
+def leads_db(tmp_path, monkeypatch):
+    path = tmp_path / "leads.db"
+    monkeypatch.setattr(lead_outbox, "LEADS_DB_PATH", path)
+    monkeypatch.setattr(lead_store, "_READY", False)
+    lead_store.init_leads_db()
+    return path
+
+
+def _rows(path):
+    con = sqlite3.connect(path)
+    try:
+        return con.execute(
+            "SELECT id, email, phone, email_norm, phone_norm, idempotency_key, name FROM leads ORDER BY id"
+        ).fetchall()
+    finally:
+        con.close()
+
+
+def _queued(path):
+    con = sqlite3.connect(path)
+    try:
+        return con.execute("SELECT COUNT(*) FROM lead_outbox").fetchone()[0]
+    finally:
+        con.close()
+
+
+def _lead(**kw):
+    return {"session_id": "s1", "name": "Ana", "city": "Bogotá", "profession": "arquitecta", **kw}
+
+
+# ---------- dedup / idempotencia ----------
+def test_same_idempotency_key_is_a_noop(leads_db):
+    lead_id, created = lead_store.save_lead(_lead(email="ana@x.co"), idempotency_key="k1")
+    assert created
+    assert lead_store.save_lead(_lead(email="otra@x.co", name="Otra"), idempotency_key="k1") == (lead_id, False)
+    assert [r[6] for r in _rows(leads_db)] == ["Ana"]
+    assert _queued(leads_db) == 1
+
+
+def test_same_email_updates_profile_without_requeue(leads_db):
+    lead_id, _ = lead_store.save_lead(_lead(email="Ana@X.co"))
+    assert lead_store.save_lead(_lead(email=" ana@x.co ", name="Ana María")) == (lead_id, False)
+    rows = _rows(leads_db)
+    assert len(rows) == 1 and rows[0][6] == "Ana María"
+    assert _queued(leads_db) == 1
+
+
+def test_same_phone_dedups_across_formats(leads_db):
+    lead_id, _ = lead_store.save_lead(_lead(phone="+57 300 123 4567"))
+    assert lead_store.save_lead(_lead(phone="3001234567")) == (lead_id, False)
+    assert len(_rows(leads_db)) == 1
+    assert _queued(leads_db) == 1
+
+
+def test_phone_added_later_is_normalized_and_dedups(leads_db):
+    lead_id, _ = lead_store.save_lead(_lead(email="ana@x.co"))
+    assert lead_store.save_lead(_lead(email="ana@x.co", phone="300 123 4567")) == (lead_id, False)
+    (row,) = _rows(leads_db)
+    assert row[2] == "300 123 4567" and row[4] == "3001234567"
+    # ahora el teléfono solo también identifica al lead
+    assert lead_store.save_lead(_lead(phone="+573001234567")) == (lead_id, False)
+    assert len(_rows(leads_db)) == 1
+    assert _queued(leads_db) == 1
+
+
+def test_other_session_is_a_new_lead(leads_db):
+    a, _ = lead_store.save_lead(_lead(email="ana@x.co"))
+    b, created = lead_store.save_lead(_lead(email="ana@x.co", session_id="s2"))
+    assert created and a != b
+    assert _queued(leads_db) == 2
+
+
+def test_phone_owned_by_other_lead_is_not_stolen(leads_db):
+    by_email, _ = lead_store.save_lead(_lead(email="ana@x.co"))
+    by_phone, _ = lead_store.save_lead(_lead(phone="3001234567"))
+    # ambos a la vez: actualiza el más reciente sin violar los índices únicos
+    assert lead_store.save_lead(_lead(email="ana@x.co", phone="3001234567")) == (by_phone, False)
+    norms = {r[0]: (r[3], r[4]) for r in _rows(leads_db)}
+    assert norms[by_email] == ("ana@x.co", None)
+    assert norms[by_phone][1] == "3001234567"
+
+
+@pytest.mark.parametrize("key", [None, "k-race"])
+def test_concurrent_submissions_create_one_lead(leads_db, key):
+    barrier = threading.Barrier(8)
+    results = []
+
+    def submit():
+        barrier.wait()
+        results.append(lead_store.save_lead(_lead(email="ana@x.co", phone="3001234567"), idempotency_key=key))
+
+    threads = [threading.Thread(target=submit) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10)
+    assert len(results) == 8
+    assert len({lead_id for lead_id, _ in results}) == 1
+    assert sum(created for _, created in results) == 1
+    assert len(_rows(leads_db)) == 1
+    assert _queued(leads_db) == 1
+
+
+# ---------- outbox ----------
+def _status(path, outbox_id):
+    con = sqlite3.connect(path)
+    try:
+        return con.execute("SELECT status, attempts FROM lead_outbox WHERE id = ?", (outbox_id,)).fetchone()
+    finally:
+        con.close()
+
+
+def test_claim_leases_rows(leads_db):
+    oid = lead_outbox.enqueue_lead({"email": "ana@x.co"})
+    assert [i for i, _, _ in lead_outbox.claim_due()] == [oid]
+    assert lead_outbox.claim_due() == []   # reclamado: oculto durante el lease
+
+
+def test_expired_lease_returns_to_queue(leads_db, monkeypatch):
+    monkeypatch.setattr(lead_outbox, "LEASE_SECONDS", -1)
+    oid = lead_outbox.enqueue_lead({"email": "ana@x.co"})
+    lead_outbox.claim_due()
+    assert [i for i, _, _ in lead_outbox.claim_due()] == [oid]
+
+
+def test_delivery_success_marks_sent(leads_db):
+    oid = lead_outbox.enqueue_lead({"email": "ana@x.co"})
+    assert asyncio.run(lead_outbox.drain_once(lambda raw: True)) == 1
+    assert _status(leads_db, oid) == ("sent", 1)
+    assert asyncio.run(lead_outbox.drain_once(lambda raw: True)) == 0
+
+
+def test_failures_back_off_then_dead_letter_and_requeue(leads_db, monkeypatch):
+    monkeypatch.setattr(lead_outbox, "MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(lead_outbox, "BACKOFF_BASE", 0)
+    oid = lead_outbox.enqueue_lead({"email": "ana@x.co"})
+
+    def boom(raw):
+        raise RuntimeError("CRM caído")
+
+    asyncio.run(lead_outbox.drain_once(boom))
+    assert _status(leads_db, oid) == ("pending", 1)
+    asyncio.run(lead_outbox.drain_once(lambda raw: False))
+    assert _status(leads_db, oid) == ("dead", 2)
+    assert lead_outbox.outbox_stats() == {"pending": 0, "sent": 0, "dead": 1}
+    assert asyncio.run(lead_outbox.drain_once(lambda raw: True)) == 0
+
+    assert lead_outbox.requeue_dead() == 1
+    assert _status(leads_db, oid) == ("pending", 0)
+    asyncio.run(lead_outbox.drain_once(lambda raw: True))
+    assert _status(leads_db, oid) == ("sent", 1)
+
+
+def test_backoff_grows_and_is_capped(monkeypatch):
+    monkeypatch.setattr(lead_outbox, "BACKOFF_BASE", 5)
+    monkeypatch.setattr(lead_outbox, "BACKOFF_MAX", 30)
+    monkeypatch.setattr(lead_outbox.random, "uniform", lambda a, b: 1.0)
+    assert [lead_outbox.backoff_delay(n) for n in (1, 2, 3, 4, 5)] == [5, 10, 20, 30, 30]
@@ -0,0 +1,184 @@
+import threading
+
+import pytest
+
+from backend.services import llm_admission, openai_client
+from backend.services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+# ---------- circuit breaker ----------
+def test_breaker_opens_after_threshold_and_rejects():
+    b = CircuitBreaker("t", failure_threshold=2, reset_timeout=60)
+    b.record_failure("x")
+    assert b.state == CLOSED and b.allow()
+    b.record_failure("x")
+    assert b.state == OPEN
+    assert not b.allow()
+    assert b.blocked()
+    assert b.rejected == 2
+
+
+def test_breaker_half_open_lets_one_probe_through():
+    b = CircuitBreaker("t", failure_threshold=1, reset_timeout=0)
+    b.record_failure("x")
+    assert b.state == HALF_OPEN
+    assert not b.blocked()          # no consume la prueba
+    assert b.allow()
+    assert not b.allow()            # solo una prueba a la vez
+    b.record_success()
+    assert b.state == CLOSED and b.allow()
+
+
+def test_breaker_failed_probe_reopens():
+    b = CircuitBreaker("t", failure_threshold=1, reset_timeout=0)
+    b.record_failure("x")
+    assert b.allow()
+    b.reset_timeout = 60
+    b.record_failure("y")
+    assert b.state == OPEN and not b.allow()
+
+
+# ---------- guarda de llamadas (breaker + admisión) ----------
+@pytest.fixture
+def half_open(monkeypatch):
+    b = CircuitBreaker("llm-test", failure_threshold=1, reset_timeout=0)
+    b.record_failure("boom")
+    monkeypatch.setattr(openai_client, "BREAKER", b)
+    return b
+
+
+def _fake_upstream(monkeypatch, calls):
+    def fake_call(api_key, model, system_prompt, user_msg, site, timeout):
+        calls.append(user_msg)
+        openai_client.BREAKER.record_success()
+        return "respuesta del modelo."
+    monkeypatch.setattr(openai_client, "_call", fake_call)
+
+
+def test_half_open_probe_shed_does_not_wedge_breaker(monkeypatch, half_open):
+    calls = []
+    _fake_upstream(monkeypatch, calls)
+    monkeypatch.setattr(llm_admission, "acquire", lambda timeout=None: False)
+
+    out = openai_client._guarded_chat("k", "m", "sys", "hola", "test")
+    assert openai_client.is_fallback(out)
+    assert half_open.state == HALF_OPEN
+    assert calls == []
+
+    # con ranura disponible la siguiente llamada sí es la prueba y cierra el breaker
+    monkeypatch.setattr(llm_admission, "acquire", lambda timeout=None: True)
+    monkeypatch.setattr(llm_admission, "release", lambda: None)
+    out = openai_client._guarded_chat("k", "m", "sys", "hola", "test")
+    assert out == "respuesta del modelo."
+    assert calls == ["hola"]
+    assert half_open.state == CLOSED
+
+
+def test_half_open_probe_skipped_for_deadline_does_not_wedge_breaker(monkeypatch, half_open):
+    calls = []
+    _fake_upstream(monkeypatch, calls)
+    left = iter([5.0, 0.0])   # antes de la cola hay presupuesto; después ya no
+    monkeypatch.setattr(openai_client, "deadline_remaining", lambda: next(left))
+    monkeypatch.setattr(llm_admission, "acquire", lambda timeout=None: True)
+    monkeypatch.setattr(llm_admission, "release", lambda: None)
+
+    assert openai_client.is_fallback(openai_client._guarded_chat("k", "m", "sys", "hola", "test"))
+    assert calls == []
+    assert half_open.allow()   # la prueba sigue disponible
+
+
+def test_open_breaker_skips_without_queueing(monkeypatch):
+    b = CircuitBreaker("llm-test", failure_threshold=1, reset_timeout=60)
+    b.record_failure("boom")
+    monkeypatch.setattr(openai_client, "BREAKER", b)
+    monkeypatch.setattr(llm_admission, "acquire", lambda timeout=None: pytest.fail("no debe pedir ranura"))
+    assert openai_client.is_fallback(openai_client._guarded_chat("k", "m", "sys", "hola", "test"))
+
+
+# ---------- admisión ----------
+@pytest.fixture
+def one_slot(monkeypatch):
+    monkeypatch.setattr(llm_admission, "_SLOTS", threading.BoundedSemaphore(1))
+    monkeypatch.setattr(llm_admission, "_IN_FLIGHT", 0)
+    monkeypatch.setattr(llm_admission, "_QUEUED", 0)
+    monkeypatch.setattr(llm_admission, "DEGRADE_INFLIGHT", 1)
+    monkeypatch.setattr(llm_admission, "DEGRADE_QUEUED", 1)
+
+
+def test_admission_sheds_when_full_and_recovers(one_slot):
+    assert llm_admission.acquire(timeout=0)
+    assert llm_admission.snapshot()["in_flight"] == 1
+    assert llm_admission.degrade_reason() == "in_flight"
+    assert not llm_admission.acquire(timeout=0)
+    llm_admission.release()
+    assert llm_admission.snapshot()["in_flight"] == 0
+    assert llm_admission.degrade_reason() is None
+    assert llm_admission.acquire(timeout=0)
+    llm_admission.release()
+
+
+def test_admission_queued_waiter_gets_released_slot(one_slot):
+    assert llm_admission.acquire(timeout=0)
+    got = []
+    t = threading.Thread(target=lambda: got.append(llm_admission.acquire(timeout=2)))
+    t.start()
+    for _ in range(200):
+        if llm_admission.snapshot()["queued"]:
+            break
+        threading.Event().wait(0.005)
+    assert llm_admission.degrade_reason() == "queued"
+    llm_admission.release()
+    t.join(2)
+    assert got == [True]
+    snap = llm_admission.snapshot()
+    assert (snap["in_flight"], snap["queued"]) == (1, 0)
+    llm_admission.release()
+
+
+def test_breaker_open_degrades_turn():
+    assert llm_admission.degrade_reason(breaker_open=True) == "breaker_open"
+
+
+# ---------- coalescencia ----------
+def _coalesce(monkeypatch, leader_results):
+    """Un líder bloqueado en _guarded_chat y un seguidor con la misma clave."""
+    monkeypatch.setenv("OPENAI_API_KEY", "k")
+    monkeypatch.setattr(openai_client, "LLM_COALESCE", True)
+    gate, started = threading.Event(), threading.Event()
+    results = iter(leader_results)
+    calls = []
+
+    def fake_guarded(api_key, model, system_prompt, user_msg, site):
+        calls.append(site)
+        if site == "leader":
+            started.set()
+            gate.wait(2)
+        return next(results)
+    monkeypatch.setattr(openai_client, "_guarded_chat", fake_guarded)
+
+    out = {}
+    t = threading.Thread(target=lambda: out.setdefault("leader", openai_client.chat("sys", "Hola", "leader")))
+    t.start()
+    assert started.wait(2)
+    # el seguidor consulta el presupuesto justo antes de esperar al líder
+    waiting = threading.Event()
+    monkeypatch.setattr(openai_client, "deadline_remaining", lambda: waiting.set())
+    f = threading.Thread(target=lambda: out.setdefault("follower", openai_client.chat("sys", "hola ", "follower")))
+    f.start()
+    assert waiting.wait(2)
+    gate.set()
+    t.join(2); f.join(2)
+    return out, calls
+
+
+def test_follower_shares_real_answer(monkeypatch):
+    out, calls = _coalesce(monkeypatch, ["respuesta real."])
+    assert out == {"leader": "respuesta real.", "follower": "respuesta real."}
+    assert calls == ["leader"]
+
+
+def test_follower_does_not_share_fallback(monkeypatch):
+    out, calls = _coalesce(monkeypatch, [openai_client._fallback(), "respuesta propia."])
+    assert openai_client.is_fallback(out["leader"])
+    assert out["follower"] == "respuesta propia."
+    assert calls == ["leader", "follower"]
@@ -0,0 +1,59 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.routers import search as search_router
+from backend.services import search_service
+
+PRODUCTS = [
+    {"sku": "PAN-6060", "name": "Panel LED 60x60 48W", "category": "Paneles", "tags": ["oficina"], "description": "panel empotrable"},
+    {"sku": "REF-100", "name": "Reflector LED 100W IP65", "category": "Reflectores", "tags": ["exterior"], "description": "reflector para fachada"},
+    {"sku": "HB-150", "name": "Highbay 150W", "category": "Industrial", "tags": ["bodega"], "description": "campana industrial"},
+]
+
+
+@pytest.fixture
+def catalog(monkeypatch):
+    monkeypatch.setattr(search_service, "_BUILT", False)
+    search_service._ensure_index(PRODUCTS)
+    yield PRODUCTS
+    search_service._BUILT = False
+
+
+def test_batch_matches_per_query_search(catalog):
+    queries = ["panel 60x60", "reflector 100w", "panel 60x60", "", "highbay bodega"]
+    got = list(search_service.search_batch(catalog, queries, limit=5))
+    assert [i for i, _ in got] == list(range(len(queries)))
+    assert [found for _, found in got] == [search_service.search_candidates(catalog, q, 5) for q in queries]
+
+
+@pytest.fixture
+def client(catalog, monkeypatch):
+    monkeypatch.setattr(search_router, "load_products", lambda: ({p["sku"]: p for p in PRODUCTS}, None))
+    app = FastAPI()
+    app.include_router(search_router.router)
+    return TestClient(app)
+
+
+def test_endpoint_streams_ndjson_in_order(client):
+    r = client.post("/search/batch", json={"queries": ["reflector 100w", "panel 60x60"], "limit": 1})
+    assert r.status_code == 200
+    lines = [json.loads(line) for line in r.text.splitlines()]
+    assert [(l["i"], l["query"]) for l in lines] == [(0, "reflector 100w"), (1, "panel 60x60")]
+    assert all(len(l["products"]) == 1 for l in lines)
+
+
+@pytest.mark.parametrize("body, status", [
+    ({"queries": []}, 400),
+    ({"queries": ["panel"], "limit": 0}, 400),
+    ({"queries": ["panel", "x" * 201]}, 413),
+])
+def test_endpoint_rejects_bad_batches(client, body, status):
+    assert client.post("/search/batch", json=body).status_code == status
+
+
+def test_endpoint_caps_batch_size(client, monkeypatch):
+    monkeypatch.setattr(search_router, "MAX_QUERIES", 2)
+    assert client.post("/search/batch", json={"queries": ["a", "b", "c"]}).status_code == 413
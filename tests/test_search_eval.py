@@ -0,0 +1,15 @@
+import json
+
+from bench.search_eval import GOLDEN_PATH, missing_codes
+from backend.services.product_loader import load_products
+
+
+def test_golden_codes_exist_in_catalog():
+    golden = json.loads(GOLDEN_PATH.read_text(encoding="utf-8"))
+    catalog, _ = load_products()
+    assert missing_codes(golden, list(catalog.values())) == {}
+
+
+def test_missing_codes_reports_unknown_judgments():
+    golden = {"queries": [{"id": "ok", "relevant": ["A1"]}, {"id": "bad", "relevant": ["A1", "ZZ9"]}]}
+    assert missing_codes(golden, [{"code": "A1"}, {"sku": "B2"}]) == {"bad": ["ZZ9"]}
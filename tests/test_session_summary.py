@@ -0,0 +1,50 @@
+import pytest
+
+from backend.routers import db
+from backend.services import openai_client, session_summary
+
+
+@pytest.fixture
+def chat_db(tmp_path, monkeypatch):
+    path = tmp_path / "chat.db"
+    monkeypatch.setattr(db, "DB_PATH", path)
+    monkeypatch.setattr(session_summary, "DB_PATH", path)
+    db.guardar_conversacion("s1", "necesito iluminar una bodega", "te muestro highbay")
+    return path
+
+
+def _llm(monkeypatch, fn):
+    monkeypatch.setattr(session_summary, "llm_chat", fn)
+
+
+def test_summary_is_persisted(monkeypatch, chat_db):
+    _llm(monkeypatch, lambda sys, msg, site=None: "El cliente busca highbay para una bodega.")
+    assert session_summary.refresh_summary("s1") == "El cliente busca highbay para una bodega."
+    assert session_summary.get_cached_summary("s1") == ("El cliente busca highbay para una bodega.", False)
+
+
+@pytest.mark.parametrize("llm", [
+    lambda sys, msg, site=None: openai_client._fallback(),
+    lambda sys, msg, site=None: "",
+    lambda sys, msg, site=None: 1 / 0,
+    None,
+])
+def test_failed_summary_is_not_persisted(monkeypatch, chat_db, llm):
+    _llm(monkeypatch, llm)
+    assert session_summary.refresh_summary("s1") is None
+    assert db.obtener_resumen("s1") is None
+    assert session_summary.get_cached_summary("s1") == (None, True)
+
+    # en cuanto el LLM responde, la sesión se resume
+    _llm(monkeypatch, lambda sys, msg, site=None: "Resumen real.")
+    assert session_summary.refresh_summary("s1") == "Resumen real."
+    assert db.obtener_resumen("s1")[0] == "Resumen real."
+
+
+def test_stale_summary_is_kept_when_regeneration_fails(monkeypatch, chat_db):
+    _llm(monkeypatch, lambda sys, msg, site=None: "Resumen viejo.")
+    session_summary.refresh_summary("s1")
+    db.guardar_conversacion("s1", "y paneles 60x60", "claro")
+    _llm(monkeypatch, lambda sys, msg, site=None: openai_client._fallback())
+    assert session_summary.refresh_summary("s1") is None
+    assert session_summary.get_cached_summary("s1") == ("Resumen viejo.", True)
@@ -0,0 +1,39 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.services.static_assets import (
+    FRONTEND_DIR, IMMUTABLE_CACHE, CachedStaticFiles, asset_hash, asset_url,
+)
+
+
+@pytest.fixture(scope="module")
+def client():
+    app = FastAPI()
+    app.mount("/static", CachedStaticFiles(directory=str(FRONTEND_DIR)), name="static")
+    return TestClient(app)
+
+
+def test_current_hash_is_immutable(client):
+    r = client.get(asset_url("history.css"))
+    assert r.status_code == 200
+    assert r.headers["cache-control"] == IMMUTABLE_CACHE
+
+
+@pytest.mark.parametrize("query", [
+    "", "?nav=1", "?dev=abc", "?v=0000deadbeef", "?v=", "?x=1&v=0000deadbeef",
+])
+def test_other_queries_keep_default_caching(client, query):
+    r = client.get(f"/static/history.css{query}")
+    assert r.status_code == 200
+    assert r.headers.get("cache-control") != IMMUTABLE_CACHE
+
+
+def test_hash_of_other_file_is_not_immutable(client):
+    r = client.get(f"/static/chatbox.css?v={asset_hash('history.css')}")
+    assert r.headers.get("cache-control") != IMMUTABLE_CACHE
+
+
+def test_current_hash_among_other_params(client):
+    r = client.get(f"/static/history.css?lang=es&v={asset_hash('history.css')}")
+    assert r.headers["cache-control"] == IMMUTABLE_CACHE